@@ -0,0 +1,203 @@
+"""
+Agregação de transações em uma única passada
+
+Calcula, por tipo de transação, quantidade, total, mínimo, máximo e média,
+opcionalmente agrupando por dia, semana, mês ou conta.
+O resultado tem a forma {grupo: {tipo: Estatisticas}}; sem agrupamento o
+único grupo é None.
+
+Sobre o armazenamento colunar (TransacoesColunares) o cálculo usa NumPy
+quando disponível e um laço simples caso contrário.
+"""
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional
+    np = None
+
+# Constantes
+PERIODOS = ("dia", "semana", "mes")
+AGRUPAMENTOS = PERIODOS + ("conta",)
+EPOCA = datetime(1970, 1, 1)
+SEGUNDOS_DIA = 86400
+
+class Estatisticas:
+    """Quantidade, total, mínimo e máximo de um conjunto de valores"""
+    __slots__ = ("quantidade", "total", "minimo", "maximo")
+
+    def __init__(self, quantidade=0, total=0.0, minimo=None, maximo=None):
+        self.quantidade = quantidade
+        self.total = total
+        self.minimo = minimo
+        self.maximo = maximo
+
+    def adicionar(self, valor):
+        self.quantidade += 1
+        self.total += valor
+        if self.minimo is None or valor < self.minimo:
+            self.minimo = valor
+        if self.maximo is None or valor > self.maximo:
+            self.maximo = valor
+
+    def combinar(self, outra):
+        """Junta as estatísticas de outro conjunto a estas"""
+        if not outra.quantidade:
+            return
+        self.quantidade += outra.quantidade
+        self.total += outra.total
+        self.minimo = outra.minimo if self.minimo is None else min(self.minimo, outra.minimo)
+        self.maximo = outra.maximo if self.maximo is None else max(self.maximo, outra.maximo)
+
+    @property
+    def media(self):
+        return self.total / self.quantidade if self.quantidade else 0.0
+
+    def para_dict(self):
+        return {
+            "quantidade": self.quantidade,
+            "total": self.total,
+            "minimo": self.minimo,
+            "maximo": self.maximo,
+            "media": self.media
+        }
+
+    def __repr__(self):
+        return f"Estatisticas({self.para_dict()})"
+
+def rotulo_periodo(timestamp, periodo):
+    """Rótulo do dia (AAAA-MM-DD), semana ISO (AAAA-Wss) ou mês (AAAA-MM) de um timestamp"""
+    momento = EPOCA + timedelta(seconds=timestamp)
+    if periodo == "dia":
+        return momento.strftime("%Y-%m-%d")
+    if periodo == "semana":
+        return momento.strftime("%G-W%V")
+    if periodo == "mes":
+        return momento.strftime("%Y-%m")
+    raise ValueError(f"Período inválido: {periodo}")
+
+def agregar(transacoes, chave=None):
+    """Agrega transações (dicionários com "tipo" e "valor") em uma única passada
+    
+    chave é uma função que recebe a transação e retorna o grupo dela.
+    """
+    resultado = {}
+    for t in transacoes:
+        grupo = chave(t) if chave is not None else None
+        por_tipo = resultado.get(grupo)
+        if por_tipo is None:
+            por_tipo = resultado[grupo] = {}
+        estatisticas = por_tipo.get(t["tipo"])
+        if estatisticas is None:
+            estatisticas = por_tipo[t["tipo"]] = Estatisticas()
+        estatisticas.adicionar(t["valor"])
+    return resultado
+
+def combinar_agregacoes(destino, origem):
+    """Soma uma agregação {grupo: {tipo: Estatisticas}} em outra"""
+    for grupo, por_tipo in origem.items():
+        por_tipo_destino = destino.setdefault(grupo, {})
+        for tipo, estatisticas in por_tipo.items():
+            por_tipo_destino.setdefault(tipo, Estatisticas()).combinar(estatisticas)
+    return destino
+
+def totais_por_tipo(agregacao):
+    """Junta todos os grupos de uma agregação em {tipo: Estatisticas}"""
+    totais = {}
+    for por_tipo in agregacao.values():
+        for tipo, estatisticas in por_tipo.items():
+            totais.setdefault(tipo, Estatisticas()).combinar(estatisticas)
+    return totais
+
+def _agregar_colunar_numpy(armazenamento, posicoes, agrupar_por):
+    valores = np.frombuffer(armazenamento.valores, dtype=np.float64)
+    tipos = np.frombuffer(armazenamento.codigos_tipo, dtype=np.uint8).astype(np.int64)
+    if posicoes is not None:
+        indices = np.frombuffer(posicoes, dtype=np.int32) if hasattr(posicoes, "typecode") else np.asarray(posicoes, dtype=np.int64)
+        valores = valores[indices]
+        tipos = tipos[indices]
+    if valores.size == 0:
+        return {}
+    
+    # Código numérico do grupo de cada transação
+    rotulos = None
+    if agrupar_por is None:
+        grupos = np.zeros(valores.size, dtype=np.int64)
+    elif agrupar_por == "conta":
+        grupos = np.frombuffer(armazenamento.contas_origem, dtype=np.int32).astype(np.int64)
+        if posicoes is not None:
+            grupos = grupos[indices]
+        rotulos = armazenamento.numeros_conta
+    else:
+        timestamps = np.frombuffer(armazenamento.timestamps, dtype=np.int64)
+        if posicoes is not None:
+            timestamps = timestamps[indices]
+        dias = timestamps // SEGUNDOS_DIA
+        if agrupar_por == "dia":
+            grupos = dias
+        elif agrupar_por == "semana":
+            grupos = (dias + 3) // 7  # 01/01/1970 foi uma quinta-feira; semanas começam na segunda
+        else:
+            grupos = timestamps.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+    
+    # Chave combinada (grupo, tipo) ordenada para reduzir cada faixa de uma vez
+    quantidade_tipos = len(armazenamento.tipos)
+    chaves = grupos * quantidade_tipos + tipos
+    ordem = np.argsort(chaves, kind="stable")
+    chaves = chaves[ordem]
+    valores = valores[ordem]
+    inicios = np.concatenate(([0], np.flatnonzero(np.diff(chaves)) + 1))
+    
+    quantidades = np.diff(np.append(inicios, chaves.size))
+    totais = np.add.reduceat(valores, inicios)
+    minimos = np.minimum.reduceat(valores, inicios)
+    maximos = np.maximum.reduceat(valores, inicios)
+    
+    resultado = {}
+    for i, inicio in enumerate(inicios):
+        grupo_codigo, tipo_codigo = divmod(int(chaves[inicio]), quantidade_tipos)
+        if agrupar_por is None:
+            grupo = None
+        elif agrupar_por == "conta":
+            grupo = rotulos[grupo_codigo]
+        elif agrupar_por == "mes":
+            grupo = f"{1970 + grupo_codigo // 12:04d}-{grupo_codigo % 12 + 1:02d}"
+        elif agrupar_por == "semana":
+            grupo = rotulo_periodo((grupo_codigo * 7 - 3) * SEGUNDOS_DIA, "semana")
+        else:
+            grupo = rotulo_periodo(grupo_codigo * SEGUNDOS_DIA, "dia")
+        resultado.setdefault(grupo, {})[armazenamento.tipos[tipo_codigo]] = Estatisticas(
+            int(quantidades[i]), float(totais[i]), float(minimos[i]), float(maximos[i])
+        )
+    return resultado
+
+def agregar_colunar(armazenamento, posicoes=None, agrupar_por=None):
+    """Agrega um TransacoesColunares (ou só as posições informadas) por tipo
+    
+    agrupar_por pode ser None, "dia", "semana", "mes" ou "conta" (conta de origem).
+    """
+    if agrupar_por is not None and agrupar_por not in AGRUPAMENTOS:
+        raise ValueError(f"Agrupamento inválido: {agrupar_por}")
+    if np is not None:
+        return _agregar_colunar_numpy(armazenamento, posicoes, agrupar_por)
+    
+    # Sem NumPy: um laço sobre as colunas, sem montar as visões de transação
+    valores = armazenamento.valores
+    tipos = armazenamento.codigos_tipo
+    timestamps = armazenamento.timestamps
+    contas = armazenamento.contas_origem
+    resultado = {}
+    for posicao in (range(len(valores)) if posicoes is None else posicoes):
+        if agrupar_por is None:
+            grupo = None
+        elif agrupar_por == "conta":
+            grupo = armazenamento.numeros_conta[contas[posicao]]
+        else:
+            grupo = rotulo_periodo(timestamps[posicao], agrupar_por)
+        por_tipo = resultado.setdefault(grupo, {})
+        tipo = armazenamento.tipos[tipos[posicao]]
+        estatisticas = por_tipo.get(tipo)
+        if estatisticas is None:
+            estatisticas = por_tipo[tipo] = Estatisticas()
+        estatisticas.adicionar(valores[posicao])
+    return resultado
@@ -0,0 +1,86 @@
+"""
+Totais do sistema bancário mantidos a cada lançamento
+
+Guarda o saldo total, a quantidade de contas, os totais por agência e o
+volume diário de depósitos, saques e transferências, para que o relatório de
+saldo total não precise ler todas as contas.
+"""
+import os
+import json
+
+from agregacao import rotulo_periodo
+
+# Constantes
+ARQUIVO_AGREGADOS = "agregados.json"
+
+class Agregados:
+    """Totais gerais, por agência e por dia, atualizados incrementalmente"""
+
+    def __init__(self):
+        self.saldo_total = 0.0
+        self.quantidade_contas = 0
+        self.agencias = {}  # {agencia: {"saldo": saldo, "contas": quantidade}}
+        self.volumes_diarios = {}  # {"AAAA-MM-DD": {tipo: {"quantidade": n, "total": valor}}}
+        self.geracao = 0  # Geração do snapshot a que os totais correspondem (ver banco.ArmazenamentoTexto)
+
+    @property
+    def saldo_medio(self):
+        return self.saldo_total / self.quantidade_contas if self.quantidade_contas else 0.0
+
+    def registrar_conta(self, agencia, saldo=0.0):
+        """Conta nova (ou carregada) na agência"""
+        dados = self.agencias.setdefault(agencia, {"saldo": 0.0, "contas": 0})
+        dados["contas"] += 1
+        dados["saldo"] += saldo
+        self.quantidade_contas += 1
+        self.saldo_total += saldo
+
+    def ajustar_saldo(self, agencia, diferenca):
+        """Soma uma diferença de saldo (positiva ou negativa) na agência"""
+        self.agencias.setdefault(agencia, {"saldo": 0.0, "contas": 0})["saldo"] += diferenca
+        self.saldo_total += diferenca
+
+    def registrar_transacao(self, tipo, valor, timestamp):
+        """Soma a transação no volume do dia"""
+        dia = self.volumes_diarios.setdefault(rotulo_periodo(timestamp, "dia"), {})
+        volume = dia.setdefault(tipo, {"quantidade": 0, "total": 0.0})
+        volume["quantidade"] += 1
+        volume["total"] += valor
+
+    def para_dict(self):
+        return {
+            "saldo_total": self.saldo_total,
+            "quantidade_contas": self.quantidade_contas,
+            "agencias": self.agencias,
+            "volumes_diarios": self.volumes_diarios,
+            "geracao": self.geracao
+        }
+
+    def copiar(self):
+        """Cópia independente (para gravar enquanto o sistema continua operando)"""
+        return Agregados.de_dict(json.loads(json.dumps(self.para_dict())))
+
+    @classmethod
+    def de_dict(cls, dados):
+        agregados = cls()
+        agregados.saldo_total = dados.get("saldo_total", 0.0)
+        agregados.quantidade_contas = dados.get("quantidade_contas", 0)
+        agregados.agencias = dados.get("agencias", {})
+        agregados.volumes_diarios = dados.get("volumes_diarios", {})
+        agregados.geracao = dados.get("geracao", 0)
+        return agregados
+
+    def salvar(self, caminho):
+        """Grava os agregados em JSON de forma atômica"""
+        caminho_temporario = caminho + ".tmp"
+        with open(caminho_temporario, "w") as arquivo:
+            json.dump(self.para_dict(), arquivo)
+        os.replace(caminho_temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        """Lê os agregados gravados (None se o arquivo não existir)"""
+        if not os.path.exists(caminho):
+            return None
+        with open(caminho, "r") as arquivo:
+            return cls.de_dict(json.load(arquivo))
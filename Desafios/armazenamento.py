@@ -0,0 +1,470 @@
+"""
+Armazenamento do sistema bancário em SQLite (modo WAL)
+
+Alternativa ao ArmazenamentoTexto de banco.py, com os mesmos métodos. Cada
+registro que iria para o journal é aplicado em SQL: uma transação gravada
+insere a linha do histórico e atualiza os saldos das contas envolvidas em uma
+única transação do SQLite, então o arquivo nunca fica com um lançamento pela
+metade. Não há journal para compactar; o snapshot só acrescenta o que ainda
+não foi gravado.
+
+Os agregados (saldo total, totais por agência e volume diário) ficam em
+tabelas próprias, atualizadas na mesma transação de cada lançamento, e cada
+gravação registra uma versão nova em agregados.versao: os relatórios leem os
+totais em O(1) e o cache compara a versão em vez de ler o arquivo.
+
+No modo WAL, leitores (os relatórios, em outro processo) continuam lendo uma
+versão consistente enquanto o sistema grava. Os índices por conta, CPF e
+timestamp atendem o extrato, as contas de um usuário e os períodos sem ler a
+tabela inteira.
+
+Os campos seguem o sistema (cpf, data_cadastro, ...); as funções de leitura
+do fim do arquivo devolvem os dados no formato dos scripts (cpf_usuario,
+numero, agencia, conta_origem em toda transação).
+"""
+import os
+import random
+import sqlite3
+import threading
+from contextlib import closing
+from itertools import islice
+
+from indices import adicionar_conta_titular
+from agregados import Agregados
+from agregacao import rotulo_periodo
+from banco import (
+    ArmazenamentoTexto, AGENCIA, ARQUIVO_USUARIOS, ARQUIVO_CONTAS, ARQUIVO_TRANSACOES, ARQUIVO_JOURNAL,
+    ler_usuario, ler_conta, ler_transacao, ler_marcador_snapshot, ler_journal
+)
+from transacoes_colunar import timestamp_para_data
+
+# Constantes
+ARQUIVO_SQLITE = "banco.db"
+TIPOS_ARMAZENAMENTO = ("texto", "sqlite")
+TAMANHO_LOTE = 10000  # Linhas por executemany ao importar ou gravar um snapshot
+SUFIXOS_WAL = ("-wal", "-shm")  # Arquivos auxiliares do modo WAL, ao lado do banco
+ARQUIVOS_SQLITE = (ARQUIVO_SQLITE,)  # A versão gravada no banco cobre também o WAL (ver versao_sqlite)
+COLUNAS_TRANSACAO = "tipo, valor, conta_origem, conta_destino, timestamp"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    cpf TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    senha TEXT NOT NULL,
+    data_cadastro TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contas (
+    numero TEXT PRIMARY KEY,
+    saldo REAL NOT NULL,
+    limite REAL NOT NULL,
+    cpf TEXT NOT NULL,
+    saques_hoje INTEGER NOT NULL,
+    data_ultimo_saque TEXT
+);
+CREATE TABLE IF NOT EXISTS transacoes (
+    id INTEGER PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    valor REAL NOT NULL,
+    conta_origem TEXT NOT NULL,
+    conta_destino TEXT,
+    timestamp INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS agregados (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    saldo_total REAL NOT NULL,
+    quantidade_contas INTEGER NOT NULL,
+    versao INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS agencias (
+    agencia TEXT PRIMARY KEY,
+    saldo REAL NOT NULL,
+    contas INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS volumes_diarios (
+    dia TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    quantidade INTEGER NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (dia, tipo)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS contas_cpf ON contas (cpf);
+CREATE INDEX IF NOT EXISTS transacoes_origem ON transacoes (conta_origem, timestamp);
+CREATE INDEX IF NOT EXISTS transacoes_destino ON transacoes (conta_destino, timestamp) WHERE conta_destino IS NOT NULL;
+CREATE INDEX IF NOT EXISTS transacoes_timestamp ON transacoes (timestamp);
+"""
+
+SQL_USUARIO = """
+INSERT INTO usuarios VALUES (?, ?, ?, ?)
+ON CONFLICT (cpf) DO UPDATE SET nome = excluded.nome, senha = excluded.senha, data_cadastro = excluded.data_cadastro
+"""
+SQL_CONTA = """
+INSERT INTO contas VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (numero) DO UPDATE SET saldo = excluded.saldo, limite = excluded.limite, cpf = excluded.cpf,
+    saques_hoje = excluded.saques_hoje, data_ultimo_saque = excluded.data_ultimo_saque
+"""
+SQL_TRANSACAO = f"INSERT INTO transacoes ({COLUNAS_TRANSACAO}) VALUES (?, ?, ?, ?, ?)"
+SQL_CREDITO = "UPDATE contas SET saldo = saldo + ? WHERE numero = ?"
+SQL_DEBITO = "UPDATE contas SET saldo = saldo - ? WHERE numero = ?"
+# Mesma regra de aplicar_registro: o contador de saques recomeça a cada dia
+SQL_SAQUE = """
+UPDATE contas SET saldo = saldo - ?,
+    saques_hoje = CASE WHEN data_ultimo_saque = ? THEN saques_hoje + 1 ELSE 1 END,
+    data_ultimo_saque = ?
+WHERE numero = ?
+"""
+SQL_AJUSTE_TOTAL = "UPDATE agregados SET saldo_total = saldo_total + ?, quantidade_contas = quantidade_contas + ?"
+SQL_AJUSTE_AGENCIA = """
+INSERT INTO agencias VALUES (?, ?, ?)
+ON CONFLICT (agencia) DO UPDATE SET saldo = saldo + excluded.saldo, contas = contas + excluded.contas
+"""
+SQL_VOLUME = """
+INSERT INTO volumes_diarios VALUES (?, ?, ?, ?)
+ON CONFLICT (dia, tipo) DO UPDATE SET quantidade = quantidade + excluded.quantidade, total = total + excluded.total
+"""
+
+def conectar(caminho, somente_leitura=False):
+    """Abre o banco SQLite; na escrita, cria o esquema e liga o modo WAL"""
+    if somente_leitura:
+        # Sem criar o arquivo se ele não existir
+        return sqlite3.connect(f"file:{os.path.abspath(caminho)}?mode=ro", uri=True)
+    
+    conexao = sqlite3.connect(caminho, check_same_thread=False)
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("PRAGMA synchronous=NORMAL")  # No WAL, só o checkpoint espera o disco
+    conexao.executescript(ESQUEMA)
+    return conexao
+
+def nova_versao():
+    """Versão de uma gravação: sorteada, para que um banco restaurado de um backup não repita a de outro estado"""
+    return random.getrandbits(62)
+
+def versao_sqlite(caminho):
+    """Versão da última gravação do banco, lida sem percorrer o arquivo (None se não houver)"""
+    try:
+        with closing(conectar(caminho, somente_leitura=True)) as conexao:
+            linha = conexao.execute("SELECT versao FROM agregados").fetchone()
+    except sqlite3.Error:
+        return None
+    return linha[0] if linha else None
+
+def linha_usuario(cpf, usuario):
+    """Campos da tabela usuarios para um usuário do sistema"""
+    return (cpf, usuario["nome"], usuario["senha"], usuario["data_cadastro"])
+
+def linha_conta(numero, conta):
+    """Campos da tabela contas para uma conta do sistema"""
+    return (numero, conta["saldo"], conta["limite"], conta["cpf"], conta["saques_hoje"], conta["data_ultimo_saque"])
+
+def linha_transacao(t):
+    """Campos da tabela transacoes para uma transação do sistema"""
+    if t["tipo"] == "transferencia":
+        return (t["tipo"], t["valor"], t["conta_origem"], t["conta_destino"], t["timestamp"])
+    return (t["tipo"], t["valor"], t["conta"], None, t["timestamp"])
+
+def transacao_do_sistema(tipo, valor, conta_origem, conta_destino, timestamp):
+    """Transação no formato do sistema a partir de uma linha da tabela"""
+    if tipo == "transferencia":
+        return {"tipo": tipo, "valor": valor, "conta_origem": conta_origem, "conta_destino": conta_destino, "timestamp": timestamp}
+    return {"tipo": tipo, "valor": valor, "conta": conta_origem, "timestamp": timestamp}
+
+def em_lotes(linhas, tamanho=TAMANHO_LOTE):
+    """Agrupa um iterável em listas de até `tamanho` itens"""
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def linhas_texto(caminho, campos):
+    """Campos das linhas de um arquivo de texto do sistema (vazio se o arquivo não existir)"""
+    if not os.path.exists(caminho):
+        return
+    with open(caminho, "r") as arquivo:
+        for linha in arquivo:
+            dados = linha.strip().split(";")
+            if len(dados) >= campos:
+                yield dados
+
+class ArmazenamentoSQLite:
+    """Persistência do Banco em um arquivo SQLite"""
+    usa_journal = False
+
+    def __init__(self, caminho=ARQUIVO_SQLITE):
+        self.caminho = caminho
+        self.conexao = conectar(caminho)
+        self._trava = threading.Lock()  # Uma transação por vez na conexão compartilhada
+        if self.conexao.execute("SELECT 1 FROM agregados").fetchone() is None:
+            # Banco novo ou de antes das tabelas de agregados
+            with self._trava, self.conexao:
+                self._recalcular_agregados()
+
+    def fechar(self):
+        self.conexao.close()
+
+    def vazio(self):
+        """Indica se ainda não há usuários gravados"""
+        return self.conexao.execute("SELECT 1 FROM usuarios LIMIT 1").fetchone() is None
+
+    def carregar(self, banco):
+        """Carrega usuários, contas e histórico no Banco; não há journal a reaplicar"""
+        for linha in self.conexao.execute("SELECT cpf, nome, senha, data_cadastro FROM usuarios ORDER BY rowid"):
+            cpf, usuario = ler_usuario(linha)
+            banco.usuarios[cpf] = usuario
+        
+        consulta = "SELECT numero, saldo, limite, cpf, saques_hoje, data_ultimo_saque FROM contas ORDER BY rowid"
+        for numero, saldo, limite, cpf, saques_hoje, data_ultimo_saque in self.conexao.execute(consulta):
+            banco.contas[numero] = {
+                "saldo": saldo,
+                "limite": limite,
+                "cpf": cpf,
+                "saques_hoje": saques_hoje,
+                "data_ultimo_saque": data_ultimo_saque
+            }
+            adicionar_conta_titular(banco.titulares, cpf, numero)
+        
+        for linha in self.conexao.execute(f"SELECT {COLUNAS_TRANSACAO} FROM transacoes ORDER BY id"):
+            banco.registrar_transacao(transacao_do_sistema(*linha))
+        return 0
+
+    def _recalcular_agregados(self):
+        """Refaz as tabelas de agregados a partir das contas e transações (dentro da transação aberta)"""
+        self.conexao.execute("DELETE FROM agregados")
+        self.conexao.execute(
+            "INSERT INTO agregados SELECT 1, IFNULL(SUM(saldo), 0), COUNT(*), ? FROM contas", (nova_versao(),)
+        )
+        self.conexao.execute("DELETE FROM agencias")
+        self.conexao.execute("INSERT INTO agencias SELECT ?, SUM(saldo), COUNT(*) FROM contas HAVING COUNT(*)", (AGENCIA,))
+        self.conexao.execute("DELETE FROM volumes_diarios")
+        # Mesmo rótulo de dia de agregacao.rotulo_periodo (timestamps a partir de 1970-01-01)
+        self.conexao.execute(
+            "INSERT INTO volumes_diarios SELECT date(timestamp, 'unixepoch'), tipo, COUNT(*), SUM(valor)"
+            " FROM transacoes GROUP BY 1, 2"
+        )
+
+    def _gravar_agregados(self, agregados):
+        """Regrava as tabelas de agregados com os totais do Banco (dentro da transação aberta)"""
+        self.conexao.execute("DELETE FROM agregados")
+        self.conexao.execute(
+            "INSERT INTO agregados VALUES (1, ?, ?, ?)", (agregados.saldo_total, agregados.quantidade_contas, nova_versao())
+        )
+        self.conexao.execute("DELETE FROM agencias")
+        self.conexao.executemany(
+            "INSERT INTO agencias VALUES (?, ?, ?)",
+            ((agencia, dados["saldo"], dados["contas"]) for agencia, dados in agregados.agencias.items())
+        )
+        self.conexao.execute("DELETE FROM volumes_diarios")
+        self.conexao.executemany(
+            "INSERT INTO volumes_diarios VALUES (?, ?, ?, ?)",
+            (
+                (dia, tipo, volume["quantidade"], volume["total"])
+                for dia, volumes in agregados.volumes_diarios.items() for tipo, volume in volumes.items()
+            )
+        )
+
+    def _ajustar_saldo(self, diferenca, contas=0):
+        """Soma uma diferença de saldo (e contas novas) nos agregados, como Agregados.ajustar_saldo"""
+        self.conexao.execute(SQL_AJUSTE_TOTAL, (diferenca, contas))
+        self.conexao.execute(SQL_AJUSTE_AGENCIA, (AGENCIA, diferenca, contas))
+
+    def _aplicar(self, dados):
+        """Executa em SQL um registro do journal (dentro da transação aberta)"""
+        operacao = dados[0]
+        
+        if operacao == "usuario":
+            self.conexao.execute(SQL_USUARIO, linha_usuario(*ler_usuario(dados[1:])))
+        
+        elif operacao == "conta":
+            numero, conta = ler_conta(dados[1:])
+            anterior = self.conexao.execute("SELECT saldo FROM contas WHERE numero = ?", (numero,)).fetchone()
+            self.conexao.execute(SQL_CONTA, linha_conta(numero, conta))
+            if anterior is None:
+                self._ajustar_saldo(conta["saldo"], 1)
+            else:
+                self._ajustar_saldo(conta["saldo"] - anterior[0])
+        
+        elif operacao == "limite":
+            self.conexao.execute("UPDATE contas SET limite = ? WHERE numero = ?", (float(dados[2]), dados[1]))
+        
+        elif operacao == "transacao":
+            t = ler_transacao(dados[1:])
+            self.conexao.execute(SQL_TRANSACAO, linha_transacao(t))
+            
+            if t["tipo"] == "deposito":
+                self.conexao.execute(SQL_CREDITO, (t["valor"], t["conta"]))
+            elif t["tipo"] == "saque":
+                dia = timestamp_para_data(t["timestamp"])[:10]
+                self.conexao.execute(SQL_SAQUE, (t["valor"], dia, dia, t["conta"]))
+            elif t["tipo"] == "transferencia":
+                self.conexao.execute(SQL_DEBITO, (t["valor"], t["conta_origem"]))
+                self.conexao.execute(SQL_CREDITO, (t["valor"], t["conta_destino"]))
+            
+            # Mesmos efeitos de banco.contabilizar_transacao
+            if t["tipo"] in ("deposito", "saque"):
+                self._ajustar_saldo(t["valor"] if t["tipo"] == "deposito" else -t["valor"])
+            self.conexao.execute(SQL_VOLUME, (rotulo_periodo(t["timestamp"], "dia"), t["tipo"], 1, t["valor"]))
+
+    def gravar_registros(self, linhas):
+        """Aplica os registros em uma única transação: todos entram ou nenhum"""
+        with self._trava, self.conexao:
+            for linha in linhas:
+                dados = linha.rstrip("\n").split(";")
+                if len(dados) >= 3:
+                    self._aplicar(dados)
+            self.conexao.execute("UPDATE agregados SET versao = ?", (nova_versao(),))
+
+    def gravar_snapshot(self, snapshot):
+        """Regrava usuários e contas e acrescenta as transações ainda não gravadas
+        
+        O histórico só cresce; se a última transação gravada não for a mesma da
+        memória (dados substituídos, como em criar_dados_exemplo), a tabela é
+        regravada inteira.
+        """
+        linhas_usuarios, linhas_contas, transacoes, quantidade_transacoes, agregados = snapshot
+        with self._trava:
+            with self.conexao:
+                self.conexao.execute("DELETE FROM usuarios")
+                self.conexao.executemany(SQL_USUARIO, (linha_usuario(*ler_usuario(linha.split(";"))) for linha in linhas_usuarios))
+                self.conexao.execute("DELETE FROM contas")
+                self.conexao.executemany(SQL_CONTA, (linha_conta(*ler_conta(linha.split(";"))) for linha in linhas_contas))
+                
+                # Os ids começam em 1 e não têm buracos: o maior id é a quantidade gravada
+                ultima = self.conexao.execute(f"SELECT id, {COLUNAS_TRANSACAO} FROM transacoes ORDER BY id DESC LIMIT 1").fetchone()
+                gravadas = ultima[0] if ultima else 0
+                if gravadas > quantidade_transacoes or (ultima and ultima[1:] != linha_transacao(transacoes[gravadas - 1])):
+                    self.conexao.execute("DELETE FROM transacoes")
+                    gravadas = 0
+                for lote in em_lotes(linha_transacao(transacoes[i]) for i in range(gravadas, quantidade_transacoes)):
+                    self.conexao.executemany(SQL_TRANSACAO, lote)
+                self._gravar_agregados(agregados)
+            # Levar o WAL para o arquivo principal enquanto nenhum leitor precisa dele
+            self.conexao.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def limpar_registros(self):
+        """Nada a fazer: cada registro já foi aplicado nas tabelas"""
+
+    def copiar(self, destino):
+        """Cópia consistente do banco pela API de backup do SQLite, sem parar as gravações
+        
+        A cópia é lida por outra conexão (no modo WAL, leitores não bloqueiam
+        quem grava). Retorna a quantidade de transações copiadas.
+        """
+        with closing(conectar(self.caminho, somente_leitura=True)) as conexao, closing(sqlite3.connect(destino)) as copia:
+            conexao.backup(copia)
+            return copia.execute("SELECT IFNULL(MAX(id), 0) FROM transacoes").fetchone()[0]
+
+    def importar_texto(self, diretorio="."):
+        """Importa os arquivos de texto do sistema (snapshot e journal) para o banco vazio"""
+        with self._trava, self.conexao:
+            caminho = os.path.join(diretorio, ARQUIVO_USUARIOS)
+            for lote in em_lotes(linha_usuario(*ler_usuario(dados)) for dados in linhas_texto(caminho, 4)):
+                self.conexao.executemany(SQL_USUARIO, lote)
+            
+            caminho = os.path.join(diretorio, ARQUIVO_CONTAS)
+            for lote in em_lotes(linha_conta(*ler_conta(dados)) for dados in linhas_texto(caminho, 6)):
+                self.conexao.executemany(SQL_CONTA, lote)
+            
+            # Só as transações do snapshot (as sobras de uma compactação interrompida ficam de fora)
+            geracao, quantidade, _ = ler_marcador_snapshot(os.path.join(diretorio, ARQUIVO_CONTAS))
+            caminho = os.path.join(diretorio, ARQUIVO_TRANSACOES)
+            for lote in em_lotes(linha_transacao(ler_transacao(dados)) for dados in islice(linhas_texto(caminho, 5), quantidade)):
+                self.conexao.executemany(SQL_TRANSACAO, lote)
+            self._recalcular_agregados()
+            
+            # As operações depois do último snapshot, com as mesmas regras da gravação
+            for dados in ler_journal(os.path.join(diretorio, ARQUIVO_JOURNAL), geracao):
+                self._aplicar(dados)
+
+def abrir_armazenamento(tipo="texto", diretorio="."):
+    """Armazenamento do tipo pedido
+    
+    Na primeira vez com "sqlite", os dados dos arquivos de texto que já
+    existirem no diretório são importados para o banco.
+    """
+    if tipo not in TIPOS_ARMAZENAMENTO:
+        raise ValueError(f"Armazenamento inválido: {tipo} (use {', '.join(TIPOS_ARMAZENAMENTO)})")
+    if tipo == "texto":
+        return ArmazenamentoTexto(diretorio)
+    
+    armazenamento = ArmazenamentoSQLite(os.path.join(diretorio, ARQUIVO_SQLITE))
+    if armazenamento.vazio() and os.path.exists(os.path.join(diretorio, ARQUIVO_USUARIOS)):
+        armazenamento.importar_texto(diretorio)
+    return armazenamento
+
+# ----- Leitura pelos scripts (formato dos arquivos JSON) -----
+
+def consultar_usuarios(conexao):
+    """Usuários como em usuarios.json: {cpf: {"cpf", "nome", "data_cadastro"}}"""
+    return {
+        cpf: {"cpf": cpf, "nome": nome, "data_cadastro": data_cadastro}
+        for cpf, nome, data_cadastro in conexao.execute("SELECT cpf, nome, data_cadastro FROM usuarios ORDER BY rowid")
+    }
+
+def consultar_contas(conexao, cpf=None):
+    """Contas como em contas.json: {numero: {"numero", "agencia", "cpf_usuario", "saldo", "limite"}}
+    
+    Com cpf, só as contas desse usuário (pelo índice de CPF).
+    """
+    consulta = "SELECT numero, cpf, saldo, limite FROM contas"
+    parametros = ()
+    if cpf is not None:
+        consulta += " WHERE cpf = ?"
+        parametros = (cpf,)
+    return {
+        numero: {"numero": numero, "agencia": AGENCIA, "cpf_usuario": cpf_usuario, "saldo": saldo, "limite": limite}
+        for numero, cpf_usuario, saldo, limite in conexao.execute(consulta + " ORDER BY rowid", parametros)
+    }
+
+def consultar_transacoes(conexao, inicio=None, fim=None, conta=None):
+    """Transações como em transacoes.json, em ordem cronológica
+    
+    O período (timestamps inclusivos) e a conta são filtrados pelos índices.
+    """
+    condicoes = []
+    parametros = []
+    if inicio is not None:
+        condicoes.append("timestamp >= ?")
+        parametros.append(inicio)
+    if fim is not None:
+        condicoes.append("timestamp <= ?")
+        parametros.append(fim)
+    consulta = f"SELECT id, {COLUNAS_TRANSACAO} FROM transacoes"
+    if conta is not None:
+        # Cada lado usa o próprio índice (conta, timestamp)
+        filtro = "".join(" AND " + condicao for condicao in condicoes)
+        consulta = f"{consulta} WHERE conta_origem = ?{filtro} UNION ALL {consulta} WHERE conta_destino = ?{filtro}"
+        parametros = [conta, *parametros, conta, *parametros]
+    elif condicoes:
+        consulta += " WHERE " + " AND ".join(condicoes)
+    
+    for _, tipo, valor, conta_origem, conta_destino, timestamp in conexao.execute(consulta + " ORDER BY timestamp, id", parametros):
+        yield {"tipo": tipo, "valor": valor, "conta_origem": conta_origem, "conta_destino": conta_destino, "timestamp": timestamp}
+
+def consultar_agregados(conexao, dias):
+    """Agregados mantidos pelo sistema, com o volume dos últimos `dias` dias com movimento
+    
+    Lê só as tabelas de agregados (o volume, pela chave de dia). Retorna None
+    se o banco ainda não tiver essas tabelas.
+    """
+    try:
+        linha = conexao.execute("SELECT saldo_total, quantidade_contas FROM agregados").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if linha is None:
+        return None
+    
+    agregados = Agregados()
+    agregados.saldo_total, agregados.quantidade_contas = linha
+    agregados.agencias = {
+        agencia: {"saldo": saldo, "contas": contas}
+        for agencia, saldo, contas in conexao.execute("SELECT agencia, saldo, contas FROM agencias")
+    }
+    consulta = (
+        "SELECT dia, tipo, quantidade, total FROM volumes_diarios"
+        " WHERE dia >= (SELECT MIN(dia) FROM (SELECT DISTINCT dia FROM volumes_diarios ORDER BY dia DESC LIMIT ?))"
+    )
+    for dia, tipo, quantidade, total in conexao.execute(consulta, (dias,)):
+        agregados.volumes_diarios.setdefault(dia, {})[tipo] = {"quantidade": quantidade, "total": total}
+    return agregados
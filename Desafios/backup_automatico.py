@@ -0,0 +1,235 @@
+"""
+Backups automáticos do sistema bancário em segundo plano, com retenção
+
+A cada intervalo, o agendador captura um snapshot consistente do Banco em
+memória com capturar_snapshot(): usuários e contas já formatados, o
+histórico e a quantidade de transações (ele só cresce, então basta congelar
+esse ponto) e uma cópia dos agregados. As operações só esperam essa cópia; montar
+e comprimir o ZIP fica com a thread de trabalho.
+
+Com o armazenamento SQLite, o backup é o próprio banco.db, copiado pela
+API de backup do SQLite (sem parar as gravações): é o arquivo que o sistema
+lê, então restaurar o backup restaura os dados de fato.
+
+Os backups são completos e usam o formato de scripts/backup_dados.py (um
+manifesto com o SHA-256 e os hashes dos blocos de cada arquivo), então
+scripts/restaurar_backup.py confere e restaura esses backups. Depois de cada
+backup, a retenção guarda o backup mais recente de cada uma das últimas N
+horas, N dias e N semanas e apaga os demais backups automáticos; os backups
+feitos por backup_dados.py não são tocados.
+"""
+import os
+import json
+import hashlib
+import zipfile
+import threading
+from datetime import datetime
+
+from agregados import ARQUIVO_AGREGADOS
+from armazenamento import ARQUIVO_SQLITE, ArmazenamentoSQLite
+from banco import ARQUIVO_USUARIOS, ARQUIVO_CONTAS, ARQUIVO_TRANSACOES, ARQUIVO_JOURNAL, formatar_transacao
+
+# Constantes
+DIRETORIO_BACKUP = "backups"
+NOME_MANIFESTO = "manifesto.json"
+PREFIXO_BACKUP = "backup_sistema_"
+FORMATO_NOME = "%Y%m%d_%H%M%S_%f"
+ORIGEM = "sistema"  # Marca no manifesto dos backups automáticos
+TAMANHO_BLOCO = 1 << 20  # Mesmo bloco de backup_dados.py
+NIVEL_COMPRESSAO = 6
+INTERVALO_PADRAO = 60 * 60  # Segundos entre backups
+RETENCAO_PADRAO = {"horarios": 24, "diarios": 7, "semanais": 4}
+FORMATOS_RETENCAO = {"horarios": "%Y-%m-%d %H", "diarios": "%Y-%m-%d", "semanais": "%G-W%V"}
+
+def gravar_membro(zip_file, nome, partes):
+    """Grava um arquivo no ZIP em fluxo, a partir de pedaços de bytes, e retorna a entrada do manifesto"""
+    sha_arquivo = hashlib.sha256()
+    blocos = []
+    tamanho = 0
+    pendente = bytearray()
+    with zip_file.open(nome, "w", force_zip64=True) as membro:
+        for parte in partes:
+            pendente += parte
+            # Blocos do mesmo tamanho que os de backup_dados.py, para a verificação
+            while len(pendente) >= TAMANHO_BLOCO:
+                bloco = bytes(pendente[:TAMANHO_BLOCO])
+                del pendente[:TAMANHO_BLOCO]
+                blocos.append(hashlib.sha256(bloco).hexdigest())
+                sha_arquivo.update(bloco)
+                membro.write(bloco)
+                tamanho += len(bloco)
+        if pendente:
+            bloco = bytes(pendente)
+            blocos.append(hashlib.sha256(bloco).hexdigest())
+            sha_arquivo.update(bloco)
+            membro.write(bloco)
+            tamanho += len(bloco)
+    return {"tamanho": tamanho, "sha256": sha_arquivo.hexdigest(), "blocos": blocos, "modo": "completo"}
+
+def caminho_backup(diretorio, momento):
+    """Caminho do ZIP de um backup automático feito em `momento`"""
+    # Com os microssegundos no nome, a ordem dos nomes é a ordem dos backups
+    return os.path.join(diretorio, PREFIXO_BACKUP + momento.strftime(FORMATO_NOME) + ".zip")
+
+def gravar_zip(caminho, conteudos, quantidade_transacoes, momento):
+    """Grava o ZIP de um backup com os conteúdos {nome: pedaços de bytes} e o manifesto"""
+    manifesto = {
+        "tipo": "completo",
+        "origem": ORIGEM,
+        "data": momento.strftime("%d/%m/%Y %H:%M:%S"),
+        "anterior": None,
+        "incrementais": 0,
+        "tamanho_bloco": TAMANHO_BLOCO,
+        "compressao": {"codec": "deflate", "nivel": NIVEL_COMPRESSAO},
+        "transacoes": quantidade_transacoes,
+        "arquivos": {}
+    }
+    
+    try:
+        with zipfile.ZipFile(caminho + ".tmp", "w", compression=zipfile.ZIP_DEFLATED, compresslevel=NIVEL_COMPRESSAO) as zip_file:
+            for nome, partes in conteudos.items():
+                manifesto["arquivos"][nome] = gravar_membro(zip_file, nome, partes)
+            zip_file.writestr(NOME_MANIFESTO, json.dumps(manifesto, indent=4))
+    except BaseException:
+        # Sem ZIPs pela metade no diretório de backups
+        if os.path.exists(caminho + ".tmp"):
+            os.remove(caminho + ".tmp")
+        raise
+    os.replace(caminho + ".tmp", caminho)
+    return caminho
+
+def gravar_backup(snapshot, diretorio=DIRETORIO_BACKUP, momento=None):
+    """Grava o backup de um snapshot capturado (pode rodar em outra thread)"""
+    linhas_usuarios, linhas_contas, transacoes, quantidade_transacoes, agregados = snapshot
+    momento = momento or datetime.now()
+    os.makedirs(diretorio, exist_ok=True)
+    # Layout de texto do sistema; o journal vai vazio, pois o snapshot já o inclui
+    conteudos = {
+        ARQUIVO_USUARIOS: ((linha + "\n").encode() for linha in linhas_usuarios),
+        ARQUIVO_CONTAS: ((linha + "\n").encode() for linha in linhas_contas),
+        ARQUIVO_TRANSACOES: ((formatar_transacao(transacoes[i]) + "\n").encode() for i in range(quantidade_transacoes)),
+        ARQUIVO_AGREGADOS: (json.dumps(agregados.para_dict()).encode(),),
+        ARQUIVO_JOURNAL: ()
+    }
+    return gravar_zip(caminho_backup(diretorio, momento), conteudos, quantidade_transacoes, momento)
+
+def gravar_backup_sqlite(armazenamento, diretorio=DIRETORIO_BACKUP, momento=None):
+    """Grava o backup do banco SQLite em uso, copiado pela API de backup do SQLite"""
+    momento = momento or datetime.now()
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = caminho_backup(diretorio, momento)
+    copia = caminho[:-len(".zip")] + ".db.tmp"
+    try:
+        quantidade_transacoes = armazenamento.copiar(copia)
+        with open(copia, "rb") as arquivo:
+            conteudos = {ARQUIVO_SQLITE: iter(lambda: arquivo.read(TAMANHO_BLOCO), b"")}
+            return gravar_zip(caminho, conteudos, quantidade_transacoes, momento)
+    finally:
+        if os.path.exists(copia):
+            os.remove(copia)
+
+def momento_do_nome(nome):
+    """Data e hora de um backup automático pelo nome do arquivo (None se não for um)"""
+    if not (nome.startswith(PREFIXO_BACKUP) and nome.endswith(".zip")):
+        return None
+    try:
+        return datetime.strptime(nome[len(PREFIXO_BACKUP):-len(".zip")], FORMATO_NOME)
+    except ValueError:
+        return None
+
+def backups_a_manter(momentos, retencao):
+    """Backups guardados pela retenção: o mais recente de cada uma das últimas N horas, dias e semanas
+    
+    momentos é {nome: datetime}. O backup mais recente é sempre mantido.
+    """
+    ordenados = sorted(momentos, key=momentos.get, reverse=True)
+    manter = set(ordenados[:1])
+    for regra, quantidade in retencao.items():
+        periodos = set()
+        for nome in ordenados:
+            periodo = momentos[nome].strftime(FORMATOS_RETENCAO[regra])
+            if periodo in periodos:
+                continue
+            if len(periodos) >= quantidade:
+                break
+            periodos.add(periodo)
+            manter.add(nome)
+    return manter
+
+def aplicar_retencao(diretorio=DIRETORIO_BACKUP, retencao=RETENCAO_PADRAO):
+    """Apaga os backups automáticos que a retenção não guarda; retorna os nomes apagados"""
+    if not os.path.isdir(diretorio):
+        return []
+    momentos = {}
+    for nome in os.listdir(diretorio):
+        momento = momento_do_nome(nome)
+        if momento is not None:
+            momentos[nome] = momento
+    
+    removidos = sorted(set(momentos) - backups_a_manter(momentos, retencao))
+    for nome in removidos:
+        os.remove(os.path.join(diretorio, nome))
+    return removidos
+
+class AgendadorBackup:
+    """Faz backups periódicos de um Banco em uma thread de trabalho"""
+
+    def __init__(self, banco, intervalo=INTERVALO_PADRAO, diretorio=DIRETORIO_BACKUP, retencao=None):
+        self.banco = banco
+        self.intervalo = intervalo
+        self.diretorio = diretorio
+        self.retencao = dict(RETENCAO_PADRAO, **(retencao or {}))
+        self.ultimo_backup = None
+        self.ultimo_erro = None
+        self.backups_feitos = 0
+        self._parar = threading.Event()
+        self._trava_backup = threading.Lock()  # Um backup por vez (agendado ou pedido)
+        self._thread = None
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *excecao):
+        self.parar()
+
+    def iniciar(self):
+        """Inicia a thread de trabalho (o primeiro backup sai depois de um intervalo)"""
+        if self._thread is not None:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="backup-automatico", daemon=True)
+        self._thread.start()
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            self.fazer_backup()
+
+    def fazer_backup(self):
+        """Captura o snapshot, grava o backup e aplica a retenção
+        
+        Nenhum erro derruba a thread de trabalho: fica em ultimo_erro e o
+        próximo intervalo tenta de novo. Retorna o caminho do backup (ou None).
+        """
+        with self._trava_backup:
+            try:
+                if isinstance(self.banco.armazenamento, ArmazenamentoSQLite):
+                    # O sistema lê o banco.db: o backup tem de ser dele, não do layout de texto
+                    caminho = gravar_backup_sqlite(self.banco.armazenamento, self.diretorio)
+                else:
+                    caminho = gravar_backup(self.banco.capturar_snapshot(), self.diretorio)
+                aplicar_retencao(self.diretorio, self.retencao)
+            except Exception as e:
+                self.ultimo_erro = f"{type(e).__name__}: {e}"
+                return None
+            self.ultimo_backup = caminho
+            self.ultimo_erro = None
+            self.backups_feitos += 1
+            return caminho
+
+    def parar(self):
+        """Encerra a thread, esperando o backup em andamento terminar"""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
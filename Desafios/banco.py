@@ -0,0 +1,1007 @@
+"""
+Motor do sistema bancário, independente de terminal (sem input() ou print())
+
+Cada operação recebe os dados como parâmetros e devolve um Resultado.
+O menu interativo e os scripts usam a classe Banco como cliente.
+"""
+import os
+import csv
+import json
+import base64
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import islice
+
+from indices import adicionar_conta_titular, construir_indice_titulares, contas_do_titular
+from agregacao import agregar_colunar
+from agregados import Agregados, ARQUIVO_AGREGADOS
+from transacoes_colunar import TransacoesColunares, datetime_para_timestamp, data_para_timestamp, timestamp_para_data
+
+# Constantes do sistema
+LIMITE_SAQUES = 3
+LIMITE_PADRAO = 500.0
+AGENCIA = "0001"
+
+# Arquivos de persistência
+ARQUIVO_USUARIOS = "usuarios.txt"
+ARQUIVO_CONTAS = "contas.txt"
+ARQUIVO_TRANSACOES = "transacoes.txt"
+ARQUIVO_JOURNAL = "journal.txt"  # Registro das operações feitas após o último snapshot
+LIMITE_JOURNAL = 1000  # Quantidade de registros no journal antes da compactação
+MARCADOR_SNAPSHOT = "snapshot"  # Primeira linha de contas.txt: snapshot;geracao;transacoes;bytes de transacoes.txt
+MARCADOR_JOURNAL = "geracao"  # Primeira linha do journal: geracao;N (registros feitos depois do snapshot N)
+
+# Saldo histórico: soma dos lançamentos guardada a cada tantas transações de cada conta
+INTERVALO_CHECKPOINT = 256
+
+# Extrato
+TAMANHO_PAGINA_PADRAO = 20
+ORDENS_EXTRATO = ("recentes", "antigas")  # Mais recentes primeiro ou mais antigas primeiro
+CAMPOS_EXPORTACAO = ("data", "tipo", "valor", "conta_origem", "conta_destino")
+
+# Operações aceitas por executar_lote
+OPERACOES_LOTE = ("criar_usuario", "criar_conta", "depositar", "sacar", "transferir", "alterar_limite")
+
+def validar_cpf_simples(cpf):
+    """Faz uma validação simples de CPF (apenas verifica se tem 11 dígitos)"""
+    cpf_limpo = ''.join(c for c in cpf if c.isdigit())
+    return len(cpf_limpo) == 11
+
+def formatar_usuario(cpf, dados):
+    """Converte um usuário para a linha usada nos arquivos de texto"""
+    return f"{cpf};{dados['nome']};{dados['senha']};{dados['data_cadastro']}"
+
+def formatar_conta(numero, dados):
+    """Converte uma conta para a linha usada nos arquivos de texto"""
+    return f"{numero};{dados['saldo']};{dados['limite']};{dados['cpf']};{dados['saques_hoje']};{dados['data_ultimo_saque']}"
+
+def formatar_transacao(t):
+    """Converte uma transação para a linha usada nos arquivos de texto"""
+    if t["tipo"] == "transferencia":
+        return f"{t['tipo']};{t['valor']};{t['conta_origem']};{t['conta_destino']};{t['timestamp']}"
+    return f"{t['tipo']};{t['valor']};{t['conta']};;{t['timestamp']}"
+
+def ler_usuario(dados):
+    """Monta um usuário a partir dos campos de uma linha"""
+    return dados[0], {
+        "nome": dados[1],
+        "senha": dados[2],
+        "data_cadastro": dados[3]
+    }
+
+def ler_conta(dados):
+    """Monta uma conta a partir dos campos de uma linha"""
+    return dados[0], {
+        "saldo": float(dados[1]),
+        "limite": float(dados[2]),
+        "cpf": dados[3],
+        "saques_hoje": int(dados[4]),
+        "data_ultimo_saque": dados[5] if dados[5] != "None" else None
+    }
+
+def ler_transacao(dados):
+    """Monta uma transação a partir dos campos de uma linha"""
+    tipo = dados[0]
+    valor = float(dados[1])
+    # Arquivos antigos guardavam a data em texto (DD/MM/AAAA HH:MM:SS)
+    timestamp = int(dados[4]) if dados[4].isdigit() else data_para_timestamp(dados[4])
+    
+    if tipo == "transferencia":
+        return {
+            "tipo": tipo,
+            "valor": valor,
+            "conta_origem": dados[2],
+            "conta_destino": dados[3],
+            "timestamp": timestamp
+        }
+    return {
+        "tipo": tipo,
+        "valor": valor,
+        "conta": dados[2],
+        "timestamp": timestamp
+    }
+
+def contas_da_transacao(t):
+    """Retorna os números das contas envolvidas em uma transação"""
+    if t["tipo"] == "transferencia":
+        return (t["conta_origem"], t["conta_destino"])
+    return (t["conta"],)
+
+def codificar_cursor(ordem, posicao):
+    """Gera o cursor opaco de paginação do extrato"""
+    return base64.urlsafe_b64encode(f"{ordem}:{posicao}".encode()).decode()
+
+def decodificar_cursor(cursor, ordem):
+    """Lê um cursor de paginação (None se for inválido ou de outra ordem)"""
+    if not isinstance(cursor, str):
+        return None
+    try:
+        ordem_cursor, posicao = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        posicao = int(posicao)
+    except (ValueError, UnicodeError):
+        return None
+    if ordem_cursor != ordem or posicao < 0:
+        return None
+    return posicao
+
+def transacao_para_exportacao(t):
+    """Monta o registro de exportação de uma transação (origem/destino explícitos)"""
+    transferencia = t["tipo"] == "transferencia"
+    return {
+        "data": t["data"],
+        "tipo": t["tipo"],
+        "valor": t["valor"],
+        "conta_origem": t["conta_origem"] if transferencia else t["conta"],
+        "conta_destino": t["conta_destino"] if transferencia else None
+    }
+
+def contabilizar_transacao(agregados, t):
+    """Aplica o efeito de uma transação nos agregados (saldos e volume do dia)"""
+    if t["tipo"] == "deposito":
+        agregados.ajustar_saldo(AGENCIA, t["valor"])
+    elif t["tipo"] == "saque":
+        agregados.ajustar_saldo(AGENCIA, -t["valor"])
+    # Transferências entre contas da mesma agência não mudam os saldos agregados
+    agregados.registrar_transacao(t["tipo"], t["valor"], t["timestamp"])
+
+def ler_marcador_snapshot(caminho_contas):
+    """Geração, quantidade de transações e bytes de transacoes.txt do snapshot gravado
+    
+    Retorna (0, None, None) para snapshots sem marcador (arquivos antigos ou
+    montados pelos scripts): todas as linhas de transacoes.txt valem.
+    """
+    if os.path.exists(caminho_contas):
+        with open(caminho_contas, "r") as arquivo:
+            dados = arquivo.readline().rstrip("\n").split(";")
+        if dados[0] == MARCADOR_SNAPSHOT and len(dados) == 4:
+            return int(dados[1]), int(dados[2]), int(dados[3])
+    return 0, None, None
+
+def ler_journal(caminho, geracao=0):
+    """Percorre os registros do journal que ainda não estão no snapshot da geração indicada
+    
+    O journal começa com a geração do snapshot sobre o qual foi escrito (sem
+    marcador, geração 0). Um journal de geração anterior sobrou de uma
+    compactação interrompida depois de gravar o snapshot: os registros dele já
+    estão no snapshot e são ignorados.
+    """
+    if not os.path.exists(caminho):
+        return
+    with open(caminho, "r") as arquivo:
+        for numero, linha in enumerate(arquivo):
+            dados = linha.rstrip("\n").split(";")
+            if numero == 0 and dados[0] == MARCADOR_JOURNAL:
+                if int(dados[1]) < geracao:
+                    return
+                continue
+            if numero == 0 and geracao > 0:
+                return
+            if len(dados) >= 3:
+                yield dados
+
+def geracao_journal(caminho):
+    """Geração registrada no início do journal (None se o arquivo não existir ou estiver vazio)"""
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, "r") as arquivo:
+        dados = arquivo.readline().rstrip("\n").split(";")
+    if dados[0] == MARCADOR_JOURNAL:
+        return int(dados[1])
+    return 0 if dados[0] else None
+
+def carregar_agregados(diretorio="."):
+    """Lê os agregados do último snapshot e aplica o journal (None se não houver)
+    
+    O custo depende só do tamanho do journal (no máximo LIMITE_JOURNAL
+    registros), não da quantidade de contas ou do histórico.
+    """
+    agregados = Agregados.carregar(os.path.join(diretorio, ARQUIVO_AGREGADOS))
+    if agregados is None:
+        return None
+    
+    for dados in ler_journal(os.path.join(diretorio, ARQUIVO_JOURNAL), agregados.geracao):
+        if dados[0] == "conta":
+            agregados.registrar_conta(AGENCIA, ler_conta(dados[1:])[1]["saldo"])
+        elif dados[0] == "transacao":
+            contabilizar_transacao(agregados, ler_transacao(dados[1:]))
+    return agregados
+
+def escrever_arquivo(nome_arquivo, linhas):
+    """Grava um arquivo de snapshot de forma atômica (arquivo temporário + rename)"""
+    caminho_temporario = nome_arquivo + ".tmp"
+    with open(caminho_temporario, "w") as arquivo:
+        for linha in linhas:
+            arquivo.write(linha + "\n")
+    os.replace(caminho_temporario, nome_arquivo)
+
+class ArmazenamentoTexto:
+    """Persistência em arquivos de texto: snapshot (separado por ;) + journal
+    
+    É o armazenamento padrão do Banco. Outro armazenamento (ver
+    armazenamento.py) só precisa oferecer os mesmos métodos: carregar,
+    gravar_registros, gravar_snapshot e limpar_registros, além de
+    usa_journal (se os registros acumulam até uma compactação).
+    
+    Cada snapshot tem uma geração, gravada na primeira linha de contas.txt
+    junto com o tamanho de transacoes.txt, e o journal começa com a geração
+    do snapshot a que se refere. Uma compactação interrompida antes de zerar
+    o journal não faz os registros serem aplicados duas vezes, e transações
+    acrescentadas por um snapshot que não chegou ao fim são descartadas.
+    """
+    usa_journal = True
+
+    def __init__(self, diretorio="."):
+        self.arquivo_usuarios = os.path.join(diretorio, ARQUIVO_USUARIOS)
+        self.arquivo_contas = os.path.join(diretorio, ARQUIVO_CONTAS)
+        self.arquivo_transacoes = os.path.join(diretorio, ARQUIVO_TRANSACOES)
+        self.arquivo_journal = os.path.join(diretorio, ARQUIVO_JOURNAL)
+        self.arquivo_agregados = os.path.join(diretorio, ARQUIVO_AGREGADOS)
+        self.geracao = 0  # Geração do último snapshot gravado ou carregado
+        self.transacoes_gravadas = 0  # Transações em transacoes.txt
+        self.tamanho_transacoes = 0  # Bytes de transacoes.txt que pertencem ao snapshot
+        self._transacoes = None  # Histórico em memória que corresponde ao arquivo
+
+    def carregar(self, banco):
+        """Carrega o snapshot no Banco e reaplica o journal; retorna os registros reaplicados"""
+        geracao, quantidade, tamanho = ler_marcador_snapshot(self.arquivo_contas)
+        
+        # Carregar usuários
+        if os.path.exists(self.arquivo_usuarios):
+            with open(self.arquivo_usuarios, "r") as arquivo:
+                for linha in arquivo:
+                    dados = linha.strip().split(";")
+                    if len(dados) >= 4:
+                        cpf, usuario = ler_usuario(dados)
+                        banco.usuarios[cpf] = usuario
+        
+        # Carregar contas (o marcador do snapshot tem menos campos e fica de fora)
+        if os.path.exists(self.arquivo_contas):
+            with open(self.arquivo_contas, "r") as arquivo:
+                for linha in arquivo:
+                    dados = linha.strip().split(";")
+                    if len(dados) >= 6:
+                        numero, conta = ler_conta(dados)
+                        banco.contas[numero] = conta
+                        adicionar_conta_titular(banco.titulares, conta["cpf"], numero)
+        
+        # Carregar transações (só as que pertencem ao snapshot)
+        if os.path.exists(self.arquivo_transacoes):
+            with open(self.arquivo_transacoes, "r") as arquivo:
+                for linha in islice(arquivo, quantidade):
+                    dados = linha.strip().split(";")
+                    if len(dados) >= 5:
+                        banco.registrar_transacao(ler_transacao(dados))
+            if tamanho is None:
+                tamanho = os.path.getsize(self.arquivo_transacoes)
+        self.geracao = geracao
+        self.transacoes_gravadas = len(banco.transacoes)
+        self.tamanho_transacoes = tamanho or 0
+        self._transacoes = banco.transacoes
+        
+        # Reaplicar as operações registradas depois do último snapshot
+        registros = 0
+        for dados in ler_journal(self.arquivo_journal, geracao):
+            banco.aplicar_registro(dados)
+            registros += 1
+        
+        # Journal de outra geração (compactação interrompida) ou ausente: recomeça na geração atual
+        if registros == 0 and geracao_journal(self.arquivo_journal) != geracao:
+            self.limpar_registros()
+        return registros
+
+    def gravar_registros(self, linhas):
+        """Acrescenta linhas ao arquivo do journal"""
+        tamanho = os.path.getsize(self.arquivo_journal) if os.path.exists(self.arquivo_journal) else 0
+        try:
+            with open(self.arquivo_journal, "a") as arquivo:
+                arquivo.write("".join(linhas))
+        except OSError:
+            # Sem linhas pela metade: quem chamou pode gravar os mesmos registros de novo
+            if os.path.exists(self.arquivo_journal):
+                os.truncate(self.arquivo_journal, tamanho)
+            raise
+
+    def gravar_transacoes(self, transacoes, quantidade):
+        """Acrescenta ao transacoes.txt só as transações novas; retorna o tamanho final do arquivo
+        
+        O histórico só cresce, então o custo depende das transações desde o
+        último snapshot. Se o histórico em memória foi substituído (como em
+        criar_dados_exemplo) ou o arquivo não é o esperado, ele é regravado.
+        """
+        mesmo_historico = transacoes is self._transacoes and quantidade >= self.transacoes_gravadas
+        if not (mesmo_historico and os.path.exists(self.arquivo_transacoes)
+                and os.path.getsize(self.arquivo_transacoes) >= self.tamanho_transacoes):
+            escrever_arquivo(self.arquivo_transacoes, (formatar_transacao(transacoes[i]) for i in range(quantidade)))
+            return os.path.getsize(self.arquivo_transacoes)
+        
+        # Descartar o que um snapshot interrompido tenha acrescentado depois do último marcador
+        os.truncate(self.arquivo_transacoes, self.tamanho_transacoes)
+        with open(self.arquivo_transacoes, "a") as arquivo:
+            for i in range(self.transacoes_gravadas, quantidade):
+                arquivo.write(formatar_transacao(transacoes[i]) + "\n")
+        return os.path.getsize(self.arquivo_transacoes)
+
+    def gravar_snapshot(self, snapshot):
+        """Grava os arquivos do snapshot de uma nova geração
+        
+        Ordem: transações (acrescentadas), usuários, contas com o marcador (o
+        ponto em que o snapshot passa a valer) e agregados. Até o journal ser
+        zerado, o journal antigo continua válido para o snapshot anterior.
+        """
+        linhas_usuarios, linhas_contas, transacoes, quantidade_transacoes, agregados = snapshot
+        geracao = self.geracao + 1
+        tamanho = self.gravar_transacoes(transacoes, quantidade_transacoes)
+        escrever_arquivo(self.arquivo_usuarios, linhas_usuarios)
+        marcador = f"{MARCADOR_SNAPSHOT};{geracao};{quantidade_transacoes};{tamanho}"
+        escrever_arquivo(self.arquivo_contas, [marcador, *linhas_contas])
+        agregados.geracao = geracao
+        agregados.salvar(self.arquivo_agregados)
+        
+        self.geracao = geracao
+        self.transacoes_gravadas = quantidade_transacoes
+        self.tamanho_transacoes = tamanho
+        self._transacoes = transacoes
+
+    def limpar_registros(self):
+        """Começa um journal vazio na geração do último snapshot (que já contém tudo o que estava nele)"""
+        escrever_arquivo(self.arquivo_journal, [f"{MARCADOR_JOURNAL};{self.geracao}"])
+
+class Resultado:
+    """Resultado de uma operação do banco (verdadeiro quando a operação deu certo)"""
+    __slots__ = ("sucesso", "mensagem", "dados")
+
+    def __init__(self, sucesso, mensagem, dados=None):
+        self.sucesso = sucesso
+        self.mensagem = mensagem
+        self.dados = dados
+
+    def __bool__(self):
+        return self.sucesso
+
+    def __repr__(self):
+        return f"Resultado(sucesso={self.sucesso}, mensagem={self.mensagem!r})"
+
+class Banco:
+    """Estado do sistema bancário e suas operações"""
+
+    def __init__(self, diretorio=".", relogio=datetime.now, armazenamento=None):
+        self.usuarios = {}  # {cpf: {"nome": nome, "senha": senha, "data_cadastro": data}}
+        self.contas = {}    # {numero: {"saldo": saldo, "limite": limite, "cpf": cpf, ...}}
+        self.transacoes = TransacoesColunares()  # Transações guardadas em colunas compactas
+        self.indice_transacoes = {}  # Índice por conta {numero: [posições em transacoes]}
+        self.titulares = {}  # Índice de titulares {cpf: [números das contas]}
+        self.checkpoints_saldo = {}  # {numero: array com a soma dos lançamentos a cada INTERVALO_CHECKPOINT transações}
+        self.agregados = Agregados()  # Saldo total, por agência e volumes diários
+        
+        self.relogio = relogio
+        self.armazenamento = armazenamento if armazenamento is not None else ArmazenamentoTexto(diretorio)
+        self.registros_journal = 0  # Registros acumulados no journal desde o último snapshot
+        self._registros_lote = None  # Registros pendentes durante executar_lote
+        self.compactacao_automatica = True  # Desligada pelo BancoConcorrente, que compacta com as contas travadas
+        self.trava_registro = threading.RLock()  # Protege transações, índices e journal entre threads
+
+    def agora(self):
+        """Data e hora atual em texto (DD/MM/AAAA HH:MM:SS)"""
+        return self.relogio().strftime("%d/%m/%Y %H:%M:%S")
+
+    def agora_timestamp(self):
+        """Data e hora atual em segundos desde a época, como guardado nas transações"""
+        return datetime_para_timestamp(self.relogio())
+    
+    # ----- Usuários e contas -----
+
+    def validar_novo_cpf(self, cpf):
+        """Verifica se um CPF pode ser usado em um novo cadastro"""
+        if not validar_cpf_simples(cpf):
+            return Resultado(False, "CPF inválido! O CPF deve ter 11 dígitos.")
+        if cpf in self.usuarios:
+            return Resultado(False, "CPF já cadastrado no sistema!")
+        return Resultado(True, "CPF disponível.")
+
+    def criar_usuario(self, cpf, nome, senha):
+        """Cria um novo usuário no sistema"""
+        resultado = self.validar_novo_cpf(cpf)
+        if not resultado:
+            return resultado
+        
+        if len(senha) < 4:
+            return Resultado(False, "A senha deve ter pelo menos 4 caracteres!")
+        
+        usuario = {
+            "nome": nome,
+            "senha": senha,
+            "data_cadastro": self.agora()
+        }
+        with self.trava_registro:
+            self.registrar_operacao("usuario", formatar_usuario(cpf, usuario))
+            self.usuarios[cpf] = usuario
+        self.compactar_se_necessario()
+        
+        return Resultado(True, f"Usuário {nome} cadastrado com sucesso!", cpf)
+
+    def criar_conta(self, cpf):
+        """Cria uma nova conta para um usuário existente"""
+        if cpf not in self.usuarios:
+            return Resultado(False, "Usuário não encontrado! Cadastre-se primeiro.")
+        
+        with self.trava_registro:
+            # Gerar número da conta (simples, apenas para exemplo)
+            numero_conta = str(len(self.contas) + 1).zfill(4)  # Preenche com zeros à esquerda
+            conta = {
+                "saldo": 0.0,
+                "limite": LIMITE_PADRAO,
+                "cpf": cpf,
+                "saques_hoje": 0,
+                "data_ultimo_saque": None
+            }
+            self.registrar_operacao("conta", formatar_conta(numero_conta, conta))
+            self.contas[numero_conta] = conta
+            adicionar_conta_titular(self.titulares, cpf, numero_conta)
+            self.agregados.registrar_conta(AGENCIA)
+        self.compactar_se_necessario()
+        
+        return Resultado(True, "Conta criada com sucesso!", numero_conta)
+
+    def autenticar(self, cpf, senha):
+        """Verifica as credenciais de um usuário"""
+        if cpf in self.usuarios and self.usuarios[cpf]["senha"] == senha:
+            return Resultado(True, "Login realizado com sucesso!", cpf)
+        return Resultado(False, "CPF ou senha incorretos!")
+
+    def encontrar_conta_por_cpf(self, cpf):
+        """Encontra a conta de um usuário pelo CPF"""
+        contas_usuario = contas_do_titular(self.titulares, cpf)
+        return contas_usuario[0] if contas_usuario else None
+    
+    # ----- Operações financeiras -----
+
+    def registrar_transacao(self, t):
+        """Adiciona uma transação à lista e ao índice por conta"""
+        with self.trava_registro:
+            posicao = len(self.transacoes)
+            self.transacoes.append(t)
+            for numero in contas_da_transacao(t):
+                self._indexar_transacao(numero, posicao)
+
+    def _indexar_transacao(self, numero_conta, posicao):
+        """Adiciona a posição ao índice da conta e fecha um checkpoint a cada INTERVALO_CHECKPOINT
+        
+        As posições de cada conta ficam em ordem cronológica (o extrato e o
+        saldo histórico dependem disso). Uma transação fora de ordem é inserida
+        no lugar certo e os checkpoints a partir dela são recalculados.
+        """
+        posicoes = self.indice_transacoes.setdefault(numero_conta, [])
+        timestamps = self.transacoes.timestamps
+        checkpoints = self.checkpoints_saldo.setdefault(numero_conta, array("d"))
+        
+        if not posicoes or timestamps[posicoes[-1]] <= timestamps[posicao]:
+            posicoes.append(posicao)
+        else:
+            indice = bisect_right(posicoes, timestamps[posicao], key=timestamps.__getitem__)
+            posicoes.insert(indice, posicao)
+            # Os checkpoints que somam a partir do ponto de inserção deixam de valer
+            del checkpoints[indice // INTERVALO_CHECKPOINT:]
+        
+        while (len(checkpoints) + 1) * INTERVALO_CHECKPOINT <= len(posicoes):
+            fim = (len(checkpoints) + 1) * INTERVALO_CHECKPOINT
+            anterior = checkpoints[-1] if checkpoints else 0.0
+            checkpoints.append(anterior + self._somar_lancamentos(numero_conta, fim - INTERVALO_CHECKPOINT, fim))
+
+    def _somar_lancamentos(self, numero_conta, inicio, fim):
+        """Soma o efeito no saldo das transações inicio..fim-1 da conta (na ordem do índice)"""
+        colunas = self.transacoes
+        posicoes = self.indice_transacoes.get(numero_conta, [])
+        codigo_conta = colunas.codigos_conta.get(numero_conta)
+        codigo_saque = colunas.codigos_tipos.get("saque")
+        codigo_transferencia = colunas.codigos_tipos.get("transferencia")
+        
+        soma = 0.0
+        for i in range(inicio, fim):
+            posicao = posicoes[i]
+            tipo = colunas.codigos_tipo[posicao]
+            if tipo == codigo_saque or (tipo == codigo_transferencia and colunas.contas_origem[posicao] == codigo_conta):
+                soma -= colunas.valores[posicao]
+            else:
+                soma += colunas.valores[posicao]
+        return soma
+
+    def _soma_ate(self, numero_conta, quantidade):
+        """Soma dos lançamentos das primeiras transações da conta, a partir do checkpoint mais próximo"""
+        checkpoints = self.checkpoints_saldo.get(numero_conta, ())
+        completos = min(quantidade // INTERVALO_CHECKPOINT, len(checkpoints))
+        base = checkpoints[completos - 1] if completos else 0.0
+        return base + self._somar_lancamentos(numero_conta, completos * INTERVALO_CHECKPOINT, quantidade)
+
+    def contabilizar(self, t):
+        """Atualiza os agregados com uma transação nova"""
+        with self.trava_registro:
+            contabilizar_transacao(self.agregados, t)
+
+    def reconstruir_agregados(self):
+        """Recalcula os agregados a partir das contas e transações em memória"""
+        agregados = Agregados()
+        for conta in self.contas.values():
+            agregados.registrar_conta(AGENCIA, conta["saldo"])
+        
+        # Volumes diários direto das colunas, sem montar as visões de transação
+        colunas = self.transacoes
+        for tipo_codigo, valor, timestamp in zip(colunas.codigos_tipo, colunas.valores, colunas.timestamps):
+            agregados.registrar_transacao(colunas.tipos[tipo_codigo], valor, timestamp)
+        self.agregados = agregados
+
+    def reconstruir_indice_transacoes(self):
+        """Reconstrói o índice de transações por conta a partir da lista completa"""
+        self.indice_transacoes.clear()
+        self.checkpoints_saldo.clear()
+        for posicao, t in enumerate(self.transacoes):
+            for numero in contas_da_transacao(t):
+                self._indexar_transacao(numero, posicao)
+
+    def depositar(self, numero_conta, valor):
+        """Realiza um depósito em uma conta"""
+        if numero_conta not in self.contas:
+            return Resultado(False, "Conta não encontrada!")
+        if valor <= 0:
+            return Resultado(False, "Valor inválido! O valor deve ser positivo.")
+        
+        # Journal, saldo, histórico e agregados mudam juntos: um snapshot nunca vê a operação pela metade
+        with self.trava_registro:
+            t = {
+                "tipo": "deposito",
+                "valor": valor,
+                "conta": numero_conta,
+                "timestamp": self.agora_timestamp()
+            }
+            self.registrar_operacao("transacao", formatar_transacao(t))
+            
+            self.contas[numero_conta]["saldo"] += valor
+            self.registrar_transacao(t)
+            self.contabilizar(t)
+        self.compactar_se_necessario()
+        
+        return Resultado(True, f"Depósito de R$ {valor:.2f} realizado com sucesso!", t)
+
+    def verificar_limite_saques(self, numero_conta):
+        """Reinicia o contador diário e verifica se ainda é possível sacar hoje"""
+        if numero_conta not in self.contas:
+            return Resultado(False, "Conta não encontrada!")
+        
+        conta = self.contas[numero_conta]
+        
+        # Verificar se é um novo dia para resetar o contador de saques
+        hoje = self.relogio().strftime("%d/%m/%Y")
+        if conta["data_ultimo_saque"] != hoje:
+            conta["saques_hoje"] = 0
+            conta["data_ultimo_saque"] = hoje
+        
+        if conta["saques_hoje"] >= LIMITE_SAQUES:
+            return Resultado(False, f"Limite diário de {LIMITE_SAQUES} saques atingido!")
+        return Resultado(True, "Saque permitido.")
+
+    def sacar(self, numero_conta, valor):
+        """Realiza um saque em uma conta"""
+        resultado = self.verificar_limite_saques(numero_conta)
+        if not resultado:
+            return resultado
+        
+        conta = self.contas[numero_conta]
+        
+        if valor <= 0:
+            return Resultado(False, "Valor inválido! O valor deve ser positivo.")
+        if valor > conta["saldo"]:
+            return Resultado(False, "Saldo insuficiente para realizar o saque!")
+        if valor > conta["limite"]:
+            return Resultado(False, f"Valor excede o limite de saque (R$ {conta['limite']:.2f})!")
+        
+        with self.trava_registro:
+            t = {
+                "tipo": "saque",
+                "valor": valor,
+                "conta": numero_conta,
+                "timestamp": self.agora_timestamp()
+            }
+            self.registrar_operacao("transacao", formatar_transacao(t))
+            
+            conta["saldo"] -= valor
+            conta["saques_hoje"] += 1
+            self.registrar_transacao(t)
+            self.contabilizar(t)
+        self.compactar_se_necessario()
+        
+        return Resultado(True, f"Saque de R$ {valor:.2f} realizado com sucesso!", t)
+
+    def validar_destino(self, numero_conta_origem, numero_conta_destino):
+        """Verifica se uma conta pode receber uma transferência da conta de origem"""
+        if numero_conta_destino not in self.contas:
+            return Resultado(False, "Conta de destino não encontrada!")
+        if numero_conta_origem == numero_conta_destino:
+            return Resultado(False, "Não é possível transferir para a própria conta!")
+        return Resultado(True, "Conta de destino válida.")
+
+    def transferir(self, numero_conta_origem, numero_conta_destino, valor):
+        """Realiza uma transferência entre contas"""
+        if numero_conta_origem not in self.contas:
+            return Resultado(False, "Conta não encontrada!")
+        
+        resultado = self.validar_destino(numero_conta_origem, numero_conta_destino)
+        if not resultado:
+            return resultado
+        
+        if valor <= 0:
+            return Resultado(False, "Valor inválido! O valor deve ser positivo.")
+        if valor > self.contas[numero_conta_origem]["saldo"]:
+            return Resultado(False, "Saldo insuficiente para realizar a transferência!")
+        
+        with self.trava_registro:
+            t = {
+                "tipo": "transferencia",
+                "valor": valor,
+                "conta_origem": numero_conta_origem,
+                "conta_destino": numero_conta_destino,
+                "timestamp": self.agora_timestamp()
+            }
+            self.registrar_operacao("transacao", formatar_transacao(t))
+            
+            self.contas[numero_conta_origem]["saldo"] -= valor
+            self.contas[numero_conta_destino]["saldo"] += valor
+            self.registrar_transacao(t)
+            self.contabilizar(t)
+        self.compactar_se_necessario()
+        
+        return Resultado(True, f"Transferência de R$ {valor:.2f} realizada com sucesso!", t)
+
+    def alterar_limite(self, numero_conta, novo_limite):
+        """Altera o limite de saque de uma conta"""
+        if numero_conta not in self.contas:
+            return Resultado(False, "Conta não encontrada!")
+        if novo_limite <= 0:
+            return Resultado(False, "Limite inválido! O valor deve ser positivo.")
+        
+        with self.trava_registro:
+            self.registrar_operacao("limite", numero_conta, novo_limite)
+            self.contas[numero_conta]["limite"] = novo_limite
+        self.compactar_se_necessario()
+        
+        return Resultado(True, f"Limite alterado para R$ {novo_limite:.2f} com sucesso!", novo_limite)
+
+    def extrato(self, numero_conta):
+        """Retorna as transações de uma conta, da mais antiga para a mais recente"""
+        return [self.transacoes[posicao] for posicao in self.indice_transacoes.get(numero_conta, [])]
+
+    def _faixa_extrato(self, numero_conta, data_inicio=None, data_fim=None):
+        """Posições da conta e o intervalo [inicio, fim) dentro do período pedido
+        
+        As posições de cada conta são mantidas em ordem cronológica (ver
+        _indexar_transacao), então o período é localizado por busca binária.
+        """
+        posicoes = self.indice_transacoes.get(numero_conta, [])
+        timestamps = self.transacoes.timestamps
+        inicio, fim = 0, len(posicoes)
+        
+        if data_inicio is not None:
+            inicio = bisect_left(posicoes, datetime_para_timestamp(data_inicio), key=timestamps.__getitem__)
+        if data_fim is not None:
+            fim = bisect_right(posicoes, datetime_para_timestamp(data_fim), key=timestamps.__getitem__)
+        return posicoes, inicio, max(inicio, fim)
+
+    def extrato_paginado(self, numero_conta, tamanho_pagina=TAMANHO_PAGINA_PADRAO, cursor=None,
+                         ordem="recentes", data_inicio=None, data_fim=None):
+        """Retorna uma página do extrato e o cursor da próxima página
+        
+        O cursor é opaco: basta repassar o valor de "proximo_cursor" (None na
+        última página). As datas do período são datetime, ambas inclusivas.
+        """
+        if numero_conta not in self.contas:
+            return Resultado(False, "Conta não encontrada!")
+        if ordem not in ORDENS_EXTRATO:
+            return Resultado(False, f"Ordem inválida! Use {' ou '.join(ORDENS_EXTRATO)}.")
+        if tamanho_pagina <= 0:
+            return Resultado(False, "Tamanho de página inválido! O valor deve ser positivo.")
+        
+        posicao_cursor = None
+        if cursor is not None:
+            posicao_cursor = decodificar_cursor(cursor, ordem)
+            if posicao_cursor is None:
+                return Resultado(False, "Cursor inválido!")
+        
+        posicoes, inicio, fim = self._faixa_extrato(numero_conta, data_inicio, data_fim)
+        
+        if ordem == "antigas":
+            a = inicio if posicao_cursor is None else max(inicio, posicao_cursor)
+            b = min(fim, a + tamanho_pagina)
+            pagina = posicoes[a:b]
+            proximo = codificar_cursor(ordem, b) if b < fim else None
+        else:
+            b = fim if posicao_cursor is None else min(fim, posicao_cursor)
+            a = max(inicio, b - tamanho_pagina)
+            pagina = posicoes[a:b][::-1]
+            proximo = codificar_cursor(ordem, a) if a > inicio else None
+        
+        return Resultado(True, "Extrato", {
+            "transacoes": [self.transacoes[posicao] for posicao in pagina],
+            "proximo_cursor": proximo
+        })
+
+    def saldo_em(self, numero_conta, data):
+        """Saldo da conta ao fim do instante data (datetime, inclusivo)
+        
+        Parte do checkpoint mais próximo e soma só as transações restantes
+        (menos de INTERVALO_CHECKPOINT). O saldo é ancorado no saldo atual, o que
+        preserva saldos iniciais que não vieram de transações.
+        """
+        if numero_conta not in self.contas:
+            return Resultado(False, "Conta não encontrada!")
+        
+        with self.trava_registro:
+            posicoes = self.indice_transacoes.get(numero_conta, [])
+            ate_data = bisect_right(posicoes, datetime_para_timestamp(data), key=self.transacoes.timestamps.__getitem__)
+            depois = self._soma_ate(numero_conta, len(posicoes)) - self._soma_ate(numero_conta, ate_data)
+            saldo = round(self.contas[numero_conta]["saldo"] - depois, 2) or 0.0  # Sem resíduo de ponto flutuante (nem -0.00)
+        
+        return Resultado(True, f"Saldo em {data.strftime('%d/%m/%Y %H:%M:%S')}: R$ {saldo:.2f}", saldo)
+
+    def transacoes_no_periodo(self, data_inicio=None, data_fim=None):
+        """Percorre as transações entre duas datas (inclusivas) pelo índice temporal
+        
+        Custo O(log n) para localizar o período mais o número de transações nele.
+        """
+        inicio = None if data_inicio is None else datetime_para_timestamp(data_inicio)
+        fim = None if data_fim is None else datetime_para_timestamp(data_fim)
+        for posicao in self.transacoes.posicoes_no_periodo(inicio, fim):
+            yield self.transacoes[posicao]
+
+    def estatisticas_periodo(self, data_inicio=None, data_fim=None, agrupar_por=None):
+        """Quantidade, total, mínimo, máximo e média por tipo no período
+        
+        agrupar_por: None, "dia", "semana", "mes" ou "conta". Retorna
+        {grupo: {tipo: Estatisticas}} (ver agregacao.py).
+        """
+        inicio = None if data_inicio is None else datetime_para_timestamp(data_inicio)
+        fim = None if data_fim is None else datetime_para_timestamp(data_fim)
+        posicoes = None
+        if inicio is not None or fim is not None:
+            posicoes = self.transacoes.posicoes_no_periodo(inicio, fim)
+        return agregar_colunar(self.transacoes, posicoes, agrupar_por)
+
+    def iterar_extrato(self, numero_conta, ordem="antigas", data_inicio=None, data_fim=None):
+        """Percorre as transações de uma conta uma a uma, sem montar listas"""
+        posicoes, inicio, fim = self._faixa_extrato(numero_conta, data_inicio, data_fim)
+        faixa = range(inicio, fim) if ordem == "antigas" else range(fim - 1, inicio - 1, -1)
+        for i in faixa:
+            yield self.transacoes[posicoes[i]]
+
+    def exportar_extrato(self, numero_conta, arquivo, formato="csv", ordem="antigas", data_inicio=None, data_fim=None):
+        """Grava o histórico completo da conta em CSV ou NDJSON, uma transação por vez"""
+        if numero_conta not in self.contas:
+            return Resultado(False, "Conta não encontrada!")
+        if formato not in ("csv", "ndjson"):
+            return Resultado(False, "Formato inválido! Use csv ou ndjson.")
+        
+        registros = (transacao_para_exportacao(t) for t in self.iterar_extrato(numero_conta, ordem, data_inicio, data_fim))
+        quantidade = 0
+        
+        if formato == "csv":
+            escritor = csv.DictWriter(arquivo, fieldnames=CAMPOS_EXPORTACAO)
+            escritor.writeheader()
+            for registro in registros:
+                escritor.writerow(registro)
+                quantidade += 1
+        else:
+            for registro in registros:
+                arquivo.write(json.dumps(registro) + "\n")
+                quantidade += 1
+        
+        return Resultado(True, f"{quantidade} transações exportadas.", quantidade)
+
+    def executar_lote(self, operacoes):
+        """Executa várias operações e grava o journal uma única vez no final
+        
+        Cada operação é uma tupla (nome, *argumentos), por exemplo
+        ("depositar", "0001", 100.0) ou ("transferir", "0001", "0002", 50.0).
+        """
+        resultados = []
+        # Com o journal adiado (adiar_journal), quem descarrega é o dono do adiamento
+        adiado = self._registros_lote is not None
+        if not adiado:
+            self._registros_lote = []
+        try:
+            for nome, *argumentos in operacoes:
+                if nome not in OPERACOES_LOTE:
+                    resultados.append(Resultado(False, f"Operação inválida: {nome}"))
+                    continue
+                resultados.append(getattr(self, nome)(*argumentos))
+        finally:
+            if not adiado:
+                registros, self._registros_lote = self._registros_lote, None
+                self._gravar_journal(registros)
+        return resultados
+    
+    # ----- Persistência -----
+
+    def registrar_operacao(self, *campos):
+        """Acrescenta um registro ao journal (custo constante por operação)
+        
+        As operações chamam com trava_registro já travada e antes de mudar o
+        estado: se a gravação falhar, a exceção sai sem que nada tenha mudado
+        em memória, e nenhum snapshot cai entre a operação e o registro dela.
+        """
+        linha = ";".join(str(campo) for campo in campos) + "\n"
+        if self._registros_lote is not None:
+            self._registros_lote.append(linha)
+            return
+        with self.trava_registro:
+            self.escrever_journal([linha])
+            self.registros_journal += 1
+
+    def adiar_journal(self):
+        """Passa a acumular os registros do journal em memória
+        
+        Quem chama fica responsável por retirar os registros com
+        retirar_registros_pendentes() e gravá-los com escrever_journal().
+        """
+        if self._registros_lote is None:
+            self._registros_lote = []
+
+    def retirar_registros_pendentes(self):
+        """Retorna os registros acumulados desde a última retirada"""
+        registros, self._registros_lote = self._registros_lote or [], []
+        return registros
+
+    def escrever_journal(self, linhas):
+        """Grava registros no armazenamento (pode rodar em outra thread)"""
+        with self.trava_registro:
+            self.armazenamento.gravar_registros(linhas)
+
+    def _gravar_journal(self, linhas):
+        if not linhas:
+            return
+        with self.trava_registro:
+            self.escrever_journal(linhas)
+            self.registros_journal += len(linhas)
+        self.compactar_se_necessario()
+
+    def compactar_se_necessario(self):
+        """Compacta periodicamente, para o journal não crescer sem limite
+        
+        Só depois de a operação mudar o estado (o snapshot tem de incluí-la) e
+        nunca com registros ainda acumulados em memória (executar_lote ou
+        adiar_journal), que seriam gravados depois do snapshot que já os contém.
+        """
+        if self.compactacao_automatica and self._registros_lote is None and self.precisa_compactar():
+            self.salvar_dados()
+
+    def precisa_compactar(self, novos=0):
+        """Indica se o journal (com mais `novos` registros) já acumulou o bastante para um novo snapshot"""
+        return self.armazenamento.usa_journal and self.registros_journal + novos >= LIMITE_JOURNAL
+
+    def capturar_snapshot(self):
+        """Copia o estado atual para ser gravado depois por gravar_snapshot()
+        
+        Usuários e contas são copiados já formatados; das transações bastam o
+        histórico atual e a quantidade, pois ele só cresce (se for substituído,
+        como em criar_dados_exemplo, o snapshot continua com o anterior).
+        """
+        with self.trava_registro:
+            return (
+                [formatar_usuario(cpf, dados) for cpf, dados in self.usuarios.items()],
+                [formatar_conta(numero, dados) for numero, dados in self.contas.items()],
+                self.transacoes,
+                len(self.transacoes),
+                self.agregados.copiar()
+            )
+
+    def gravar_snapshot(self, snapshot):
+        """Grava um snapshot capturado e zera o journal (pode rodar em outra thread)"""
+        self.armazenamento.gravar_snapshot(snapshot)
+        
+        # O snapshot já contém tudo o que estava no journal
+        with self.trava_registro:
+            self.armazenamento.limpar_registros()
+
+    def salvar_dados(self):
+        """Salva um snapshot completo dos dados e zera o journal (compactação)"""
+        with self.trava_registro:
+            self.gravar_snapshot(self.capturar_snapshot())
+            self.registros_journal = 0
+
+    def aplicar_registro(self, dados):
+        """Reaplica um registro do journal sobre os dados em memória"""
+        operacao = dados[0]
+        
+        if operacao == "usuario":
+            cpf, usuario = ler_usuario(dados[1:])
+            self.usuarios[cpf] = usuario
+        
+        elif operacao == "conta":
+            numero, conta = ler_conta(dados[1:])
+            self.contas[numero] = conta
+            adicionar_conta_titular(self.titulares, conta["cpf"], numero)
+        
+        elif operacao == "limite":
+            self.contas[dados[1]]["limite"] = float(dados[2])
+        
+        elif operacao == "transacao":
+            t = ler_transacao(dados[1:])
+            
+            if t["tipo"] == "deposito":
+                self.contas[t["conta"]]["saldo"] += t["valor"]
+            elif t["tipo"] == "saque":
+                conta = self.contas[t["conta"]]
+                dia = timestamp_para_data(t["timestamp"])[:10]
+                if conta["data_ultimo_saque"] != dia:
+                    conta["saques_hoje"] = 0
+                    conta["data_ultimo_saque"] = dia
+                conta["saldo"] -= t["valor"]
+                conta["saques_hoje"] += 1
+            elif t["tipo"] == "transferencia":
+                self.contas[t["conta_origem"]]["saldo"] -= t["valor"]
+                self.contas[t["conta_destino"]]["saldo"] += t["valor"]
+            
+            self.registrar_transacao(t)
+
+    def carregar_dados(self):
+        """Carrega os dados do armazenamento (snapshot e journal)"""
+        self.registros_journal = self.armazenamento.carregar(self)
+        self.reconstruir_agregados()
+
+    def criar_dados_exemplo(self):
+        """Substitui os dados atuais pelos dados de exemplo e grava um snapshot"""
+        self.usuarios = {
+            "12345678900": {
+                "nome": "João da Silva",
+                "senha": "1234",
+                "data_cadastro": "01/01/2023 10:00:00"
+            },
+            "98765432100": {
+                "nome": "Maria Oliveira",
+                "senha": "4321",
+                "data_cadastro": "02/01/2023 11:00:00"
+            }
+        }
+        
+        self.contas = {
+            "0001": {
+                "saldo": 1000.0,
+                "limite": 500.0,
+                "cpf": "12345678900",
+                "saques_hoje": 0,
+                "data_ultimo_saque": None
+            },
+            "0002": {
+                "saldo": 2000.0,
+                "limite": 1000.0,
+                "cpf": "98765432100",
+                "saques_hoje": 0,
+                "data_ultimo_saque": None
+            }
+        }
+        
+        data_atual = self.agora_timestamp()
+        self.transacoes = TransacoesColunares([
+            {
+                "tipo": "deposito",
+                "valor": 1000.0,
+                "conta": "0001",
+                "timestamp": data_atual
+            },
+            {
+                "tipo": "deposito",
+                "valor": 2000.0,
+                "conta": "0002",
+                "timestamp": data_atual
+            },
+            {
+                "tipo": "transferencia",
+                "valor": 500.0,
+                "conta_origem": "0002",
+                "conta_destino": "0001",
+                "timestamp": data_atual
+            }
+        ])
+        self.reconstruir_indice_transacoes()
+        self.titulares = construir_indice_titulares(self.contas)
+        self.reconstruir_agregados()
+        
+        self.salvar_dados()
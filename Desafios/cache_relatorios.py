@@ -0,0 +1,190 @@
+"""
+Cache de resultados de relatórios
+
+Cada resultado é guardado pela combinação (relatório, parâmetros) junto com a
+impressão digital dos arquivos de dados usados: tamanho, data de modificação e
+hash SHA-256 do conteúdo. Se algum arquivo mudar, o resultado é descartado e
+recalculado. Os resultados ficam em memória (LRU) e, opcionalmente, em disco
+como JSON, para valer também entre execuções.
+
+O hash só é consultado quando a data de modificação muda com o tamanho
+igual. Arquivos até LIMITE_HASH_COMPLETO têm o conteúdo inteiro no hash;
+nos maiores, o hash cobre AMOSTRAS_HASH blocos espalhados pelo arquivo (o
+primeiro e o último inclusive), com custo fixo mesmo em históricos de vários
+GB. Uma alteração de mesmo tamanho fora das amostras passaria despercebida
+nesses arquivos; o sistema só grava acrescentando ou regravando o arquivo
+inteiro, o que muda o tamanho ou as amostras.
+
+Arquivos que registram a própria versão a cada gravação (o banco SQLite do
+sistema) podem ser registrados com registrar_versao(): a impressão digital
+deles é só essa versão, lida sem percorrer o arquivo.
+"""
+import os
+import json
+import hashlib
+from collections import OrderedDict
+
+# Constantes
+CAPACIDADE_PADRAO = 32
+TAMANHO_BLOCO_HASH = 1 << 20  # 1 MiB lido por vez ao calcular o hash
+LIMITE_HASH_COMPLETO = 16 << 20  # Acima disso, o hash usa só amostras do arquivo
+AMOSTRAS_HASH = 16
+TAMANHO_AMOSTRA = 64 << 10
+AUSENTE = object()  # Sem resultado guardado (None também é um resultado válido)
+
+_hashes = {}  # {(caminho, tamanho, modificacao): hash}, para não reler arquivos sem mudança
+_versoes = {}  # {nome do arquivo: função(caminho) -> versão}, para arquivos que registram a própria versão
+
+def registrar_versao(nome, funcao):
+    """Compara os arquivos com esse nome pela versão lida com funcao(caminho), sem hash
+    
+    Se funcao retornar None, o arquivo volta a ser comparado pelo conteúdo.
+    """
+    _versoes[nome] = funcao
+
+def hash_arquivo(caminho):
+    """Hash SHA-256 do conteúdo de um arquivo, lido em blocos"""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO_HASH), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def hash_amostrado(caminho, tamanho):
+    """Hash SHA-256 do tamanho e de AMOSTRAS_HASH blocos espalhados pelo arquivo"""
+    sha = hashlib.sha256(str(tamanho).encode())
+    passo = (tamanho - TAMANHO_AMOSTRA) // (AMOSTRAS_HASH - 1)
+    with open(caminho, "rb") as arquivo:
+        for i in range(AMOSTRAS_HASH):
+            arquivo.seek(i * passo)
+            sha.update(arquivo.read(TAMANHO_AMOSTRA))
+    return "amostra:" + sha.hexdigest()
+
+def impressao_digital(caminho, calcular_hash=True):
+    """Tamanho, data de modificação (ns) e hash de um arquivo (None se não existir)"""
+    try:
+        estado = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    
+    funcao = _versoes.get(os.path.basename(caminho))
+    versao = funcao(caminho) if funcao is not None else None
+    if versao is not None:
+        return {"versao": versao}
+    
+    digital = {"tamanho": estado.st_size, "modificacao": estado.st_mtime_ns}
+    if calcular_hash:
+        chave = (os.path.abspath(caminho), estado.st_size, estado.st_mtime_ns)
+        if chave not in _hashes:
+            if estado.st_size <= LIMITE_HASH_COMPLETO:
+                _hashes[chave] = hash_arquivo(caminho)
+            else:
+                _hashes[chave] = hash_amostrado(caminho, estado.st_size)
+        digital["hash"] = _hashes[chave]
+    return digital
+
+def arquivos_inalterados(digitais):
+    """Confere se os arquivos ainda correspondem às impressões digitais guardadas"""
+    for caminho, digital in digitais.items():
+        atual = impressao_digital(caminho, calcular_hash=False)
+        if atual is None or digital is None or "versao" in atual or "versao" in digital:
+            if atual != digital:
+                return False
+            continue
+        if atual["tamanho"] != digital["tamanho"]:
+            return False
+        # Mesma data de modificação: o conteúdo não mudou; caso contrário, comparar o hash
+        if atual["modificacao"] != digital["modificacao"] and impressao_digital(caminho)["hash"] != digital["hash"]:
+            return False
+    return True
+
+class CacheRelatorios:
+    """Cache LRU de resultados de relatórios, invalidado pelos arquivos de dados"""
+
+    def __init__(self, capacidade=CAPACIDADE_PADRAO, diretorio=None):
+        self.capacidade = capacidade
+        self.diretorio = diretorio  # None: apenas em memória
+        self.entradas = OrderedDict()  # {chave: {"arquivos": {...}, "resultado": ...}}
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def chave(relatorio, parametros):
+        return json.dumps([relatorio, parametros], sort_keys=True, default=str)
+
+    def _caminho_disco(self, chave):
+        return os.path.join(self.diretorio, hashlib.sha256(chave.encode()).hexdigest() + ".json")
+
+    def _ler_disco(self, chave):
+        if self.diretorio is None:
+            return None
+        try:
+            with open(self._caminho_disco(chave), "r") as arquivo:
+                entrada = json.load(arquivo)
+        except (OSError, ValueError):
+            return None
+        return entrada if entrada.get("chave") == chave else None
+
+    def _gravar_disco(self, chave, entrada):
+        if self.diretorio is None:
+            return
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = self._caminho_disco(chave)
+        with open(caminho + ".tmp", "w") as arquivo:
+            json.dump(dict(entrada, chave=chave), arquivo)
+        os.replace(caminho + ".tmp", caminho)
+
+    def _guardar_memoria(self, chave, entrada):
+        self.entradas[chave] = entrada
+        self.entradas.move_to_end(chave)
+        while len(self.entradas) > self.capacidade:
+            self.entradas.popitem(last=False)
+
+    def obter(self, relatorio, parametros, padrao=None):
+        """Resultado guardado, se os arquivos de dados não mudaram (padrao caso contrário)"""
+        chave = self.chave(relatorio, parametros)
+        entrada = self.entradas.get(chave)
+        if entrada is None:
+            entrada = self._ler_disco(chave)
+        
+        if entrada is None or not arquivos_inalterados(entrada["arquivos"]):
+            self.entradas.pop(chave, None)
+            self.falhas += 1
+            return padrao
+        
+        self._guardar_memoria(chave, entrada)
+        self.acertos += 1
+        return entrada["resultado"]
+
+    def _armazenar(self, chave, digitais, resultado):
+        entrada = {"arquivos": digitais, "resultado": resultado}
+        self._guardar_memoria(chave, entrada)
+        self._gravar_disco(chave, entrada)
+
+    def guardar(self, relatorio, parametros, arquivos, resultado):
+        """Guarda o resultado com a impressão digital atual dos arquivos"""
+        digitais = {caminho: impressao_digital(caminho) for caminho in arquivos}
+        self._armazenar(self.chave(relatorio, parametros), digitais, resultado)
+
+    def calcular(self, relatorio, parametros, arquivos, funcao):
+        """Retorna o resultado guardado ou calcula com funcao() e guarda
+        
+        A impressão digital é tirada antes do cálculo: se os arquivos mudarem
+        durante o cálculo, o resultado fica inválido na próxima consulta.
+        """
+        resultado = self.obter(relatorio, parametros, AUSENTE)
+        if resultado is not AUSENTE:
+            return resultado
+        
+        digitais = {caminho: impressao_digital(caminho) for caminho in arquivos}
+        resultado = funcao()
+        self._armazenar(self.chave(relatorio, parametros), digitais, resultado)
+        return resultado
+
+    def limpar(self):
+        """Descarta todos os resultados, em memória e em disco"""
+        self.entradas.clear()
+        if self.diretorio is not None and os.path.isdir(self.diretorio):
+            for nome in os.listdir(self.diretorio):
+                if nome.endswith(".json"):
+                    os.remove(os.path.join(self.diretorio, nome))
@@ -0,0 +1,134 @@
+"""
+Execução concorrente de depósitos, saques e transferências sobre um Banco
+
+Cada conta é protegida por uma trava de um conjunto fixo (travas listradas).
+As travas de uma operação são sempre adquiridas em ordem crescente de índice,
+o que evita deadlock entre transferências em sentidos opostos.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from banco import Resultado
+
+# Constantes
+NUMERO_TRAVAS = 64
+TRABALHADORES_PADRAO = 8
+
+# Operações que podem ser enviadas ao pool
+OPERACOES_CONCORRENTES = ("depositar", "sacar", "transferir")
+
+class BancoConcorrente:
+    """Executa operações financeiras de um Banco em paralelo, com travas por conta"""
+
+    def __init__(self, banco, trabalhadores=TRABALHADORES_PADRAO, numero_travas=NUMERO_TRAVAS):
+        self.banco = banco
+        self.travas = [threading.Lock() for _ in range(numero_travas)]
+        self.executor = ThreadPoolExecutor(max_workers=trabalhadores)
+        
+        # A compactação precisa de todas as contas travadas (ver compactar)
+        banco.compactacao_automatica = False
+        self._trava_compactacao = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.encerrar()
+
+    def _indices_travas(self, *numeros_conta):
+        """Índices das travas das contas, sem repetição e em ordem crescente"""
+        return sorted({hash(numero) % len(self.travas) for numero in numeros_conta})
+
+    def _executar_travado(self, indices, funcao, *argumentos):
+        for indice in indices:
+            self.travas[indice].acquire()
+        try:
+            return funcao(*argumentos)
+        finally:
+            for indice in reversed(indices):
+                self.travas[indice].release()
+
+    def depositar(self, numero_conta, valor):
+        """Depósito com a conta travada"""
+        resultado = self._executar_travado(self._indices_travas(numero_conta), self.banco.depositar, numero_conta, valor)
+        self._compactar_se_necessario()
+        return resultado
+
+    def sacar(self, numero_conta, valor):
+        """Saque com a conta travada"""
+        resultado = self._executar_travado(self._indices_travas(numero_conta), self.banco.sacar, numero_conta, valor)
+        self._compactar_se_necessario()
+        return resultado
+
+    def transferir(self, numero_conta_origem, numero_conta_destino, valor):
+        """Transferência com as duas contas travadas"""
+        indices = self._indices_travas(numero_conta_origem, numero_conta_destino)
+        resultado = self._executar_travado(indices, self.banco.transferir, numero_conta_origem, numero_conta_destino, valor)
+        self._compactar_se_necessario()
+        return resultado
+
+    def submeter(self, nome, *argumentos):
+        """Coloca uma operação na fila do pool e retorna um Future com o Resultado"""
+        if nome not in OPERACOES_CONCORRENTES:
+            raise ValueError(f"Operação inválida: {nome}")
+        return self.executor.submit(getattr(self, nome), *argumentos)
+
+    def executar_concorrente(self, operacoes):
+        """Executa as operações em paralelo e retorna os resultados na ordem de entrada
+        
+        Cada operação é uma tupla (nome, *argumentos), como em Banco.executar_lote.
+        """
+        futuros = []
+        for nome, *argumentos in operacoes:
+            if nome not in OPERACOES_CONCORRENTES:
+                futuros.append(None)
+                continue
+            futuros.append(self.executor.submit(getattr(self, nome), *argumentos))
+        
+        return [
+            futuro.result() if futuro is not None else Resultado(False, "Operação inválida!")
+            for futuro in futuros
+        ]
+
+    def _travar_tudo(self):
+        for trava in self.travas:
+            trava.acquire()
+
+    def _destravar_tudo(self):
+        for trava in reversed(self.travas):
+            trava.release()
+
+    def _compactar_se_necessario(self):
+        if not self.banco.precisa_compactar():
+            return
+        # Só uma thread compacta por vez; as demais seguem com suas operações
+        if self._trava_compactacao.acquire(blocking=False):
+            try:
+                if self.banco.precisa_compactar():
+                    self._salvar_travado()
+            finally:
+                self._trava_compactacao.release()
+
+    def _salvar_travado(self):
+        self._travar_tudo()
+        try:
+            self.banco.salvar_dados()
+        finally:
+            self._destravar_tudo()
+
+    def compactar(self):
+        """Grava o snapshot com todas as contas travadas (nenhuma operação pela metade)"""
+        with self._trava_compactacao:
+            self._salvar_travado()
+
+    def saldo_total(self):
+        """Soma dos saldos de todas as contas em um instante consistente"""
+        self._travar_tudo()
+        try:
+            return sum(conta["saldo"] for conta in self.banco.contas.values())
+        finally:
+            self._destravar_tudo()
+
+    def encerrar(self):
+        """Aguarda as operações pendentes e encerra o pool"""
+        self.executor.shutdown(wait=True)
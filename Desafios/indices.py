@@ -0,0 +1,37 @@
+"""
+Índices em memória compartilhados pelo sistema bancário e pelos scripts
+"""
+from bisect import bisect_left, bisect_right
+
+def adicionar_conta_titular(indice, cpf, numero_conta):
+    """Registra uma conta no índice de titulares (CPF -> lista de contas)"""
+    contas_titular = indice.setdefault(cpf, [])
+    if numero_conta not in contas_titular:
+        contas_titular.append(numero_conta)
+
+def construir_indice_titulares(contas, campo_cpf="cpf"):
+    """Monta o índice de titulares a partir de um dicionário de contas"""
+    indice = {}
+    for numero_conta, conta in contas.items():
+        adicionar_conta_titular(indice, conta[campo_cpf], numero_conta)
+    return indice
+
+def contas_do_titular(indice, cpf):
+    """Retorna a lista ordenada de contas de um CPF (vazia se não houver)"""
+    return indice.get(cpf, [])
+
+def construir_indice_temporal(timestamps):
+    """Retorna as posições ordenadas por timestamp (índice temporal)"""
+    # Dados gravados em ordem cronológica dispensam a ordenação
+    if all(timestamps[i] <= timestamps[i + 1] for i in range(len(timestamps) - 1)):
+        return list(range(len(timestamps)))
+    return sorted(range(len(timestamps)), key=timestamps.__getitem__)
+
+def faixa_temporal(indice, timestamps, inicio=None, fim=None):
+    """Posições do índice temporal com timestamp entre inicio e fim (inclusivos)
+    
+    Usa busca binária: custo O(log n) para achar a faixa, mais o tamanho dela.
+    """
+    a = 0 if inicio is None else bisect_left(indice, inicio, key=timestamps.__getitem__)
+    b = len(indice) if fim is None else bisect_right(indice, fim, key=timestamps.__getitem__)
+    return indice[a:max(a, b)]
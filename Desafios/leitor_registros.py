@@ -0,0 +1,122 @@
+"""
+Leitura de registros JSON em fluxo, com memória limitada
+
+Lê um registro por vez de arquivos com um array JSON (como os gerados por
+gerar_dados_teste.py) ou de arquivos NDJSON (um objeto JSON por linha), sem
+carregar o arquivo inteiro.
+
+Uso como script: python leitor_registros.py transacoes.json
+(gera transacoes.ndjson a partir do array JSON)
+"""
+import os
+import sys
+import json
+
+# Constantes
+TAMANHO_BLOCO = 1 << 16  # 64 KiB lidos por vez
+ESPACOS = " \t\r\n"
+
+def caminho_ndjson(caminho_json):
+    """Nome da variante NDJSON de um arquivo .json"""
+    return os.path.splitext(caminho_json)[0] + ".ndjson"
+
+def iterar_ndjson(caminho):
+    """Percorre um arquivo NDJSON, um registro por linha"""
+    with open(caminho, "r") as arquivo:
+        for linha in arquivo:
+            if linha.strip():
+                yield json.loads(linha)
+
+def iterar_array_json(caminho, tamanho_bloco=TAMANHO_BLOCO, inicio=0, com_posicoes=False):
+    """Percorre os elementos de um array JSON no topo do arquivo, um por vez
+    
+    A memória usada é a de um bloco mais o maior elemento do array. Com
+    inicio, a leitura continua da posição (em bytes) logo após um elemento já
+    lido. Com com_posicoes, gera (registro, posição em bytes do fim do
+    registro); o arquivo é lido como latin-1 para que cada caractere seja um
+    byte, então textos não ASCII dos registros não vêm decodificados.
+    """
+    decodificador = json.JSONDecoder()
+    codificacao, nova_linha = ("latin-1", "") if com_posicoes else (None, None)
+    with open(caminho, "r", encoding=codificacao, newline=nova_linha) as arquivo:
+        arquivo.seek(inicio)
+        buffer = ""
+        posicao = 0
+        deslocamento = inicio  # Posição no arquivo do início do buffer
+        fim_arquivo = False
+        dentro_do_array = inicio > 0
+        
+        while True:
+            # Pular espaços e separadores entre elementos
+            while posicao < len(buffer) and buffer[posicao] in ESPACOS:
+                posicao += 1
+            if posicao < len(buffer):
+                caractere = buffer[posicao]
+                if not dentro_do_array:
+                    if caractere != "[":
+                        raise ValueError(f"{caminho} não contém um array JSON")
+                    dentro_do_array = True
+                    posicao += 1
+                    continue
+                if caractere == "]":
+                    return
+                if caractere == ",":
+                    posicao += 1
+                    continue
+                
+                try:
+                    registro, fim = decodificador.raw_decode(buffer, posicao)
+                except json.JSONDecodeError:
+                    # Elemento incompleto: ler mais um bloco (erro real só no fim do arquivo)
+                    if fim_arquivo:
+                        raise
+                else:
+                    # Um número no fim do buffer pode continuar no próximo bloco
+                    if fim < len(buffer) or fim_arquivo:
+                        yield (registro, deslocamento + fim) if com_posicoes else registro
+                        posicao = fim
+                        continue
+            
+            if fim_arquivo:
+                if dentro_do_array:
+                    raise ValueError(f"{caminho}: array JSON não terminado")
+                return
+            
+            bloco = arquivo.read(tamanho_bloco)
+            if not bloco:
+                fim_arquivo = True
+            deslocamento += posicao
+            buffer = buffer[posicao:] + bloco
+            posicao = 0
+
+def iterar_registros(caminho_json):
+    """Percorre os registros de um arquivo, preferindo a variante NDJSON
+    
+    A variante .ndjson é usada quando existe e não é mais antiga que o .json.
+    """
+    variante = caminho_ndjson(caminho_json)
+    if os.path.exists(variante) and (
+        not os.path.exists(caminho_json) or os.path.getmtime(variante) >= os.path.getmtime(caminho_json)
+    ):
+        return iterar_ndjson(variante)
+    if os.path.exists(caminho_json):
+        return iterar_array_json(caminho_json)
+    return iter(())
+
+def converter_para_ndjson(caminho_json, destino=None):
+    """Grava a variante NDJSON de um arquivo com array JSON, em fluxo"""
+    destino = destino or caminho_ndjson(caminho_json)
+    quantidade = 0
+    with open(destino + ".tmp", "w") as arquivo:
+        for registro in iterar_array_json(caminho_json):
+            arquivo.write(json.dumps(registro) + "\n")
+            quantidade += 1
+    os.replace(destino + ".tmp", destino)
+    return quantidade
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python leitor_registros.py arquivo.json")
+        sys.exit(1)
+    quantidade = converter_para_ndjson(sys.argv[1])
+    print(f"{quantidade} registros gravados em {caminho_ndjson(sys.argv[1])}")
@@ -0,0 +1,197 @@
+"""
+Histórico de transações particionado, com cálculo paralelo dos relatórios
+
+As transações dos arquivos JSON são divididas em partições NDJSON por mês
+(mes-AAAA-MM.ndjson) ou por hash da conta de origem (conta-NN.ndjson). O
+manifesto guarda o período (menor e maior timestamp) de cada partição, para
+que um relatório só leia as partições que cruzam o período consultado.
+
+Os relatórios são calculados em map/reduce: cada partição é agregada em um
+processo separado (ProcessPoolExecutor) e os resultados parciais são somados.
+"""
+import os
+import json
+import zlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from agregacao import agregar, combinar_agregacoes, rotulo_periodo
+from leitor_registros import iterar_ndjson
+from transacoes_colunar import datetime_para_timestamp
+
+# Constantes
+CRITERIOS = ("mes", "conta")
+NUMERO_PARTICOES_CONTA = 16
+ARQUIVO_MANIFESTO = "manifesto.json"
+
+def timestamp_transacao(t):
+    """Timestamp (segundos desde a época) de uma transação dos arquivos JSON"""
+    # Arquivos gerados antes do campo timestamp só têm data_hora em ISO
+    if "timestamp" in t:
+        return t["timestamp"]
+    return datetime_para_timestamp(datetime.fromisoformat(t["data_hora"]))
+
+def chave_agrupamento(agrupar_por):
+    """Função que retorna o grupo de uma transação (dia, semana, mês ou conta de origem)"""
+    if not agrupar_por:
+        return None
+    if agrupar_por == "conta":
+        return lambda t: t["conta_origem"]
+    return lambda t: rotulo_periodo(timestamp_transacao(t), agrupar_por)
+
+def nome_particao(t, criterio, numero_particoes=NUMERO_PARTICOES_CONTA):
+    """Nome da partição de uma transação"""
+    if criterio == "mes":
+        return f"mes-{rotulo_periodo(timestamp_transacao(t), 'mes')}"
+    if criterio == "conta":
+        # crc32 é estável entre execuções, ao contrário de hash()
+        return f"conta-{zlib.crc32(str(t['conta_origem']).encode()) % numero_particoes:02d}"
+    raise ValueError(f"Critério de partição inválido: {criterio}")
+
+def particionar(transacoes, diretorio, criterio="mes", numero_particoes=NUMERO_PARTICOES_CONTA, origem=None):
+    """Grava as transações em partições NDJSON e retorna o manifesto
+    
+    origem guarda a impressão digital dos arquivos de onde as transações vieram,
+    para saber depois se as partições ainda estão atualizadas.
+    """
+    if criterio not in CRITERIOS:
+        raise ValueError(f"Critério de partição inválido: {criterio}")
+    os.makedirs(diretorio, exist_ok=True)
+    
+    # Remover partições de uma divisão anterior
+    for nome in os.listdir(diretorio):
+        if nome.endswith(".ndjson") or nome.endswith(".ndjson.tmp"):
+            os.remove(os.path.join(diretorio, nome))
+    
+    arquivos = {}
+    particoes = {}
+    try:
+        for t in transacoes:
+            nome = nome_particao(t, criterio, numero_particoes)
+            arquivo = arquivos.get(nome)
+            if arquivo is None:
+                arquivo = arquivos[nome] = open(os.path.join(diretorio, nome + ".ndjson.tmp"), "w")
+                particoes[nome] = {"inicio": None, "fim": None, "quantidade": 0}
+            arquivo.write(json.dumps(t) + "\n")
+            
+            timestamp = timestamp_transacao(t)
+            dados = particoes[nome]
+            dados["quantidade"] += 1
+            if dados["inicio"] is None or timestamp < dados["inicio"]:
+                dados["inicio"] = timestamp
+            if dados["fim"] is None or timestamp > dados["fim"]:
+                dados["fim"] = timestamp
+    finally:
+        for arquivo in arquivos.values():
+            arquivo.close()
+    
+    for nome in particoes:
+        caminho = os.path.join(diretorio, nome + ".ndjson")
+        os.replace(caminho + ".tmp", caminho)
+    
+    # O manifesto é gravado por último: sem ele as partições não são usadas
+    manifesto = {"criterio": criterio, "particoes": particoes, "origem": origem or {}}
+    caminho_manifesto = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+    with open(caminho_manifesto + ".tmp", "w") as arquivo:
+        json.dump(manifesto, arquivo, indent=4)
+    os.replace(caminho_manifesto + ".tmp", caminho_manifesto)
+    return manifesto
+
+def carregar_manifesto(diretorio):
+    """Lê o manifesto das partições (None se não houver)"""
+    caminho = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, "r") as arquivo:
+        return json.load(arquivo)
+
+def particoes_no_periodo(manifesto, inicio=None, fim=None):
+    """Nomes das partições com alguma transação entre inicio e fim (inclusivos)"""
+    return [
+        nome for nome, dados in sorted(manifesto["particoes"].items())
+        if (fim is None or dados["inicio"] <= fim) and (inicio is None or dados["fim"] >= inicio)
+    ]
+
+def no_periodo(transacoes, inicio=None, fim=None):
+    """Filtra as transações com timestamp entre inicio e fim (inclusivos)"""
+    if inicio is None and fim is None:
+        return transacoes
+    return (
+        t for t in transacoes
+        if (inicio is None or timestamp_transacao(t) >= inicio) and (fim is None or timestamp_transacao(t) <= fim)
+    )
+
+def resumir_contas(transacoes):
+    """Entradas, saídas e quantidade de transações por conta, em uma única passada"""
+    resumo = {}
+    for t in transacoes:
+        if t["tipo"] == "transferencia":
+            movimentos = ((t["conta_origem"], "saidas"), (t["conta_destino"], "entradas"))
+        elif t["tipo"] == "saque":
+            movimentos = ((t["conta_origem"], "saidas"),)
+        else:
+            movimentos = ((t["conta_origem"], "entradas"),)
+        
+        for conta, campo in movimentos:
+            dados = resumo.get(str(conta))
+            if dados is None:
+                dados = resumo[str(conta)] = {"entradas": 0.0, "saidas": 0.0, "quantidade": 0}
+            dados[campo] += t["valor"]
+            dados["quantidade"] += 1
+    return resumo
+
+def combinar_resumos(destino, origem):
+    """Soma um resumo por conta em outro"""
+    for conta, dados in origem.items():
+        atual = destino.setdefault(conta, {"entradas": 0.0, "saidas": 0.0, "quantidade": 0})
+        atual["entradas"] += dados["entradas"]
+        atual["saidas"] += dados["saidas"]
+        atual["quantidade"] += dados["quantidade"]
+    return destino
+
+def _agregar_particao(caminho, inicio, fim, agrupar_por):
+    # Executada em outro processo: precisa ser uma função de módulo
+    return agregar(no_periodo(iterar_ndjson(caminho), inicio, fim), chave_agrupamento(agrupar_por))
+
+def _resumir_particao(caminho, inicio, fim):
+    return resumir_contas(no_periodo(iterar_ndjson(caminho), inicio, fim))
+
+def _mapear(diretorio, funcao, inicio, fim, argumentos=(), trabalhadores=None):
+    """Aplica funcao às partições do período em processos separados"""
+    manifesto = carregar_manifesto(diretorio)
+    if manifesto is None:
+        raise FileNotFoundError(f"Nenhuma partição em {diretorio}")
+    
+    nomes = particoes_no_periodo(manifesto, inicio, fim)
+    caminhos = [os.path.join(diretorio, nome + ".ndjson") for nome in nomes]
+    if len(caminhos) <= 1:
+        # Uma partição só: não compensa iniciar processos
+        resultados = [funcao(caminho, inicio, fim, *argumentos) for caminho in caminhos]
+    else:
+        with ProcessPoolExecutor(max_workers=trabalhadores) as executor:
+            resultados = list(executor.map(
+                funcao, caminhos, *([valor] * len(caminhos) for valor in (inicio, fim) + tuple(argumentos))
+            ))
+    return resultados, len(nomes), len(manifesto["particoes"])
+
+def agregar_particoes(diretorio, inicio=None, fim=None, agrupar_por=None, trabalhadores=None):
+    """Agrega por tipo (e grupo) as transações do período, em paralelo
+    
+    Retorna (agregação, partições lidas, total de partições).
+    """
+    resultados, lidas, total = _mapear(diretorio, _agregar_particao, inicio, fim, (agrupar_por,), trabalhadores)
+    agregacao = {}
+    for parcial in resultados:
+        combinar_agregacoes(agregacao, parcial)
+    return agregacao, lidas, total
+
+def resumo_contas_particoes(diretorio, inicio=None, fim=None, trabalhadores=None):
+    """Resumo por conta das transações do período, em paralelo
+    
+    Retorna (resumo, partições lidas, total de partições).
+    """
+    resultados, lidas, total = _mapear(diretorio, _resumir_particao, inicio, fim, (), trabalhadores)
+    resumo = {}
+    for parcial in resultados:
+        combinar_resumos(resumo, parcial)
+    return resumo, lidas, total
@@ -1,44 +1,252 @@
 """
 Script para realizar backup dos dados do sistema bancário
+
+O primeiro backup (ou um backup com --completo) guarda os arquivos inteiros.
+Os seguintes são incrementais: cada arquivo é comparado bloco a bloco com o
+backup anterior (hashes no manifesto) e só é gravado a partir do primeiro
+bloco alterado. Um histórico que só cresce no fim custa apenas o que foi
+acrescentado.
+
+Cada backup é um ZIP com os dados e um manifesto.json descrevendo, por
+arquivo, o tamanho, o SHA-256, os hashes dos blocos e o que foi gravado:
+  completo  - o arquivo inteiro
+  parcial   - os bytes a partir de "offset" (o resto vem dos backups anteriores)
+  igual     - nada (sem mudança desde o backup anterior)
+  removido  - o arquivo não existia
+
+Os dados são comprimidos em fluxo, bloco a bloco (memória limitada ao
+tamanho de um bloco), com o codec e o nível escolhidos. O banco SQLite do
+sistema (banco.db) é copiado antes pela API de backup do SQLite, que gera uma
+cópia consistente mesmo com o sistema gravando.
+
+Uso: python backup_dados.py [--completo] [--codec nenhum|deflate|bz2|lzma] [--nivel N]
 """
 import os
 import json
+import sqlite3
 import datetime
-import shutil
+import hashlib
 import zipfile
+import argparse
+from contextlib import closing
 
 # Constantes
 ARQUIVO_USUARIOS = "usuarios.json"
 ARQUIVO_CONTAS = "contas.json"
 ARQUIVO_TRANSACOES = "transacoes.json"
+ARQUIVO_SQLITE = "banco.db"  # Banco do sistema no armazenamento SQLite (ver armazenamento.py)
+SUFIXOS_WAL = ("-wal", "-shm")  # Arquivos auxiliares do modo WAL, ao lado do banco
+ARQUIVOS_DADOS = (ARQUIVO_USUARIOS, ARQUIVO_CONTAS, ARQUIVO_TRANSACOES, ARQUIVO_SQLITE)
 DIRETORIO_BACKUP = "backups"
+PREFIXO_SISTEMA = "backup_sistema_"  # Backups automáticos do sistema (ver backup_automatico.py)
+NOME_MANIFESTO = "manifesto.json"
+TAMANHO_BLOCO = 1 << 20  # 1 MiB por bloco comparado
+MAXIMO_INCREMENTAIS = 30  # Incrementais seguidos antes de um novo backup completo
+
+# Compressão: codec do ZIP e nível (o zipfile ignora o nível no lzma)
+CODECS = {
+    "nenhum": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bz2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA
+}
+NIVEIS = {"deflate": range(0, 10), "bz2": range(1, 10)}
+CODEC_PADRAO = "deflate"
+NIVEL_PADRAO = 6
+
+def abrir_zip_backup(caminho, codec=CODEC_PADRAO, nivel=NIVEL_PADRAO):
+    """Abre um ZIP para escrita com o codec e o nível de compressão pedidos"""
+    if codec not in CODECS:
+        raise ValueError(f"Codec inválido: {codec} (use {', '.join(CODECS)})")
+    if codec in NIVEIS and nivel not in NIVEIS[codec]:
+        raise ValueError(f"Nível inválido para {codec}: {nivel}")
+    return zipfile.ZipFile(caminho, "w", compression=CODECS[codec], compresslevel=nivel if codec in NIVEIS else None)
+
+def ler_manifesto(caminho_backup):
+    """Lê o manifesto de um backup (None para backups antigos, sem manifesto)"""
+    try:
+        with zipfile.ZipFile(caminho_backup, "r") as zip_file:
+            if NOME_MANIFESTO not in zip_file.namelist():
+                return None
+            with zip_file.open(NOME_MANIFESTO) as arquivo:
+                return json.load(arquivo)
+    except (OSError, zipfile.BadZipFile, ValueError):
+        return None
+
+def ordem_backup(caminho):
+    """Chave de ordenação cronológica de um backup pelo nome
+    
+    Vale para os backups deste script (backup_AAAAMMDD_HHMMSS[_N].zip) e para
+    os automáticos do sistema (backup_sistema_AAAAMMDD_HHMMSS_ffffff.zip, ver
+    backup_automatico.py): a chave é (segundo, microssegundos, sequência). A
+    sequência dos backups feitos no mesmo segundo é comparada como número,
+    para que _10 venha depois de _2.
+    """
+    nome = os.path.basename(caminho)[:-len(".zip")]
+    if nome.startswith(PREFIXO_SISTEMA):
+        partes = nome[len(PREFIXO_SISTEMA):].split("_")
+        if len(partes) == 3 and partes[2].isdigit():
+            return "_".join(partes[:2]), int(partes[2]), 0
+        return "_".join(partes), 0, 0
+    
+    partes = nome[len("backup_"):].split("_")
+    if len(partes) == 3 and partes[2].isdigit():
+        return "_".join(partes[:2]), 0, int(partes[2])
+    return "_".join(partes), 0, 0
+
+def ultimo_backup():
+    """Caminho e manifesto do backup mais recente com manifesto (ou (None, None))"""
+    if not os.path.isdir(DIRETORIO_BACKUP):
+        return None, None
+    nomes = sorted((nome for nome in os.listdir(DIRETORIO_BACKUP) if nome.startswith("backup_") and nome.endswith(".zip")), key=ordem_backup)
+    for nome in reversed(nomes):
+        caminho = os.path.join(DIRETORIO_BACKUP, nome)
+        manifesto = ler_manifesto(caminho)
+        # Os backups automáticos do sistema (backup_automatico.py) guardam outros arquivos
+        if manifesto is not None and manifesto.get("origem") != "sistema":
+            return caminho, manifesto
+    return None, None
 
-def realizar_backup():
-    """Realiza o backup dos dados do sistema"""
+def copiar_sqlite(origem, destino):
+    """Cópia consistente de um banco SQLite em uso (no modo WAL, sem parar quem grava)"""
+    with closing(sqlite3.connect(f"file:{os.path.abspath(origem)}?mode=ro", uri=True)) as conexao:
+        with closing(sqlite3.connect(destino)) as copia:
+            conexao.backup(copia)
+
+def gravar_arquivo(zip_file, nome, anterior=None, origem=None):
+    """Grava um arquivo no ZIP (inteiro ou a partir do primeiro bloco alterado)
+    
+    anterior é a entrada do manifesto anterior para o arquivo. Retorna a
+    entrada do manifesto deste backup. O arquivo é lido uma única vez, bloco
+    a bloco; com origem, os bytes vêm desse arquivo, gravados com o nome nome.
+    """
+    origem = origem or nome
+    if not os.path.exists(origem):
+        return {"modo": "removido"}
+    
+    blocos_anteriores = anterior.get("blocos", []) if anterior and anterior["modo"] != "removido" else None
+    sha_arquivo = hashlib.sha256()
+    blocos = []
+    tamanho = 0
+    offset = None  # Posição do primeiro bloco diferente do backup anterior
+    membro = None
+    try:
+        with open(origem, "rb") as arquivo:
+            for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO), b""):
+                hash_bloco = hashlib.sha256(bloco).hexdigest()
+                sha_arquivo.update(bloco)
+                
+                if offset is None:
+                    indice = len(blocos)
+                    if blocos_anteriores is None or indice >= len(blocos_anteriores) or blocos_anteriores[indice] != hash_bloco:
+                        offset = tamanho
+                        membro = zip_file.open(nome, "w", force_zip64=True)
+                if membro is not None:
+                    membro.write(bloco)
+                
+                blocos.append(hash_bloco)
+                tamanho += len(bloco)
+    finally:
+        if membro is not None:
+            membro.close()
+    
+    entrada = {"tamanho": tamanho, "sha256": sha_arquivo.hexdigest(), "blocos": blocos}
+    if offset is None and blocos_anteriores is None:
+        # Arquivo vazio no primeiro backup
+        zip_file.writestr(nome, b"")
+        entrada["modo"] = "completo"
+    elif offset is None and len(blocos) == len(blocos_anteriores):
+        entrada["modo"] = "igual"
+    elif offset is None:
+        # Nenhum bloco diferente, mas o arquivo ficou menor: basta truncar
+        entrada.update(modo="parcial", offset=tamanho)
+    elif offset == 0:
+        entrada["modo"] = "completo"
+    else:
+        entrada.update(modo="parcial", offset=offset)
+    return entrada
+
+def nome_novo_backup():
+    """Caminho do novo backup, com data e hora (sem sobrescrever outro do mesmo segundo)"""
+    data_hora = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    caminho = os.path.join(DIRETORIO_BACKUP, f"backup_{data_hora}.zip")
+    sequencia = 1
+    while os.path.exists(caminho):
+        caminho = os.path.join(DIRETORIO_BACKUP, f"backup_{data_hora}_{sequencia}.zip")
+        sequencia += 1
+    return caminho
+
+def realizar_backup(completo=False, codec=CODEC_PADRAO, nivel=NIVEL_PADRAO):
+    """Realiza o backup dos dados do sistema (incremental quando possível)"""
     # Verificar se os arquivos existem
-    arquivos = [ARQUIVO_USUARIOS, ARQUIVO_CONTAS, ARQUIVO_TRANSACOES]
-    arquivos_existentes = [arquivo for arquivo in arquivos if os.path.exists(arquivo)]
+    arquivos_existentes = [arquivo for arquivo in ARQUIVOS_DADOS if os.path.exists(arquivo)]
     
     if not arquivos_existentes:
         print("Nenhum arquivo de dados encontrado para backup.")
-        return
+        return None
     
     # Criar diretório de backup se não existir
     if not os.path.exists(DIRETORIO_BACKUP):
         os.makedirs(DIRETORIO_BACKUP)
     
-    # Gerar nome do arquivo de backup com data e hora
-    data_hora = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    nome_backup = f"backup_{data_hora}.zip"
-    caminho_backup = os.path.join(DIRETORIO_BACKUP, nome_backup)
+    # Incremental sobre o último backup, salvo se a cadeia já estiver longa
+    caminho_anterior, anterior = ultimo_backup()
+    if completo or anterior is None or anterior.get("incrementais", 0) >= MAXIMO_INCREMENTAIS:
+        caminho_anterior, anterior = None, None
     
-    # Criar arquivo ZIP com os dados
-    with zipfile.ZipFile(caminho_backup, 'w') as zip_file:
-        for arquivo in arquivos_existentes:
-            zip_file.write(arquivo)
+    caminho_backup = nome_novo_backup()
+    manifesto = {
+        "tipo": "incremental" if anterior else "completo",
+        "data": datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+        "anterior": os.path.basename(caminho_anterior) if caminho_anterior else None,
+        "incrementais": anterior.get("incrementais", 0) + 1 if anterior else 0,
+        "tamanho_bloco": TAMANHO_BLOCO,
+        "compressao": {"codec": codec, "nivel": nivel if codec in NIVEIS else None},
+        "arquivos": {}
+    }
     
-    print(f"Backup realizado com sucesso: {caminho_backup}")
-    print(f"Arquivos incluídos: {', '.join(arquivos_existentes)}")
+    # Criar arquivo ZIP com os dados (o manifesto vai por último)
+    with abrir_zip_backup(caminho_backup + ".tmp", codec, nivel) as zip_file:
+        for arquivo in ARQUIVOS_DADOS:
+            entrada_anterior = anterior["arquivos"].get(arquivo) if anterior else None
+            if anterior and anterior.get("tamanho_bloco") != TAMANHO_BLOCO:
+                entrada_anterior = None
+            if arquivo == ARQUIVO_SQLITE and os.path.exists(arquivo):
+                copia = arquivo + ".backup.tmp"
+                try:
+                    copiar_sqlite(arquivo, copia)
+                    manifesto["arquivos"][arquivo] = gravar_arquivo(zip_file, arquivo, entrada_anterior, origem=copia)
+                finally:
+                    if os.path.exists(copia):
+                        os.remove(copia)
+                continue
+            manifesto["arquivos"][arquivo] = gravar_arquivo(zip_file, arquivo, entrada_anterior)
+        zip_file.writestr(NOME_MANIFESTO, json.dumps(manifesto, indent=4))
+    os.replace(caminho_backup + ".tmp", caminho_backup)
+    
+    gravados = {nome: entrada for nome, entrada in manifesto["arquivos"].items() if entrada["modo"] not in ("igual", "removido")}
+    tamanho_dados = sum(entrada["tamanho"] - entrada.get("offset", 0) for entrada in gravados.values())
+    print(f"Backup {manifesto['tipo']} realizado com sucesso: {caminho_backup}")
+    print(f"Compressão: {codec} | {tamanho_dados} bytes de dados -> {os.path.getsize(caminho_backup)} bytes no arquivo")
+    if manifesto["anterior"]:
+        print(f"Baseado em: {manifesto['anterior']}")
+    print(f"Arquivos incluídos: {', '.join(gravados) if gravados else 'nenhum (sem alterações)'}")
+    for nome, entrada in gravados.items():
+        if entrada["modo"] == "parcial":
+            print(f"  {nome}: {entrada['tamanho'] - entrada['offset']} de {entrada['tamanho']} bytes (a partir do byte {entrada['offset']})")
+    return caminho_backup
+
+def main():
+    """Função principal do script"""
+    parser = argparse.ArgumentParser(description="Backup dos dados do sistema bancário")
+    parser.add_argument("--completo", action="store_true", help="backup completo, mesmo havendo um anterior")
+    parser.add_argument("--codec", choices=CODECS, default=CODEC_PADRAO, help="codec de compressão do ZIP")
+    parser.add_argument("--nivel", type=int, default=NIVEL_PADRAO, help="nível de compressão (deflate: 0-9, bz2: 1-9)")
+    argumentos = parser.parse_args()
+    try:
+        realizar_backup(completo=argumentos.completo, codec=argumentos.codec, nivel=argumentos.nivel)
+    except ValueError as e:
+        print(f"Erro: {e}")
 
 if __name__ == "__main__":
-    realizar_backup()
+    main()
@@ -0,0 +1,109 @@
+"""
+Script para comparar os codecs de compressão do backup: tamanho e vazão
+
+Gera conjuntos de dados no formato de gerar_dados_teste.py (transações em um
+array JSON indentado), grava cada um com cada codec/nível pelo mesmo caminho
+usado em backup_dados.py e mede tamanho final, tempo de compressão e tempo de
+descompressão.
+
+Uso: python benchmark_backup.py [quantidade_transacoes ...]
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import zipfile
+import datetime
+import tempfile
+
+from backup_dados import ARQUIVO_TRANSACOES, TAMANHO_BLOCO, NIVEL_PADRAO, abrir_zip_backup, gravar_arquivo
+
+# Constantes
+QUANTIDADES_PADRAO = (50000, 200000)
+CONFIGURACOES = (
+    ("nenhum", None),
+    ("deflate", 1),
+    ("deflate", 6),
+    ("deflate", 9),
+    ("bz2", 1),
+    ("bz2", 9),
+    ("lzma", None)
+)
+
+def gerar_transacoes(caminho, quantidade):
+    """Grava um array JSON de transações como o de gerar_dados_teste.py"""
+    random.seed(42)
+    data_base = datetime.datetime(2023, 1, 1)
+    with open(caminho, "w") as arquivo:
+        arquivo.write("[\n")
+        for i in range(quantidade):
+            data = data_base + datetime.timedelta(seconds=i * 37)
+            tipo = random.choice(["deposito", "saque", "transferencia"])
+            t = {
+                "id": hashlib.md5(f"{i}".encode()).hexdigest(),
+                "tipo": tipo,
+                "valor": round(random.uniform(1, 5000), 2),
+                "conta_origem": random.randint(1, 1000),
+                "conta_destino": random.randint(1, 1000) if tipo == "transferencia" else None,
+                "descricao": "Transação de teste",
+                "data_hora": data.isoformat(),
+                "timestamp": int((data - datetime.datetime(1970, 1, 1)).total_seconds())
+            }
+            separador = ",\n" if i else ""
+            arquivo.write(separador + "\n".join("    " + linha for linha in json.dumps(t, indent=4).splitlines()))
+        arquivo.write("\n]")
+
+def medir(codec, nivel, diretorio):
+    """Comprime transacoes.json do diretório atual e mede tamanho e tempos"""
+    caminho_zip = os.path.join(diretorio, f"bench_{codec}_{nivel}.zip")
+    
+    comeco = time.perf_counter()
+    with abrir_zip_backup(caminho_zip, codec, nivel if nivel is not None else NIVEL_PADRAO) as zip_file:
+        entrada = gravar_arquivo(zip_file, ARQUIVO_TRANSACOES)
+    tempo_compressao = time.perf_counter() - comeco
+    
+    # Descompressão em fluxo, conferindo o SHA-256 registrado
+    comeco = time.perf_counter()
+    sha = hashlib.sha256()
+    with zipfile.ZipFile(caminho_zip, "r") as zip_file, zip_file.open(ARQUIVO_TRANSACOES) as membro:
+        for bloco in iter(lambda: membro.read(TAMANHO_BLOCO), b""):
+            sha.update(bloco)
+    tempo_descompressao = time.perf_counter() - comeco
+    
+    if sha.hexdigest() != entrada["sha256"]:
+        raise ValueError(f"SHA-256 não confere com {codec}")
+    
+    tamanho = os.path.getsize(caminho_zip)
+    os.remove(caminho_zip)
+    return tamanho, tempo_compressao, tempo_descompressao
+
+def main():
+    """Função principal do script"""
+    quantidades = [int(argumento) for argumento in sys.argv[1:]] or list(QUANTIDADES_PADRAO)
+    diretorio_original = os.getcwd()
+    
+    print("===== BENCHMARK DE COMPRESSÃO DO BACKUP =====")
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.chdir(diretorio)
+        try:
+            for quantidade in quantidades:
+                gerar_transacoes(ARQUIVO_TRANSACOES, quantidade)
+                tamanho_original = os.path.getsize(ARQUIVO_TRANSACOES)
+                megabytes = tamanho_original / 1024 / 1024
+                
+                print(f"\nTransações: {quantidade} | {ARQUIVO_TRANSACOES}: {megabytes:.1f} MB")
+                print(f"{'codec':<8} {'nível':>5} {'tamanho (MB)':>13} {'razão':>7} {'compressão (MB/s)':>18} {'descompressão (MB/s)':>21}")
+                for codec, nivel in CONFIGURACOES:
+                    tamanho, tempo_compressao, tempo_descompressao = medir(codec, nivel, diretorio)
+                    print(
+                        f"{codec:<8} {nivel if nivel is not None else '-':>5} {tamanho / 1024 / 1024:>13.2f}"
+                        f" {tamanho_original / tamanho:>6.1f}x {megabytes / tempo_compressao:>18.1f}"
+                        f" {megabytes / tempo_descompressao:>21.1f}"
+                    )
+        finally:
+            os.chdir(diretorio_original)
+
+if __name__ == "__main__":
+    main()
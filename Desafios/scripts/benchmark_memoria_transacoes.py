@@ -0,0 +1,61 @@
+"""
+Script para comparar o uso de memória das transações em lista de dicionários
+e no armazenamento colunar
+"""
+import os
+import sys
+import random
+import tracemalloc
+import datetime
+
+# Adicionar o diretório pai ao path para importar o módulo principal
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transacoes_colunar import TransacoesColunares
+
+# Constantes
+QUANTIDADE_PADRAO = 100000
+QUANTIDADE_CONTAS = 1000
+
+def gerar_transacoes(quantidade):
+    """Gera transações no formato de dicionário usado pelo sistema"""
+    random.seed(42)
+    data_base = datetime.datetime(2023, 1, 1)
+    
+    for i in range(quantidade):
+        tipo = random.choice(["deposito", "saque", "transferencia"])
+        valor = round(random.uniform(1, 5000), 2)
+        # Cada transação recebe seu próprio texto de data, como no sistema
+        data = (data_base + datetime.timedelta(seconds=i * 37)).strftime("%d/%m/%Y %H:%M:%S")
+        conta = str(random.randint(1, QUANTIDADE_CONTAS)).zfill(4)
+        
+        if tipo == "transferencia":
+            destino = str(random.randint(1, QUANTIDADE_CONTAS)).zfill(4)
+            yield {"tipo": tipo, "valor": valor, "conta_origem": conta, "conta_destino": destino, "data": data}
+        else:
+            yield {"tipo": tipo, "valor": valor, "conta": conta, "data": data}
+
+def medir_memoria(construir, quantidade):
+    """Mede a memória retida pela estrutura criada por construir()"""
+    tracemalloc.start()
+    estrutura = construir(gerar_transacoes(quantidade))
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del estrutura
+    return memoria
+
+def main():
+    """Função principal do script"""
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else QUANTIDADE_PADRAO
+    
+    memoria_lista = medir_memoria(list, quantidade)
+    memoria_colunar = medir_memoria(TransacoesColunares, quantidade)
+    
+    print("===== BENCHMARK DE MEMÓRIA DAS TRANSAÇÕES =====")
+    print(f"Transações: {quantidade}")
+    print(f"Lista de dicionários: {memoria_lista / 1024 / 1024:.2f} MB ({memoria_lista / quantidade:.1f} bytes/transação)")
+    print(f"Armazenamento colunar: {memoria_colunar / 1024 / 1024:.2f} MB ({memoria_colunar / quantidade:.1f} bytes/transação)")
+    print(f"Redução: {memoria_lista / memoria_colunar:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Benchmark do sistema bancário em vários tamanhos de histórico
+
+Para cada quantidade de transações, gera um conjunto sintético (ver
+gerar_dados_teste.py) nos dois layouts e mede:
+  - sistema (layout txt): carregar_dados, salvar_dados, vazão de depositar,
+    sacar e transferir, e o extrato (primeira página, como exibir_extrato, e o
+    extrato inteiro) da conta mais movimentada (quente) e da menos (fria);
+  - scripts (layout JSON): cada relatório de relatorio_contas.py, backup
+    completo e incremental, verificação e restauração.
+O resultado sai em JSON (tempos em segundos, vazões em operações/s), para ser
+comparado entre execuções com --comparar.
+
+Uso: python benchmark_sistema.py [--tamanhos 1000 10000 100000] [--repeticoes N] [--operacoes N]
+                                 [--semente N] [--processos N] [--saida arquivo] [--comparar anterior.json]
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import platform
+import datetime
+import argparse
+import tempfile
+import itertools
+import statistics
+import contextlib
+
+# Adicionar o diretório pai ao path para importar o módulo principal
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from banco import Banco
+from gerar_dados_teste import gerar_dados_sinteticos
+import relatorio_contas
+import backup_dados
+import restaurar_backup
+
+# Constantes
+TAMANHOS_PADRAO = (1000, 10000, 100000)  # Até 10^7 pela linha de comando
+TRANSACOES_POR_CONTA = 100
+USUARIOS_POR_CONTA = 0.8
+REPETICOES_PADRAO = 3
+OPERACOES_PADRAO = 2000  # Chamadas de cada operação medidas por repetição
+TAMANHO_PAGINA = 20
+LIMIAR_VARIACAO = 0.10  # Variação destacada por --comparar
+
+def cronometrar(funcao, repeticoes):
+    """Mediana, em segundos, de várias execuções de funcao"""
+    tempos = []
+    for _ in range(repeticoes):
+        comeco = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - comeco)
+    return statistics.median(tempos)
+
+def relogio_crescente(inicio):
+    """Relógio que avança uma hora a cada leitura
+    
+    As transações novas ficam em ordem e o limite diário de saques quase
+    nunca interrompe a medição.
+    """
+    horas = itertools.count()
+    return lambda: inicio + datetime.timedelta(hours=next(horas))
+
+def percorrer_extrato(banco, numero_conta, paginas=None):
+    """Lê o extrato como exibir_extrato, página por página (todas, se paginas for None)"""
+    cursor = None
+    for _ in itertools.count() if paginas is None else range(paginas):
+        pagina = banco.extrato_paginado(numero_conta, TAMANHO_PAGINA, cursor, ordem="antigas").dados
+        cursor = pagina["proximo_cursor"]
+        if cursor is None:
+            break
+
+def medir_sistema(diretorio, repeticoes, operacoes, semente):
+    """Carga, gravação, operações e extrato do motor do sistema"""
+    resultados = {}
+    
+    banco = None
+    def carregar():
+        nonlocal banco
+        banco = Banco(diretorio)
+        banco.carregar_dados()
+    resultados["carregar_dados_s"] = cronometrar(carregar, repeticoes)
+    resultados["salvar_dados_s"] = cronometrar(banco.salvar_dados, repeticoes)
+    
+    # Extrato: contas com mais e com menos transações
+    movimentadas = sorted((len(posicoes), numero) for numero, posicoes in banco.indice_transacoes.items() if posicoes)
+    for nome, (quantidade, numero) in (("extrato_quente", movimentadas[-1]), ("extrato_frio", movimentadas[0])):
+        resultados[nome] = {
+            "conta": numero,
+            "transacoes": quantidade,
+            "primeira_pagina_s": cronometrar(lambda: percorrer_extrato(banco, numero, 1), repeticoes),
+            "completo_s": cronometrar(lambda: percorrer_extrato(banco, numero), repeticoes)
+        }
+    
+    # Operações: só a lógica e o journal (a compactação é medida em salvar_dados_s)
+    banco = Banco(diretorio, relogio=relogio_crescente(datetime.datetime(2100, 1, 1)))
+    banco.carregar_dados()
+    banco.compactacao_automatica = False
+    rng = random.Random(semente)
+    numeros = list(banco.contas)
+    for operacao in ("depositar", "sacar", "transferir"):
+        metodo = getattr(banco, operacao)
+        if operacao == "transferir":
+            argumentos = [(*rng.sample(numeros, 2), float(rng.randint(1, 100))) for _ in range(operacoes)]
+        else:
+            argumentos = [(rng.choice(numeros), float(rng.randint(1, 100))) for _ in range(operacoes)]
+        respostas = []
+        duracao = cronometrar(lambda: respostas.append([metodo(*argumento) for argumento in argumentos]), repeticoes)
+        resultados[f"{operacao}_ops_s"] = operacoes / duracao
+        resultados[f"{operacao}_aceitas"] = sum(1 for resposta in respostas[-1] if resposta.sucesso)
+    return resultados
+
+def medir_scripts(diretorio, repeticoes):
+    """Relatórios de relatorio_contas.py e backup/restauração, no layout JSON"""
+    diretorio_original = os.getcwd()
+    os.chdir(diretorio)
+    try:
+        relatorios = {
+            "saldo_total_s": relatorio_contas.calcular_saldo_total,
+            "transacoes_periodo_s": lambda: relatorio_contas.calcular_transacoes_periodo(None, None, "mes"),
+            "resumo_contas_s": relatorio_contas.calcular_resumo_contas,
+            "contas_por_usuario_s": relatorio_contas.calcular_contas_por_usuario
+        }
+        resultados = {"relatorios": {nome: cronometrar(funcao, repeticoes) for nome, funcao in relatorios.items()}}
+        
+        # As mensagens dos scripts de backup não entram na saída do benchmark
+        with contextlib.redirect_stdout(io.StringIO()):
+            comeco = time.perf_counter()
+            caminho = backup_dados.realizar_backup(completo=True)
+            backup_completo = time.perf_counter() - comeco
+            
+            comeco = time.perf_counter()
+            incremental = backup_dados.realizar_backup()
+            backup_incremental = time.perf_counter() - comeco
+            
+            verificar = cronometrar(lambda: restaurar_backup.restaurar_backup(caminho, apenas_verificar=True), repeticoes)
+            restaurar = cronometrar(lambda: restaurar_backup.restaurar_backup(caminho), repeticoes)
+        
+        resultados["backup"] = {
+            "tamanho_dados_bytes": sum(os.path.getsize(nome) for nome in backup_dados.ARQUIVOS_DADOS if os.path.exists(nome)),
+            "tamanho_backup_bytes": os.path.getsize(caminho),
+            "backup_completo_s": backup_completo,
+            "backup_incremental_s": backup_incremental,
+            "tamanho_incremental_bytes": os.path.getsize(incremental),
+            "verificar_s": verificar,
+            "restaurar_s": restaurar
+        }
+        return resultados
+    finally:
+        os.chdir(diretorio_original)
+
+def medir_tamanho(transacoes, repeticoes, operacoes, semente, processos):
+    """Gera os dados de um tamanho e executa todas as medições"""
+    contas = max(10, transacoes // TRANSACOES_POR_CONTA)
+    usuarios = max(1, round(contas * USUARIOS_POR_CONTA))
+    resultado = {"usuarios": usuarios, "contas": contas, "transacoes": transacoes}
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        diretorio_txt = os.path.join(diretorio, "txt")
+        diretorio_json = os.path.join(diretorio, "json")
+        os.makedirs(diretorio_txt)
+        os.makedirs(diretorio_json)
+        
+        comeco = time.perf_counter()
+        for formato, destino in (("txt", diretorio_txt), ("json", diretorio_json)):
+            gerar_dados_sinteticos(usuarios, contas, transacoes, semente, formato, processos=processos, diretorio=destino)
+        resultado["geracao_s"] = time.perf_counter() - comeco
+        
+        print(f"[{transacoes}] sistema...", file=sys.stderr)
+        resultado["sistema"] = medir_sistema(diretorio_txt, repeticoes, operacoes, semente)
+        print(f"[{transacoes}] relatórios e backup...", file=sys.stderr)
+        resultado.update(medir_scripts(diretorio_json, repeticoes))
+    return resultado
+
+def metricas_planas(resultados, prefixo=""):
+    """Métricas numéricas de um resultado aninhado, com o caminho como nome"""
+    for chave, valor in resultados.items():
+        nome = f"{prefixo}.{chave}" if prefixo else chave
+        if isinstance(valor, dict):
+            yield from metricas_planas(valor, nome)
+        elif isinstance(valor, float):
+            yield nome, valor
+
+def comparar(atual, anterior):
+    """Imprime a variação de cada métrica em relação a uma execução anterior"""
+    antigas = dict(metricas_planas(anterior["resultados"]))
+    print(f"\n{'métrica':<55} {'anterior':>12} {'atual':>12} {'variação':>9}", file=sys.stderr)
+    for nome, valor in metricas_planas(atual["resultados"]):
+        if not antigas.get(nome):
+            continue
+        variacao = valor / antigas[nome] - 1
+        # Tempos (_s) pioram ao subir; vazões (_ops_s) ao cair
+        piorou = variacao < -LIMIAR_VARIACAO if nome.endswith("_ops_s") else variacao > LIMIAR_VARIACAO
+        marca = " <- piorou" if piorou and not nome.endswith("_bytes") else ""
+        print(f"{nome:<55} {antigas[nome]:>12.6g} {valor:>12.6g} {variacao:>+8.1%}{marca}", file=sys.stderr)
+
+def main():
+    """Função principal do script"""
+    parser = argparse.ArgumentParser(description="Benchmark do sistema bancário")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS_PADRAO), help="quantidades de transações")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES_PADRAO, help="execuções por medição (vale a mediana)")
+    parser.add_argument("--operacoes", type=int, default=OPERACOES_PADRAO, help="chamadas de cada operação por execução")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--processos", type=int, default=1, help="processos da geração dos dados (0: um por CPU)")
+    parser.add_argument("--saida", help="arquivo JSON de saída (padrão: saída padrão)")
+    parser.add_argument("--comparar", help="resultado JSON de uma execução anterior")
+    argumentos = parser.parse_args()
+    
+    saida = {
+        "gerado_em": datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+        "ambiente": {"python": platform.python_version(), "plataforma": platform.platform(), "cpus": os.cpu_count()},
+        "parametros": {"repeticoes": argumentos.repeticoes, "operacoes": argumentos.operacoes, "semente": argumentos.semente},
+        "resultados": {}
+    }
+    for transacoes in argumentos.tamanhos:
+        print(f"[{transacoes}] gerando dados...", file=sys.stderr)
+        saida["resultados"][str(transacoes)] = medir_tamanho(
+            transacoes, argumentos.repeticoes, argumentos.operacoes, argumentos.semente, argumentos.processos or os.cpu_count()
+        )
+    
+    if argumentos.saida:
+        with open(argumentos.saida, "w") as arquivo:
+            json.dump(saida, arquivo, indent=4)
+    else:
+        json.dump(saida, sys.stdout, indent=4)
+        print()
+    
+    if argumentos.comparar:
+        with open(argumentos.comparar, "r") as arquivo:
+            comparar(saida, json.load(arquivo))
+
+if __name__ == "__main__":
+    main()
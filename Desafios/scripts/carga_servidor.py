@@ -0,0 +1,126 @@
+"""
+Gerador de carga para o servidor bancário (servidor.py)
+
+Abre várias sessões simultâneas, cada uma com seu usuário e conta, executa
+depósitos, saques e transferências e mede vazão (ops/s) e latência (p50/p99).
+
+Uso: python carga_servidor.py [sessoes] [operacoes_por_sessao] [host:porta]
+Sem host:porta, um servidor é iniciado em um diretório temporário.
+"""
+import os
+import sys
+import json
+import time
+import random
+import signal
+import socket
+import asyncio
+import tempfile
+import subprocess
+
+# Constantes
+DIRETORIO_SISTEMA = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SESSOES_PADRAO = 1000
+OPERACOES_PADRAO = 20
+PORTA_CARGA = 8799
+
+async def enviar(leitor, escritor, pedido):
+    """Envia um pedido e aguarda a resposta"""
+    escritor.write(json.dumps(pedido).encode() + b"\n")
+    await escritor.drain()
+    return json.loads(await leitor.readline())
+
+async def preparar_sessao(host, porta, indice):
+    """Cria usuário e conta da sessão e faz login"""
+    leitor, escritor = await asyncio.open_connection(host, porta, limit=2 ** 20)
+    cpf = str(20000000000 + indice)
+    
+    await enviar(leitor, escritor, {"op": "criar_usuario", "cpf": cpf, "nome": f"Carga {indice}", "senha": "1234"})
+    await enviar(leitor, escritor, {"op": "criar_conta", "cpf": cpf})
+    login = await enviar(leitor, escritor, {"op": "autenticar", "cpf": cpf, "senha": "1234"})
+    await enviar(leitor, escritor, {"op": "depositar", "valor": 10000.0})
+    return leitor, escritor, login["conta"]
+
+async def executar_sessao(leitor, escritor, contas, operacoes, latencias):
+    """Executa operações aleatórias em uma sessão, medindo cada uma"""
+    for _ in range(operacoes):
+        sorteio = random.random()
+        if sorteio < 0.4:
+            pedido = {"op": "depositar", "valor": float(random.randint(1, 100))}
+        elif sorteio < 0.6:
+            pedido = {"op": "sacar", "valor": float(random.randint(1, 100))}
+        elif sorteio < 0.95:
+            pedido = {"op": "transferir", "destino": random.choice(contas), "valor": float(random.randint(1, 100))}
+        else:
+            pedido = {"op": "saldo"}
+        
+        inicio = time.perf_counter()
+        await enviar(leitor, escritor, pedido)
+        latencias.append(time.perf_counter() - inicio)
+    
+    escritor.write(b'{"op": "sair"}\n')
+    await escritor.drain()
+    escritor.close()
+
+def percentil(valores_ordenados, p):
+    """Percentil p (0-100) de uma lista já ordenada"""
+    indice = min(len(valores_ordenados) - 1, int(len(valores_ordenados) * p / 100))
+    return valores_ordenados[indice]
+
+async def gerar_carga(host, porta, sessoes, operacoes):
+    """Prepara as sessões, dispara a carga e exibe as estatísticas"""
+    random.seed(7)
+    conexoes = await asyncio.gather(*(preparar_sessao(host, porta, i) for i in range(sessoes)))
+    contas = [conta for _, _, conta in conexoes]
+    
+    latencias = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(executar_sessao(leitor, escritor, contas, operacoes, latencias) for leitor, escritor, _ in conexoes))
+    duracao = time.perf_counter() - inicio
+    
+    latencias.sort()
+    print("===== CARGA NO SERVIDOR BANCÁRIO =====")
+    print(f"Sessões simultâneas: {sessoes} | Operações por sessão: {operacoes}")
+    print(f"Total de operações: {len(latencias)} em {duracao:.2f}s")
+    print(f"Vazão: {len(latencias) / duracao:.0f} ops/s")
+    print(f"Latência p50: {percentil(latencias, 50) * 1000:.2f} ms")
+    print(f"Latência p99: {percentil(latencias, 99) * 1000:.2f} ms")
+
+def aguardar_porta(host, porta, tempo_limite=10):
+    """Espera o servidor começar a aceitar conexões"""
+    limite = time.time() + tempo_limite
+    while time.time() < limite:
+        try:
+            socket.create_connection((host, porta), timeout=0.5).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+def main():
+    """Função principal do script"""
+    sessoes = int(sys.argv[1]) if len(sys.argv) > 1 else SESSOES_PADRAO
+    operacoes = int(sys.argv[2]) if len(sys.argv) > 2 else OPERACOES_PADRAO
+    
+    if len(sys.argv) > 3:
+        host, porta = sys.argv[3].rsplit(":", 1)
+        asyncio.run(gerar_carga(host, int(porta), sessoes, operacoes))
+        return
+    
+    # Iniciar um servidor próprio com dados vazios
+    with tempfile.TemporaryDirectory() as diretorio:
+        servidor = subprocess.Popen(
+            [sys.executable, os.path.join(DIRETORIO_SISTEMA, "servidor.py"), str(PORTA_CARGA)],
+            cwd=diretorio, stdout=subprocess.DEVNULL
+        )
+        try:
+            if not aguardar_porta("127.0.0.1", PORTA_CARGA):
+                print("Não foi possível iniciar o servidor.")
+                return
+            asyncio.run(gerar_carga("127.0.0.1", PORTA_CARGA, sessoes, operacoes))
+        finally:
+            servidor.send_signal(signal.SIGINT)
+            servidor.wait()
+
+if __name__ == "__main__":
+    main()
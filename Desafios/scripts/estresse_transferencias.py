@@ -0,0 +1,89 @@
+"""
+Teste de estresse do BancoConcorrente: muitas threads fazendo transferências
+aleatórias e verificando que o dinheiro total do sistema se conserva
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+# Adicionar o diretório pai ao path para importar o módulo principal
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from banco import Banco
+from concorrente import BancoConcorrente
+
+# Constantes
+QUANTIDADE_CONTAS = 50
+SALDO_INICIAL = 1000.0
+QUANTIDADE_OPERACOES = 20000
+TRABALHADORES = 16
+
+def preparar_banco(diretorio):
+    """Cria um banco com várias contas e saldo inicial"""
+    banco = Banco(diretorio)
+    for i in range(QUANTIDADE_CONTAS):
+        cpf = str(10000000000 + i)
+        banco.criar_usuario(cpf, f"Cliente {i}", "1234")
+        numero_conta = banco.criar_conta(cpf).dados
+        banco.depositar(numero_conta, SALDO_INICIAL)
+    banco.salvar_dados()
+    return banco
+
+def gerar_operacoes(numeros_conta, quantidade):
+    """Gera transferências aleatórias com valores inteiros (soma exata em float)"""
+    random.seed(1)
+    for _ in range(quantidade):
+        origem, destino = random.sample(numeros_conta, 2)
+        yield ("transferir", origem, destino, float(random.randint(1, 300)))
+
+def main():
+    """Função principal do script"""
+    with tempfile.TemporaryDirectory() as diretorio:
+        banco = preparar_banco(diretorio)
+        numeros_conta = list(banco.contas)
+        total_esperado = QUANTIDADE_CONTAS * SALDO_INICIAL
+        
+        print("===== ESTRESSE DE TRANSFERÊNCIAS CONCORRENTES =====")
+        print(f"Contas: {QUANTIDADE_CONTAS} | Operações: {QUANTIDADE_OPERACOES} | Threads: {TRABALHADORES}")
+        
+        inicio = time.perf_counter()
+        with BancoConcorrente(banco, trabalhadores=TRABALHADORES) as concorrente:
+            resultados = concorrente.executar_concorrente(gerar_operacoes(numeros_conta, QUANTIDADE_OPERACOES))
+            total_final = concorrente.saldo_total()
+            concorrente.compactar()
+        duracao = time.perf_counter() - inicio
+        
+        realizadas = sum(1 for r in resultados if r.sucesso)
+        print(f"Transferências realizadas: {realizadas} | Recusadas: {len(resultados) - realizadas}")
+        print(f"Tempo: {duracao:.2f}s ({len(resultados) / duracao:.0f} ops/s)")
+        
+        # Invariantes: dinheiro conservado, nenhum saldo negativo
+        erros = []
+        if total_final != total_esperado:
+            erros.append(f"Saldo total {total_final:.2f} diferente do esperado {total_esperado:.2f}")
+        negativas = [numero for numero, conta in banco.contas.items() if conta["saldo"] < 0]
+        if negativas:
+            erros.append(f"Contas com saldo negativo: {', '.join(negativas)}")
+        
+        # Um depósito inicial por conta mais uma transação por transferência realizada
+        esperadas = QUANTIDADE_CONTAS + realizadas
+        if len(banco.transacoes) != esperadas:
+            erros.append(f"{len(banco.transacoes)} transações registradas, esperadas {esperadas}")
+        
+        # O que foi gravado em disco deve reproduzir o mesmo estado
+        recarregado = Banco(diretorio)
+        recarregado.carregar_dados()
+        if recarregado.contas != banco.contas:
+            erros.append("Dados recarregados do disco diferem do estado em memória")
+        
+        if erros:
+            for erro in erros:
+                print(f"FALHA: {erro}")
+            sys.exit(1)
+        
+        print(f"OK: saldo total conservado (R$ {total_final:.2f})")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,104 @@
 """
 Script para gerar dados de teste para o sistema bancário
+
+Sem parâmetros, gera o pequeno conjunto fixo de sempre (dois usuários com
+credenciais conhecidas). Com --usuarios, --contas ou --transacoes, gera um
+conjunto sintético do tamanho pedido, reprodutível pela semente:
+  - atividade concentrada: poucas contas fazem muitas transações (Zipf);
+  - horários comerciais e dias úteis mais movimentados, em ordem cronológica;
+  - transferências quase sempre para um pequeno grupo de contatos de cada conta;
+  - valores log-normais (saques em múltiplos de 10).
+As operações seguem as regras do sistema em ordem cronológica (saldo,
+limite por saque e LIMITE_SAQUES saques por dia): as grandes demais são
+reduzidas e as impossíveis viram depósitos, e os saldos das contas são a
+soma das transações geradas. A saída é gravada em
+fluxo no layout JSON lido pelos scripts ou no layout texto (separado por ;)
+lido pelo sistema, com os agregados; no formato sqlite, o layout texto é
+importado para o banco SQLite do sistema (banco.db). Cada dia usa o próprio
+gerador aleatório, então o resultado não depende da quantidade de processos.
+
+Uso: python gerar_dados_teste.py
+     python gerar_dados_teste.py --transacoes 10000000 [--usuarios N] [--contas N] [--semente N]
+                                 [--formato json|txt|sqlite] [--inicio DD/MM/AAAA] [--dias N]
+                                 [--processos N] [--diretorio caminho]
 """
 import os
 import sys
 import json
+import time
+import random
+import shutil
 import hashlib
 import datetime
+import argparse
+import tempfile
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 # Adicionar o diretório pai ao path para importar o módulo principal
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from transacoes_colunar import EPOCA, datetime_para_timestamp
+from agregados import Agregados, ARQUIVO_AGREGADOS
+from armazenamento import ARQUIVO_SQLITE, SUFIXOS_WAL, ArmazenamentoSQLite
+from banco import (
+    AGENCIA, LIMITE_PADRAO, LIMITE_SAQUES, ARQUIVO_JOURNAL, ARQUIVO_USUARIOS as ARQUIVO_USUARIOS_TXT,
+    ARQUIVO_CONTAS as ARQUIVO_CONTAS_TXT, ARQUIVO_TRANSACOES as ARQUIVO_TRANSACOES_TXT
+)
+
 # Constantes
 ARQUIVO_USUARIOS = "usuarios.json"
 ARQUIVO_CONTAS = "contas.json"
 ARQUIVO_TRANSACOES = "transacoes.json"
+FORMATOS = ("json", "txt", "sqlite")
+ARQUIVOS_FORMATO = {
+    "json": (ARQUIVO_USUARIOS, ARQUIVO_CONTAS, ARQUIVO_TRANSACOES),
+    "txt": (ARQUIVO_USUARIOS_TXT, ARQUIVO_CONTAS_TXT, ARQUIVO_TRANSACOES_TXT)
+}
+
+# Conjunto sintético
+USUARIOS_PADRAO = 1000
+TRANSACOES_PADRAO = 100000
+CONTAS_POR_USUARIO = 1.2  # Contas por usuário quando --contas não é informado
+DATA_INICIAL_PADRAO = "01/01/2024"
+DIAS_PADRAO = 365
+SEGUNDOS_DIA = 86400
+CPF_BASE = 10000000000
+EXPOENTE_ATIVIDADE = 0.8  # Zipf: peso da conta de posto k proporcional a 1 / k^expoente
+CONTATOS_POR_CONTA = 5
+PROPORCAO_CONTATOS = 0.8  # Transferências feitas para um contato frequente
+TIPOS = ("deposito", "saque", "transferencia")
+PESOS_TIPOS = (0.35, 0.25, 0.40)
+MEDIAS_VALOR = {"deposito": 5.5, "saque": 4.5, "transferencia": 5.0}  # Média do log do valor
+DESVIO_VALOR = 1.0
+DESCRICOES = {"deposito": "Depósito", "saque": "Saque", "transferencia": "Transferência"}
+PESOS_DIA_SEMANA = (1.0, 1.0, 1.0, 1.0, 1.2, 0.7, 0.4)  # Segunda a domingo
+PESOS_HORAS = (
+    0.1, 0.05, 0.05, 0.05, 0.05, 0.1, 0.3, 0.6, 1.0, 1.4, 1.6, 1.6,
+    1.5, 1.4, 1.5, 1.5, 1.4, 1.3, 1.1, 0.9, 0.7, 0.5, 0.3, 0.2
+)
+LIMITES = (LIMITE_PADRAO, 1000.0, 2000.0)
+PESOS_LIMITES = (0.7, 0.2, 0.1)
+NOMES = (
+    "Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+    "Juliana", "Lucas", "Mariana", "Nicolas", "Patrícia", "Rafael", "Sofia", "Thiago", "Vitória", "William"
+)
+SOBRENOMES = (
+    "Almeida", "Barbosa", "Cardoso", "Costa", "Ferreira", "Gomes", "Lima", "Martins", "Oliveira", "Pereira",
+    "Ribeiro", "Rodrigues", "Santos", "Silva", "Souza"
+)
+RUAS = ("Rua das Flores", "Av. Brasil", "Rua XV de Novembro", "Av. Paulista", "Rua da Praia", "Rua Sete de Setembro")
+
+# Transação no mesmo layout de json.dump(transacoes, arquivo, indent=4)
+MODELO_TRANSACAO_JSON = (
+    '    {{\n        "id": "{id}",\n        "tipo": "{tipo}",\n        "valor": {valor!r},\n'
+    '        "conta_origem": {origem},\n        "conta_destino": {destino},\n        "descricao": {descricao},\n'
+    '        "data_hora": "{data_hora}",\n        "timestamp": {timestamp}\n    }}'
+)
+DESCRICOES_JSON = {tipo: json.dumps(descricao) for tipo, descricao in DESCRICOES.items()}
+
+_tabelas = None  # Tabelas compartilhadas com os processos geradores (ver _iniciar_gerador)
 
 def gerar_hash_senha(senha):
     """Gera um hash da senha para armazenamento seguro"""
@@ -72,7 +157,8 @@ def gerar_dados_teste():
             "conta_origem": 1,
             "conta_destino": None,
             "descricao": "Depósito inicial",
-            "data_hora": (data_base + datetime.timedelta(hours=1)).isoformat()
+            "data_hora": (data_base + datetime.timedelta(hours=1)).isoformat(),
+            "timestamp": datetime_para_timestamp(data_base + datetime.timedelta(hours=1))
         },
         {
             "id": hashlib.md5(f"{data_base.isoformat()}-2".encode()).hexdigest(),
@@ -81,7 +167,8 @@ def gerar_dados_teste():
             "conta_origem": 2,
             "conta_destino": None,
             "descricao": "Depósito inicial",
-            "data_hora": (data_base + datetime.timedelta(hours=2)).isoformat()
+            "data_hora": (data_base + datetime.timedelta(hours=2)).isoformat(),
+            "timestamp": datetime_para_timestamp(data_base + datetime.timedelta(hours=2))
         },
         {
             "id": hashlib.md5(f"{data_base.isoformat()}-3".encode()).hexdigest(),
@@ -90,7 +177,8 @@ def gerar_dados_teste():
             "conta_origem": 1,
             "conta_destino": None,
             "descricao": "Saque em conta",
-            "data_hora": (data_base + datetime.timedelta(days=1)).isoformat()
+            "data_hora": (data_base + datetime.timedelta(days=1)).isoformat(),
+            "timestamp": datetime_para_timestamp(data_base + datetime.timedelta(days=1))
         },
         {
             "id": hashlib.md5(f"{data_base.isoformat()}-4".encode()).hexdigest(),
@@ -99,7 +187,8 @@ def gerar_dados_teste():
             "conta_origem": 2,
             "conta_destino": 1,
             "descricao": "Transferência entre contas",
-            "data_hora": (data_base + datetime.timedelta(days=2)).isoformat()
+            "data_hora": (data_base + datetime.timedelta(days=2)).isoformat(),
+            "timestamp": datetime_para_timestamp(data_base + datetime.timedelta(days=2))
         }
     ]
     
@@ -113,6 +202,14 @@ def gerar_dados_teste():
     with open(ARQUIVO_TRANSACOES, "w") as arquivo:
         json.dump(transacoes, arquivo, indent=4)
     
+    # Totais usados pelo relatório de saldo total
+    agregados = Agregados()
+    for conta in contas.values():
+        agregados.registrar_conta(conta["agencia"], conta["saldo"])
+    for t in transacoes:
+        agregados.registrar_transacao(t["tipo"], t["valor"], t["timestamp"])
+    agregados.salvar(ARQUIVO_AGREGADOS)
+    
     print("Dados de teste gerados com sucesso!")
     print(f"Usuários: {len(usuarios)}")
     print(f"Contas: {len(contas)}")
@@ -121,5 +218,369 @@ def gerar_dados_teste():
     print("CPF: 12345678900 | Senha: Senha123")
     print("CPF: 98765432100 | Senha: Senha456")
 
+def acumular(pesos):
+    """Pesos acumulados, no formato usado por random.choices(cum_weights=...)"""
+    total = 0.0
+    acumulados = array("d")
+    for peso in pesos:
+        total += peso
+        acumulados.append(total)
+    return acumulados
+
+def transacoes_por_dia(quantidade, data_inicial, dias):
+    """Distribui as transações pelos dias, com menos movimento nos fins de semana"""
+    pesos = [PESOS_DIA_SEMANA[(data_inicial + datetime.timedelta(days=dia)).weekday()] for dia in range(dias)]
+    total = sum(pesos)
+    por_dia = []
+    acumulado = 0.0
+    anterior = 0
+    for peso in pesos:
+        acumulado += peso
+        atual = round(quantidade * acumulado / total)
+        por_dia.append(atual - anterior)
+        anterior = atual
+    return por_dia
+
+def montar_tabelas(rng, quantidade_contas):
+    """Pesos de atividade e contatos frequentes de cada conta"""
+    # Postos de atividade embaralhados: a conta 1 não é sempre a mais ativa
+    postos = list(range(1, quantidade_contas + 1))
+    rng.shuffle(postos)
+    acumulados = acumular(1 / posto ** EXPOENTE_ATIVIDADE for posto in postos)
+    contatos = array("l", rng.choices(range(1, quantidade_contas + 1), cum_weights=acumulados, k=quantidade_contas * CONTATOS_POR_CONTA))
+    return {"quantidade_contas": quantidade_contas, "acumulados": acumulados, "contatos": contatos}
+
+def _iniciar_gerador(tabelas):
+    global _tabelas
+    _tabelas = tabelas
+
+def sortear_dia(rng, inicio_dia, quantidade, candidatos):
+    """Sorteia as operações de um dia, em ordem cronológica, ainda sem aplicar as regras do sistema
+    
+    candidatos são os arrays (timestamps, origens, destinos, tipos, centavos)
+    do grupo, acrescentados aqui; destino 0 indica operação sem destino.
+    """
+    timestamps, origens, destinos, tipos, centavos = candidatos
+    quantidade_contas = _tabelas["quantidade_contas"]
+    acumulados = _tabelas["acumulados"]
+    contatos = _tabelas["contatos"]
+    populacao = range(1, quantidade_contas + 1)
+    # Com uma conta só não há para quem transferir
+    pesos_tipos = PESOS_TIPOS if quantidade_contas > 1 else PESOS_TIPOS[:2]
+    
+    horas = rng.choices(range(24), cum_weights=_tabelas["horas"], k=quantidade)
+    timestamps.extend(sorted(inicio_dia + hora * 3600 + rng.randrange(3600) for hora in horas))
+    origens_dia = rng.choices(populacao, cum_weights=acumulados, k=quantidade)
+    origens.extend(origens_dia)
+    
+    for origem, tipo in zip(origens_dia, rng.choices(range(len(pesos_tipos)), weights=pesos_tipos, k=quantidade)):
+        valor = max(0.01, round(rng.lognormvariate(MEDIAS_VALOR[TIPOS[tipo]], DESVIO_VALOR), 2))
+        destino = 0
+        if TIPOS[tipo] == "saque":
+            valor = max(10.0, round(valor, -1))
+        elif TIPOS[tipo] == "transferencia":
+            if rng.random() < PROPORCAO_CONTATOS:
+                destino = contatos[(origem - 1) * CONTATOS_POR_CONTA + rng.randrange(CONTATOS_POR_CONTA)]
+            else:
+                destino = rng.choices(populacao, cum_weights=acumulados)[0]
+            if destino == origem:
+                destino = origem % quantidade_contas + 1
+        destinos.append(destino)
+        tipos.append(tipo)
+        centavos.append(round(valor * 100))
+
+def sortear_grupo(semente, inicio, primeiro_dia, quantidades):
+    """Sorteia as operações de um grupo de dias seguidos (cada dia com o próprio gerador)"""
+    candidatos = (array("q"), array("l"), array("l"), array("b"), array("q"))
+    for deslocamento, quantidade in enumerate(quantidades):
+        if quantidade:
+            dia = primeiro_dia + deslocamento
+            sortear_dia(random.Random(f"{semente}:{dia}"), inicio + dia * SEGUNDOS_DIA, quantidade, candidatos)
+    return candidatos
+
+def aplicar_regras(candidatos, estado, volumes):
+    """Ajusta as operações sorteadas às regras do sistema, na ordem cronológica
+    
+    Como no Banco: saques e transferências não passam do saldo, o saque não
+    passa do limite da conta (e sai em múltiplos de 10) e cada conta faz no
+    máximo LIMITE_SAQUES saques por dia. Uma operação grande demais é reduzida;
+    uma que não cabe de jeito nenhum (conta sem saldo, limite diário atingido)
+    vira um depósito do mesmo valor, para manter a quantidade pedida. estado
+    (saldos, limites, dia e quantidade de saques, por conta) é atualizado, e
+    volumes recebe o volume de cada dia por tipo.
+    """
+    timestamps, origens, destinos, tipos, centavos = candidatos
+    saldos, limites, dias_saque, saques = estado
+    deposito, saque = TIPOS.index("deposito"), TIPOS.index("saque")
+    rotulo_dia = None
+    
+    for i, (timestamp, origem, tipo, valor) in enumerate(zip(timestamps, origens, tipos, centavos)):
+        if tipo == saque:
+            dia = timestamp // SEGUNDOS_DIA
+            if dias_saque[origem] != dia:
+                dias_saque[origem], saques[origem] = dia, 0
+            valor = min(valor, limites[origem], saldos[origem]) // 1000 * 1000
+            if saques[origem] < LIMITE_SAQUES and valor >= 1000:
+                saldos[origem] -= valor
+                saques[origem] += 1
+            else:
+                tipo, valor = deposito, centavos[i]
+        elif tipo != deposito:
+            valor = min(valor, saldos[origem])
+            if valor > 0:
+                saldos[origem] -= valor
+                saldos[destinos[i]] += valor
+            else:
+                tipo, valor = deposito, centavos[i]
+        
+        if tipo == deposito:
+            saldos[origem] += valor
+            destinos[i] = 0
+        tipos[i], centavos[i] = tipo, valor
+        
+        if rotulo_dia is None or timestamp >= fim_dia:
+            inicio_dia = timestamp - timestamp % SEGUNDOS_DIA
+            fim_dia = inicio_dia + SEGUNDOS_DIA
+            rotulo_dia = (EPOCA + datetime.timedelta(seconds=inicio_dia)).strftime("%Y-%m-%d")
+        total = volumes.setdefault(rotulo_dia, {}).setdefault(TIPOS[tipo], {"quantidade": 0, "total": 0.0})
+        total["quantidade"] += 1
+        total["total"] += valor / 100
+
+def gravar_grupo(caminho_parte, semente, primeiro_dia, quantidades, candidatos, formato):
+    """Grava as operações de um grupo de dias, já ajustadas, em um arquivo parcial"""
+    timestamps, origens, destinos, tipos, centavos = candidatos
+    separador = ",\n" if formato == "json" else "\n"
+    i = 0
+    with open(caminho_parte, "w") as arquivo:
+        for deslocamento, quantidade in enumerate(quantidades):
+            if not quantidade:
+                continue
+            # Identificadores com gerador próprio do dia: não dependem do agrupamento
+            rng = random.Random(f"{semente}:{primeiro_dia + deslocamento}:ids")
+            linhas = []
+            for j in range(i, i + quantidade):
+                tipo, origem, destino, timestamp = TIPOS[tipos[j]], origens[j], destinos[j], timestamps[j]
+                valor = centavos[j] / 100
+                if formato == "json":
+                    linhas.append(MODELO_TRANSACAO_JSON.format(
+                        id=f"{rng.getrandbits(128):032x}", tipo=tipo, valor=valor, origem=origem,
+                        destino=destino or "null", descricao=DESCRICOES_JSON[tipo],
+                        data_hora=(EPOCA + datetime.timedelta(seconds=timestamp)).isoformat(), timestamp=timestamp
+                    ))
+                elif not destino:
+                    linhas.append(f"{tipo};{valor};{str(origem).zfill(4)};;{timestamp}")
+                else:
+                    linhas.append(f"{tipo};{valor};{str(origem).zfill(4)};{str(destino).zfill(4)};{timestamp}")
+            arquivo.write((separador if i else "") + separador.join(linhas))
+            i += quantidade
+    return i
+
+def gravar_usuarios(caminho, formato, rng, quantidade, data_inicial):
+    """Grava os usuários em fluxo"""
+    with open(caminho, "w") as arquivo:
+        if formato == "json":
+            arquivo.write("{")
+        for indice in range(quantidade):
+            cpf = str(CPF_BASE + indice)
+            nome = f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}"
+            senha = f"Senha{indice}"
+            if formato == "json":
+                nascimento = datetime.date(1950, 1, 1) + datetime.timedelta(days=rng.randrange(20000))
+                usuario = {
+                    "cpf": cpf,
+                    "nome": nome,
+                    "data_nascimento": nascimento.strftime("%d/%m/%Y"),
+                    "endereco": f"{rng.choice(RUAS)}, {rng.randint(1, 3000)}",
+                    "senha_hash": gerar_hash_senha(senha)
+                }
+                campos = ",\n".join(f"        {json.dumps(chave)}: {json.dumps(valor)}" for chave, valor in usuario.items())
+                arquivo.write(("," if indice else "") + f'\n    "{cpf}": {{\n{campos}\n    }}')
+            else:
+                cadastro = data_inicial - datetime.timedelta(seconds=rng.randrange(3 * 365 * SEGUNDOS_DIA))
+                arquivo.write(f"{cpf};{nome};{senha};{cadastro.strftime('%d/%m/%Y %H:%M:%S')}\n")
+        if formato == "json":
+            arquivo.write("\n}" if quantidade else "}")
+
+def titulares_das_contas(rng, quantidade_usuarios, quantidade_contas):
+    """Titular (índice do usuário) de cada conta: uma por usuário e as demais para alguns deles"""
+    titulares = array("l", range(min(quantidade_usuarios, quantidade_contas)))
+    if quantidade_contas > quantidade_usuarios:
+        # Contas extras concentradas em poucos clientes
+        acumulados = acumular(1 / posto ** EXPOENTE_ATIVIDADE for posto in range(1, quantidade_usuarios + 1))
+        titulares.extend(rng.choices(range(quantidade_usuarios), cum_weights=acumulados, k=quantidade_contas - quantidade_usuarios))
+    return titulares
+
+def gravar_contas(caminho, formato, titulares, estado):
+    """Grava as contas em fluxo, com os saldos e o contador de saques resultantes das transações"""
+    saldos, limites, dias_saque, saques = estado
+    with open(caminho, "w") as arquivo:
+        if formato == "json":
+            arquivo.write("{")
+        for indice, titular in enumerate(titulares):
+            numero = indice + 1
+            cpf = str(CPF_BASE + titular)
+            saldo = saldos[numero] / 100
+            limite = limites[numero] / 100
+            ultimo_saque = None
+            if dias_saque[numero] >= 0:
+                ultimo_saque = (EPOCA + datetime.timedelta(days=dias_saque[numero])).strftime("%d/%m/%Y")
+            if formato == "json":
+                arquivo.write(
+                    ("," if indice else "") + f'\n    "{numero}": {{\n        "numero": {numero},\n'
+                    f'        "agencia": "{AGENCIA}",\n        "cpf_usuario": "{cpf}",\n        "saldo": {saldo!r},\n'
+                    f'        "limite": {limite!r},\n        "saques_hoje": {saques[numero]},\n'
+                    f'        "data_ultimo_saque": {json.dumps(ultimo_saque)}\n    }}'
+                )
+            else:
+                arquivo.write(f"{str(numero).zfill(4)};{saldo};{limite};{cpf};{saques[numero]};{ultimo_saque}\n")
+        if formato == "json":
+            arquivo.write("\n}" if len(titulares) else "}")
+
+def gerar_dados_sinteticos(usuarios, contas, transacoes, semente=0, formato="json", data_inicial=None,
+                           dias=DIAS_PADRAO, processos=1, diretorio="."):
+    """Gera um conjunto sintético reprodutível; retorna a quantidade de transações gravadas"""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato} (use {', '.join(FORMATOS)})")
+    if transacoes and not contas:
+        raise ValueError("Transações precisam de pelo menos uma conta")
+    if contas and not usuarios:
+        raise ValueError("Contas precisam de pelo menos um usuário")
+    data_inicial = data_inicial or datetime.datetime.strptime(DATA_INICIAL_PADRAO, "%d/%m/%Y")
+    if formato == "sqlite":
+        return gerar_sqlite(usuarios, contas, transacoes, semente, data_inicial, dias, processos, diretorio)
+    arquivo_usuarios, arquivo_contas, arquivo_transacoes = (os.path.join(diretorio, nome) for nome in ARQUIVOS_FORMATO[formato])
+    # Geradores separados: os campos próprios de cada layout não mudam o resto dos dados
+    rng = random.Random(semente)
+    
+    gravar_usuarios(arquivo_usuarios + ".tmp", formato, random.Random(f"{semente}:usuarios"), usuarios, data_inicial)
+    titulares = titulares_das_contas(rng, usuarios, contas)
+    tabelas = montar_tabelas(rng, contas)
+    tabelas["horas"] = acumular(PESOS_HORAS)
+    
+    # Dias seguidos divididos em grupos; cada grupo vira um arquivo parcial
+    por_dia = transacoes_por_dia(transacoes, data_inicial, dias)
+    numero_grupos = min(dias, max(1, processos * 4)) if processos > 1 else 1
+    limites = [round(dias * i / numero_grupos) for i in range(numero_grupos + 1)]
+    inicio = datetime_para_timestamp(data_inicial)
+    
+    # Estado de cada conta (índice = número da conta), atualizado em ordem cronológica pelas regras
+    rng_contas = random.Random(f"{semente}:contas")
+    limites_contas = array("q", [0] + [round(limite * 100) for limite in rng_contas.choices(LIMITES, weights=PESOS_LIMITES, k=contas)])
+    estado = (array("q", bytes(8 * (contas + 1))), limites_contas, array("q", [-1]) * (contas + 1), array("q", bytes(8 * (contas + 1))))
+    agregados = Agregados()
+    gerados = 0
+    with tempfile.TemporaryDirectory(dir=diretorio) as temporario:
+        partes = [os.path.join(temporario, f"parte_{i:04d}") for i in range(numero_grupos)]
+        grupos = [(semente, inicio, limites[i], por_dia[limites[i]:limites[i + 1]]) for i in range(numero_grupos)]
+        
+        # Sorteio e gravação em paralelo; as regras dependem dos saldos, então são aplicadas
+        # aqui, grupo a grupo e em ordem, com poucos grupos sorteados à frente
+        if processos > 1:
+            executor = ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_gerador, initargs=(tabelas,))
+        else:
+            _iniciar_gerador(tabelas)
+            executor = None
+        try:
+            sorteios = deque()
+            gravacoes = []
+            for i in range(numero_grupos):
+                while executor is not None and len(sorteios) < 2 * processos and i + len(sorteios) < numero_grupos:
+                    sorteios.append(executor.submit(sortear_grupo, *grupos[i + len(sorteios)]))
+                candidatos = sorteios.popleft().result() if executor is not None else sortear_grupo(*grupos[i])
+                aplicar_regras(candidatos, estado, agregados.volumes_diarios)
+                argumentos = (partes[i], semente, limites[i], grupos[i][3], candidatos, formato)
+                gravacoes.append(executor.submit(gravar_grupo, *argumentos) if executor is not None else gravar_grupo(*argumentos))
+            quantidades = [gravacao.result() if executor is not None else gravacao for gravacao in gravacoes]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        # Juntar as partes em ordem, no arquivo final
+        separador = ",\n" if formato == "json" else "\n"
+        with open(arquivo_transacoes + ".tmp", "w") as saida:
+            if formato == "json":
+                saida.write("[\n" if transacoes else "[")
+            for parte, quantidade in zip(partes, quantidades):
+                if quantidade:
+                    if gerados:
+                        saida.write(separador)
+                    with open(parte, "r") as arquivo:
+                        shutil.copyfileobj(arquivo, saida)
+                gerados += quantidade
+            saida.write(("\n]" if transacoes else "]") if formato == "json" else ("\n" if transacoes else ""))
+    
+    gravar_contas(arquivo_contas + ".tmp", formato, titulares, estado)
+    for numero in range(1, contas + 1):
+        agregados.registrar_conta(AGENCIA, estado[0][numero] / 100)
+    
+    for nome in (arquivo_usuarios, arquivo_contas, arquivo_transacoes):
+        os.replace(nome + ".tmp", nome)
+    agregados.salvar(os.path.join(diretorio, ARQUIVO_AGREGADOS))
+    if formato == "txt":
+        # Um journal antigo seria reaplicado sobre os dados novos
+        open(os.path.join(diretorio, ARQUIVO_JOURNAL), "w").close()
+    return gerados
+
+def gerar_sqlite(usuarios, contas, transacoes, semente, data_inicial, dias, processos, diretorio):
+    """Gera o layout texto em um diretório temporário e o importa para um banco SQLite novo"""
+    caminho = os.path.join(diretorio, ARQUIVO_SQLITE)
+    with tempfile.TemporaryDirectory(dir=diretorio) as temporario:
+        gerados = gerar_dados_sinteticos(usuarios, contas, transacoes, semente, "txt", data_inicial, dias, processos, temporario)
+        for arquivo in (caminho,) + tuple(caminho + sufixo for sufixo in SUFIXOS_WAL):
+            if os.path.exists(arquivo):
+                os.remove(arquivo)
+        armazenamento = ArmazenamentoSQLite(caminho)
+        try:
+            armazenamento.importar_texto(temporario)
+        finally:
+            armazenamento.fechar()
+    return gerados
+
+def main():
+    """Função principal do script"""
+    parser = argparse.ArgumentParser(description="Gera dados de teste para o sistema bancário")
+    parser.add_argument("--usuarios", type=int, help=f"quantidade de usuários (padrão: {USUARIOS_PADRAO})")
+    parser.add_argument("--contas", type=int, help=f"quantidade de contas (padrão: {CONTAS_POR_USUARIO} por usuário)")
+    parser.add_argument("--transacoes", type=int, help=f"quantidade de transações (padrão: {TRANSACOES_PADRAO})")
+    parser.add_argument("--semente", type=int, default=0, help="semente do gerador aleatório")
+    parser.add_argument("--formato", choices=FORMATOS, default="json", help="json (scripts), txt ou sqlite (sistema)")
+    parser.add_argument("--inicio", default=DATA_INICIAL_PADRAO, help="data da primeira transação DD/MM/AAAA")
+    parser.add_argument("--dias", type=int, default=DIAS_PADRAO, help="dias cobertos pelas transações")
+    parser.add_argument("--processos", type=int, default=1, help="processos geradores (0: um por CPU)")
+    parser.add_argument("--diretorio", default=".", help="diretório de saída")
+    argumentos = parser.parse_args()
+    
+    if argumentos.usuarios is None and argumentos.contas is None and argumentos.transacoes is None:
+        gerar_dados_teste()
+        return
+    
+    usuarios = argumentos.usuarios if argumentos.usuarios is not None else USUARIOS_PADRAO
+    contas = argumentos.contas if argumentos.contas is not None else round(usuarios * CONTAS_POR_USUARIO)
+    transacoes = argumentos.transacoes if argumentos.transacoes is not None else TRANSACOES_PADRAO
+    processos = argumentos.processos or os.cpu_count()
+    try:
+        data_inicial = datetime.datetime.strptime(argumentos.inicio, "%d/%m/%Y")
+    except ValueError:
+        parser.error("Formato de data inválido (use DD/MM/AAAA).")
+    if argumentos.dias < 1 or min(usuarios, contas, transacoes) < 0:
+        parser.error("Quantidades devem ser positivas.")
+    
+    comeco = time.perf_counter()
+    try:
+        gerados = gerar_dados_sinteticos(
+            usuarios, contas, transacoes, argumentos.semente, argumentos.formato, data_inicial,
+            argumentos.dias, processos, argumentos.diretorio
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    duracao = time.perf_counter() - comeco
+    
+    print("Dados sintéticos gerados com sucesso!")
+    print(f"Formato: {argumentos.formato} | Diretório: {argumentos.diretorio} | Semente: {argumentos.semente}")
+    print(f"Usuários: {usuarios} | Contas: {contas} | Transações: {gerados}")
+    print(f"Tempo: {duracao:.1f} s ({gerados / duracao:.0f} transações/s com {processos} processo(s))")
+    if usuarios:
+        print(f"Credenciais: CPF {CPF_BASE} | Senha: Senha0 (CPF {CPF_BASE}+i, senha Senha<i>)")
+
 if __name__ == "__main__":
-    gerar_dados_teste()
+    main()
@@ -5,60 +5,223 @@ import os
 import json
 import datetime
 import sys
+from contextlib import closing
 
 # Adicionar o diretório pai ao path para importar o módulo principal
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from indices import construir_indice_titulares, contas_do_titular
+from transacoes_colunar import datetime_para_timestamp
+from agregacao import AGRUPAMENTOS, agregar, totais_por_tipo
+from agregados import Agregados, ARQUIVO_AGREGADOS
+from banco import carregar_agregados, ARQUIVO_JOURNAL
+from armazenamento import (
+    ARQUIVO_SQLITE, ARQUIVOS_SQLITE, conectar, versao_sqlite, consultar_usuarios, consultar_contas, consultar_transacoes,
+    consultar_agregados
+)
+from cache_relatorios import CacheRelatorios, arquivos_inalterados, impressao_digital, registrar_versao
+from leitor_registros import caminho_ndjson, iterar_registros
+from particoes import (
+    CRITERIOS, ARQUIVO_MANIFESTO, timestamp_transacao, chave_agrupamento, particionar, carregar_manifesto,
+    agregar_particoes, resumo_contas_particoes, resumir_contas, no_periodo
+)
+
 # Constantes
 ARQUIVO_USUARIOS = "usuarios.json"
 ARQUIVO_CONTAS = "contas.json"
 ARQUIVO_TRANSACOES = "transacoes.json"
+NOMES_TIPOS = {"deposito": "Depósitos", "saque": "Saques", "transferencia": "Transferências"}
+DIAS_VOLUME = 7  # Dias exibidos no volume diário do relatório de saldo total
+DIRETORIO_CACHE = ".cache_relatorios"  # None para manter o cache só em memória
+DIRETORIO_PARTICOES = "transacoes_particionadas"
+
+# Arquivos de que cada relatório depende (invalidam o cache ao mudar)
+ARQUIVOS_SALDO_TOTAL = (ARQUIVO_AGREGADOS, ARQUIVO_JOURNAL, ARQUIVO_CONTAS) + ARQUIVOS_SQLITE
+ARQUIVOS_TRANSACOES = (ARQUIVO_TRANSACOES, caminho_ndjson(ARQUIVO_TRANSACOES))
+ARQUIVOS_PARTICOES = ARQUIVOS_TRANSACOES + (os.path.join(DIRETORIO_PARTICOES, ARQUIVO_MANIFESTO),) + ARQUIVOS_SQLITE
+ARQUIVOS_CONTAS_POR_USUARIO = (ARQUIVO_USUARIOS, ARQUIVO_CONTAS) + ARQUIVOS_SQLITE
+
+cache = CacheRelatorios(diretorio=DIRETORIO_CACHE)
+registrar_versao(ARQUIVO_SQLITE, versao_sqlite)  # O banco é comparado pela versão gravada, sem hash
+
+def carregar_json(caminho, padrao):
+    """Carrega um arquivo JSON inteiro (padrao se o arquivo não existir)"""
+    if not os.path.exists(caminho):
+        return padrao
+    with open(caminho, "r") as arquivo:
+        return json.load(arquivo)
+
+def usa_sqlite():
+    """Indica se os dados estão no banco SQLite do sistema (que tem preferência sobre os JSON)"""
+    return os.path.exists(ARQUIVO_SQLITE)
+
+def abrir_sqlite():
+    """Conexão só de leitura: no modo WAL, lê enquanto o sistema grava"""
+    return closing(conectar(ARQUIVO_SQLITE, somente_leitura=True))
+
+def carregar_usuarios():
+    """Carrega os usuários a partir do banco SQLite ou do arquivo JSON"""
+    if usa_sqlite():
+        with abrir_sqlite() as conexao:
+            return consultar_usuarios(conexao)
+    return carregar_json(ARQUIVO_USUARIOS, {})
+
+def carregar_contas():
+    """Carrega as contas a partir do banco SQLite ou do arquivo JSON"""
+    if usa_sqlite():
+        with abrir_sqlite() as conexao:
+            return consultar_contas(conexao)
+    return carregar_json(ARQUIVO_CONTAS, {})
+
+def existem_transacoes():
+    """Indica se há transações (banco SQLite, JSON ou NDJSON)"""
+    return usa_sqlite() or os.path.exists(ARQUIVO_TRANSACOES) or os.path.exists(caminho_ndjson(ARQUIVO_TRANSACOES))
+
+def iterar_transacoes(inicio=None, fim=None):
+    """Percorre as transações do período uma a uma, sem carregar tudo
+    
+    No SQLite, o período é filtrado pelo índice de timestamp; nos arquivos
+    JSON, durante a leitura.
+    """
+    if usa_sqlite():
+        return _iterar_transacoes_sqlite(inicio, fim)
+    return no_periodo(iterar_registros(ARQUIVO_TRANSACOES), inicio, fim)
+
+def _iterar_transacoes_sqlite(inicio, fim):
+    with abrir_sqlite() as conexao:
+        yield from consultar_transacoes(conexao, inicio, fim)
 
 def carregar_dados():
     """Carrega os dados do sistema a partir dos arquivos JSON"""
-    usuarios = {}
-    contas = {}
-    transacoes = []
+    return carregar_usuarios(), carregar_contas(), list(iterar_transacoes())
+
+def particoes_atualizadas():
+    """Indica se há partições do histórico geradas a partir dos arquivos de transações atuais"""
+    if usa_sqlite():
+        return False  # O índice de timestamp já localiza o período
+    manifesto = carregar_manifesto(DIRETORIO_PARTICOES)
+    return manifesto is not None and arquivos_inalterados(manifesto["origem"])
+
+def calcular_saldo_total(contas=None):
+    """Saldo total, por agência e volume diário recente (None se não houver contas)"""
+    # Usar os totais mantidos pelo sistema (no SQLite, as tabelas de agregados); sem eles, somar conta por conta
+    if usa_sqlite():
+        with abrir_sqlite() as conexao:
+            agregados = consultar_agregados(conexao, DIAS_VOLUME)
+    else:
+        agregados = carregar_agregados()
+    if agregados is None:
+        if contas is None:
+            contas = carregar_contas()
+        agregados = Agregados()
+        for conta in contas.values():
+            agregados.registrar_conta(conta.get("agencia", "0001"), float(conta["saldo"]))
     
-    # Carregar usuários
-    if os.path.exists(ARQUIVO_USUARIOS):
-        with open(ARQUIVO_USUARIOS, "r") as arquivo:
-            usuarios = json.load(arquivo)
+    if not agregados.quantidade_contas:
+        return None
     
-    # Carregar contas
-    if os.path.exists(ARQUIVO_CONTAS):
-        with open(ARQUIVO_CONTAS, "r") as arquivo:
-            contas = json.load(arquivo)
+    dias = sorted(agregados.volumes_diarios)[-DIAS_VOLUME:]
+    return {
+        "quantidade_contas": agregados.quantidade_contas,
+        "saldo_total": agregados.saldo_total,
+        "saldo_medio": agregados.saldo_medio,
+        "agencias": agregados.agencias,
+        "volumes_diarios": {dia: agregados.volumes_diarios[dia] for dia in dias}
+    }
+
+def calcular_transacoes_periodo(inicio, fim, agrupar_por=None, transacoes=None):
+    """Estatísticas por tipo (e por grupo) das transações entre os timestamps inicio e fim
     
-    # Carregar transações
-    if os.path.exists(ARQUIVO_TRANSACOES):
-        with open(ARQUIVO_TRANSACOES, "r") as arquivo:
-            transacoes = json.load(arquivo)
+    Com transacoes (já carregadas em memória), os arquivos não são lidos.
+    """
+    particoes = None
+    if transacoes is not None:
+        agregacao = agregar(no_periodo(transacoes, inicio, fim), chave_agrupamento(agrupar_por))
+    elif particoes_atualizadas():
+        # Só as partições que cruzam o período, agregadas em paralelo
+        agregacao, lidas, total = agregar_particoes(DIRETORIO_PARTICOES, inicio, fim, agrupar_por)
+        particoes = {"lidas": lidas, "total": total}
+    else:
+        # Filtrar e agregar em uma única passada, sem guardar as transações
+        agregacao = agregar(iterar_transacoes(inicio, fim), chave_agrupamento(agrupar_por))
+    totais = totais_por_tipo(agregacao)
     
-    return usuarios, contas, transacoes
+    resultado = {
+        "quantidade": sum(e.quantidade for e in totais.values()),
+        "totais": {tipo: e.para_dict() for tipo, e in totais.items()}
+    }
+    if agrupar_por:
+        resultado["grupos"] = {
+            str(grupo): {tipo: e.para_dict() for tipo, e in por_tipo.items()}
+            for grupo, por_tipo in agregacao.items()
+        }
+    if particoes is not None:
+        resultado["particoes"] = particoes
+    return resultado
+
+def calcular_resumo_contas(inicio=None, fim=None, transacoes=None):
+    """Entradas, saídas e quantidade de transações por conta no período"""
+    if transacoes is not None:
+        return {"contas": resumir_contas(no_periodo(transacoes, inicio, fim))}
+    if particoes_atualizadas():
+        resumo, lidas, total = resumo_contas_particoes(DIRETORIO_PARTICOES, inicio, fim)
+        return {"contas": resumo, "particoes": {"lidas": lidas, "total": total}}
+    return {"contas": resumir_contas(iterar_transacoes(inicio, fim))}
+
+def calcular_contas_por_usuario(usuarios=None, contas=None):
+    """Contas de cada usuário, na ordem do índice de titulares"""
+    if usuarios is None:
+        usuarios = carregar_usuarios()
+    if contas is None:
+        contas = carregar_contas()
+    
+    # Índice de contas por CPF do usuário
+    titulares = construir_indice_titulares(contas, "cpf_usuario")
+    
+    resultado = []
+    for cpf in titulares:
+        if cpf in usuarios:
+            resultado.append({
+                "cpf": cpf,
+                "nome": usuarios[cpf]["nome"],
+                "contas": [
+                    {"numero": contas[num_conta]["numero"], "agencia": contas[num_conta]["agencia"], "saldo": contas[num_conta]["saldo"]}
+                    for num_conta in contas_do_titular(titulares, cpf)
+                ]
+            })
+    return resultado
 
 def relatorio_saldo_total():
     """Gera um relatório com o saldo total de todas as contas"""
-    _, contas, _ = carregar_dados()
+    dados = cache.calcular("saldo_total", {}, ARQUIVOS_SALDO_TOTAL, calcular_saldo_total)
     
-    if not contas:
+    if dados is None:
         print("Nenhuma conta encontrada.")
         return
     
-    saldo_total = sum(float(conta["saldo"]) for conta in contas.values())
-    qtd_contas = len(contas)
-    
     print("===== RELATÓRIO DE SALDO TOTAL =====")
     print(f"Data: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-    print(f"Quantidade de contas: {qtd_contas}")
-    print(f"Saldo total: R$ {saldo_total:.2f}")
-    print(f"Saldo médio por conta: R$ {(saldo_total / qtd_contas if qtd_contas > 0 else 0):.2f}")
+    print(f"Quantidade de contas: {dados['quantidade_contas']}")
+    print(f"Saldo total: R$ {dados['saldo_total']:.2f}")
+    print(f"Saldo médio por conta: R$ {dados['saldo_medio']:.2f}")
+    
+    if len(dados["agencias"]) > 1:
+        print("\nPor agência:")
+        for agencia, totais in sorted(dados["agencias"].items()):
+            print(f"- Agência {agencia}: {totais['contas']} contas | Saldo: R$ {totais['saldo']:.2f}")
+    
+    if dados["volumes_diarios"]:
+        print(f"\nVolume diário (últimos {DIAS_VOLUME} dias com movimento):")
+        for dia, volumes in sorted(dados["volumes_diarios"].items()):
+            resumo = " | ".join(
+                f"{NOMES_TIPOS.get(tipo, tipo)}: {v['quantidade']} (R$ {v['total']:.2f})"
+                for tipo, v in volumes.items()
+            )
+            print(f"  {dia}: {resumo}")
 
 def relatorio_transacoes_periodo():
     """Gera um relatório de transações por período"""
-    _, _, transacoes = carregar_dados()
-    
-    if not transacoes:
+    if not existem_transacoes():
         print("Nenhuma transação encontrada.")
         return
     
@@ -76,66 +239,129 @@ def relatorio_transacoes_periodo():
         print("Formato de data inválido.")
         return
     
-    # Filtrar transações no período
-    transacoes_periodo = []
-    for t in transacoes:
-        data_transacao = datetime.datetime.fromisoformat(t["data_hora"])
-        if data_inicio <= data_transacao <= data_fim:
-            transacoes_periodo.append(t)
-    
-    if not transacoes_periodo:
-        print(f"Nenhuma transação encontrada no período de {data_inicio_str} a {data_fim_str}.")
+    agrupar_por = input(f"Agrupar por ({'/'.join(AGRUPAMENTOS)}, Enter para nenhum): ").strip().lower()
+    if agrupar_por and agrupar_por not in AGRUPAMENTOS:
+        print("Agrupamento inválido.")
         return
     
-    # Calcular estatísticas
-    qtd_depositos = sum(1 for t in transacoes_periodo if t["tipo"] == "deposito")
-    qtd_saques = sum(1 for t in transacoes_periodo if t["tipo"] == "saque")
-    qtd_transferencias = sum(1 for t in transacoes_periodo if t["tipo"] == "transferencia")
+    inicio = datetime_para_timestamp(data_inicio)
+    fim = datetime_para_timestamp(data_fim)
+    dados = cache.calcular(
+        "transacoes_periodo", {"inicio": inicio, "fim": fim, "agrupar_por": agrupar_por or None},
+        ARQUIVOS_PARTICOES, lambda: calcular_transacoes_periodo(inicio, fim, agrupar_por)
+    )
+    totais = dados["totais"]
     
-    valor_depositos = sum(t["valor"] for t in transacoes_periodo if t["tipo"] == "deposito")
-    valor_saques = sum(t["valor"] for t in transacoes_periodo if t["tipo"] == "saque")
-    valor_transferencias = sum(t["valor"] for t in transacoes_periodo if t["tipo"] == "transferencia")
+    if not dados["quantidade"]:
+        print(f"Nenhuma transação encontrada no período de {data_inicio_str} a {data_fim_str}.")
+        return
     
     # Exibir relatório
     print(f"\nPeríodo: {data_inicio_str} a {data_fim_str}")
-    print(f"Total de transações: {len(transacoes_periodo)}")
+    print(f"Total de transações: {dados['quantidade']}")
+    if "particoes" in dados:
+        print(f"Partições lidas: {dados['particoes']['lidas']} de {dados['particoes']['total']}")
     print("\nQuantidade por tipo:")
-    print(f"- Depósitos: {qtd_depositos}")
-    print(f"- Saques: {qtd_saques}")
-    print(f"- Transferências: {qtd_transferencias}")
+    for tipo, nome in NOMES_TIPOS.items():
+        print(f"- {nome}: {totais[tipo]['quantidade'] if tipo in totais else 0}")
     print("\nValor total por tipo:")
-    print(f"- Depósitos: R$ {valor_depositos:.2f}")
-    print(f"- Saques: R$ {valor_saques:.2f}")
-    print(f"- Transferências: R$ {valor_transferencias:.2f}")
+    for tipo, nome in NOMES_TIPOS.items():
+        print(f"- {nome}: R$ {totais[tipo]['total'] if tipo in totais else 0.0:.2f}")
+    print("\nMínimo / máximo / média por tipo:")
+    for tipo, nome in NOMES_TIPOS.items():
+        if tipo in totais:
+            e = totais[tipo]
+            print(f"- {nome}: R$ {e['minimo']:.2f} / R$ {e['maximo']:.2f} / R$ {e['media']:.2f}")
+    
+    if agrupar_por:
+        print(f"\nPor {agrupar_por}:")
+        for grupo, por_tipo in sorted(dados["grupos"].items()):
+            resumo = " | ".join(
+                f"{NOMES_TIPOS.get(tipo, tipo)}: {e['quantidade']} (R$ {e['total']:.2f})"
+                for tipo, e in por_tipo.items()
+            )
+            print(f"  {grupo}: {resumo}")
 
 def relatorio_contas_por_usuario():
     """Gera um relatório de contas por usuário"""
-    usuarios, contas, _ = carregar_dados()
+    dados = cache.calcular("contas_por_usuario", {}, ARQUIVOS_CONTAS_POR_USUARIO, calcular_contas_por_usuario)
     
-    if not usuarios or not contas:
+    if not dados:
         print("Nenhum usuário ou conta encontrada.")
         return
     
     print("===== RELATÓRIO DE CONTAS POR USUÁRIO =====")
     print(f"Data: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
     
-    # Mapear contas por CPF do usuário
-    contas_por_usuario = {}
-    for num_conta, conta in contas.items():
-        cpf = conta["cpf_usuario"]
-        if cpf not in contas_por_usuario:
-            contas_por_usuario[cpf] = []
-        contas_por_usuario[cpf].append(conta)
-    
     # Exibir relatório
-    for cpf, contas_usuario in contas_por_usuario.items():
-        if cpf in usuarios:
-            usuario = usuarios[cpf]
-            print(f"\nUsuário: {usuario['nome']} (CPF: {cpf})")
-            print(f"Quantidade de contas: {len(contas_usuario)}")
-            
-            for conta in contas_usuario:
-                print(f"  - Conta: {conta['numero']} | Agência: {conta['agencia']} | Saldo: R$ {conta['saldo']:.2f}")
+    for usuario in dados:
+        print(f"\nUsuário: {usuario['nome']} (CPF: {usuario['cpf']})")
+        print(f"Quantidade de contas: {len(usuario['contas'])}")
+        
+        for conta in usuario["contas"]:
+            print(f"  - Conta: {conta['numero']} | Agência: {conta['agencia']} | Saldo: R$ {conta['saldo']:.2f}")
+
+def ler_periodo_opcional():
+    """Solicita um período (Enter para todo o histórico); retorna (inicio, fim) ou None se inválido"""
+    data_inicio_str = input("Data inicial (DD/MM/AAAA, Enter para todo o histórico): ").strip()
+    data_fim_str = input("Data final (DD/MM/AAAA, Enter para todo o histórico): ").strip()
+    try:
+        inicio = datetime_para_timestamp(datetime.datetime.strptime(data_inicio_str, "%d/%m/%Y")) if data_inicio_str else None
+        fim = None
+        if data_fim_str:
+            data_fim = datetime.datetime.strptime(data_fim_str, "%d/%m/%Y").replace(hour=23, minute=59, second=59)
+            fim = datetime_para_timestamp(data_fim)
+    except ValueError:
+        return None
+    return inicio, fim
+
+def relatorio_resumo_contas():
+    """Gera um relatório de entradas e saídas por conta"""
+    if not existem_transacoes():
+        print("Nenhuma transação encontrada.")
+        return
+    
+    print("===== RELATÓRIO DE RESUMO POR CONTA =====")
+    periodo = ler_periodo_opcional()
+    if periodo is None:
+        print("Formato de data inválido.")
+        return
+    
+    inicio, fim = periodo
+    dados = cache.calcular(
+        "resumo_contas", {"inicio": inicio, "fim": fim}, ARQUIVOS_PARTICOES, lambda: calcular_resumo_contas(inicio, fim)
+    )
+    
+    if not dados["contas"]:
+        print("Nenhuma transação encontrada no período.")
+        return
+    
+    if "particoes" in dados:
+        print(f"Partições lidas: {dados['particoes']['lidas']} de {dados['particoes']['total']}")
+    for conta, resumo in sorted(dados["contas"].items(), key=lambda item: (len(item[0]), item[0])):
+        print(
+            f"- Conta: {conta} | Transações: {resumo['quantidade']} | Entradas: R$ {resumo['entradas']:.2f}"
+            f" | Saídas: R$ {resumo['saidas']:.2f} | Líquido: R$ {resumo['entradas'] - resumo['saidas']:.2f}"
+        )
+
+def particionar_transacoes():
+    """Divide o histórico de transações em partições por mês ou por conta"""
+    if not existem_transacoes():
+        print("Nenhuma transação encontrada.")
+        return
+    if usa_sqlite():
+        print(f"Os dados estão em {ARQUIVO_SQLITE}: os períodos já são consultados pelo índice de timestamp.")
+        return
+    
+    criterio = input(f"Particionar por ({'/'.join(CRITERIOS)}): ").strip().lower()
+    if criterio not in CRITERIOS:
+        print("Critério inválido.")
+        return
+    
+    origem = {caminho: impressao_digital(caminho) for caminho in ARQUIVOS_TRANSACOES}
+    manifesto = particionar(iterar_transacoes(), DIRETORIO_PARTICOES, criterio, origem=origem)
+    quantidade = sum(dados["quantidade"] for dados in manifesto["particoes"].values())
+    print(f"{quantidade} transações divididas em {len(manifesto['particoes'])} partições em {DIRETORIO_PARTICOES}/")
 
 def menu_relatorios():
     """Exibe o menu de relatórios"""
@@ -143,6 +369,8 @@ def menu_relatorios():
     print("[1] Saldo total de todas as contas")
     print("[2] Transações por período")
     print("[3] Contas por usuário")
+    print("[4] Resumo por conta")
+    print("[5] Particionar histórico de transações")
     print("[0] Voltar")
     return input("\n=> ")
 
@@ -157,6 +385,10 @@ def main():
             relatorio_transacoes_periodo()
         elif opcao == "3":
             relatorio_contas_por_usuario()
+        elif opcao == "4":
+            relatorio_resumo_contas()
+        elif opcao == "5":
+            particionar_transacoes()
         elif opcao == "0":
             break
         else:
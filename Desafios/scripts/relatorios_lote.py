@@ -0,0 +1,190 @@
+"""
+Execução de relatórios em lote, sem interação (para jobs noturnos)
+
+Carrega uma única vez os arquivos de que os relatórios pedidos precisam,
+calcula todos sobre os mesmos dados em memória e grava o resultado em JSON
+ou CSV, com o tempo de cada fase. Os tempos vão no fim da saída (a chave
+"tempos" do JSON, as linhas "tempos" do CSV), depois dos relatórios, para
+incluir o tempo de gravação deles. Com o banco SQLite do sistema, as transações
+não são carregadas: cada relatório consulta o seu período pelo índice.
+
+Uso: python relatorios_lote.py [relatorios...] [--inicio DD/MM/AAAA] [--fim DD/MM/AAAA]
+                               [--agrupar dia|semana|mes|conta] [--formato json|csv] [--saida arquivo]
+Relatórios: saldo_total, transacoes_periodo, resumo_contas, contas_por_usuario
+(sem relatórios, todos são executados). Sem --saida, o resultado vai para a
+saída padrão; os tempos também são mostrados na saída de erros.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import datetime
+import argparse
+
+from relatorio_contas import (
+    carregar_usuarios, carregar_contas, iterar_transacoes, usa_sqlite, calcular_saldo_total, calcular_transacoes_periodo,
+    calcular_resumo_contas, calcular_contas_por_usuario
+)
+from agregacao import AGRUPAMENTOS
+from agregados import ARQUIVO_AGREGADOS
+from transacoes_colunar import datetime_para_timestamp
+
+# Constantes
+RELATORIOS = ("saldo_total", "transacoes_periodo", "resumo_contas", "contas_por_usuario")
+FORMATOS = ("json", "csv")
+CAMPOS_CSV = ("relatorio", "grupo", "item", "metrica", "valor")
+
+# Arquivos que cada relatório lê (carregados uma única vez para todos)
+DADOS_NECESSARIOS = {
+    "saldo_total": ("contas",),
+    "transacoes_periodo": ("transacoes",),
+    "resumo_contas": ("transacoes",),
+    "contas_por_usuario": ("usuarios", "contas")
+}
+
+def ler_data(texto, fim_do_dia=False):
+    """Converte DD/MM/AAAA em timestamp (None se texto vazio)"""
+    if not texto:
+        return None
+    data = datetime.datetime.strptime(texto, "%d/%m/%Y")
+    if fim_do_dia:
+        data = data.replace(hour=23, minute=59, second=59)
+    return datetime_para_timestamp(data)
+
+def carregar_dados_necessarios(relatorios):
+    """Carrega, uma vez cada, os arquivos usados pelos relatórios pedidos"""
+    necessarios = {dado for relatorio in relatorios for dado in DADOS_NECESSARIOS[relatorio]}
+    if relatorios == ["saldo_total"] and (os.path.exists(ARQUIVO_AGREGADOS) or usa_sqlite()):
+        necessarios.clear()  # Os totais mantidos pelo sistema dispensam as contas
+    if usa_sqlite():
+        necessarios.discard("transacoes")  # Cada relatório consulta só o seu período, pelo índice
+    dados = {}
+    if "usuarios" in necessarios:
+        dados["usuarios"] = carregar_usuarios()
+    if "contas" in necessarios:
+        dados["contas"] = carregar_contas()
+    if "transacoes" in necessarios:
+        dados["transacoes"] = list(iterar_transacoes())
+    return dados
+
+def calcular_relatorio(relatorio, dados, inicio, fim, agrupar_por):
+    """Calcula um relatório sobre os dados já carregados"""
+    if relatorio == "saldo_total":
+        return calcular_saldo_total(dados.get("contas"))
+    if relatorio == "transacoes_periodo":
+        return calcular_transacoes_periodo(inicio, fim, agrupar_por, dados.get("transacoes"))
+    if relatorio == "resumo_contas":
+        return calcular_resumo_contas(inicio, fim, dados.get("transacoes"))
+    return calcular_contas_por_usuario(dados["usuarios"], dados["contas"])
+
+def linhas_csv(relatorio, resultado):
+    """Converte o resultado de um relatório em linhas (grupo, item, métrica, valor)"""
+    if resultado is None:
+        return
+    if relatorio == "saldo_total":
+        for metrica in ("quantidade_contas", "saldo_total", "saldo_medio"):
+            yield relatorio, "", "", metrica, resultado[metrica]
+        for agencia, totais in sorted(resultado["agencias"].items()):
+            for metrica, valor in totais.items():
+                yield relatorio, "agencia", agencia, metrica, valor
+        for dia, volumes in sorted(resultado["volumes_diarios"].items()):
+            for tipo, volume in volumes.items():
+                for metrica, valor in volume.items():
+                    yield relatorio, dia, tipo, metrica, valor
+    elif relatorio == "transacoes_periodo":
+        yield relatorio, "", "", "quantidade", resultado["quantidade"]
+        grupos = [("", resultado["totais"])] + sorted(resultado.get("grupos", {}).items())
+        for grupo, por_tipo in grupos:
+            for tipo, estatisticas in por_tipo.items():
+                for metrica, valor in estatisticas.items():
+                    yield relatorio, grupo, tipo, metrica, valor
+    elif relatorio == "resumo_contas":
+        for conta, resumo in sorted(resultado["contas"].items(), key=lambda item: (len(item[0]), item[0])):
+            for metrica, valor in resumo.items():
+                yield relatorio, "", conta, metrica, valor
+    else:
+        for usuario in resultado:
+            for conta in usuario["contas"]:
+                yield relatorio, usuario["cpf"], conta["numero"], "saldo", conta["saldo"]
+
+def membro_json(chave, valor):
+    """Um par "chave": valor de um objeto JSON, com a indentação de json.dumps(..., indent=4)"""
+    texto = json.dumps(valor, indent=4, ensure_ascii=False)
+    # Dentro das strings as quebras de linha são escapadas: toda quebra é de formatação
+    return f"\n    {json.dumps(chave, ensure_ascii=False)}: " + texto.replace("\n", "\n    ")
+
+def gravar_saida(saida, formato, arquivo, tempos):
+    """Grava a saída no formato pedido, terminando com os tempos (a gravação inclusive)"""
+    comeco = time.perf_counter()
+    if formato == "json":
+        # O objeto é escrito membro a membro, para que "tempos" venha por último com o tempo da gravação
+        arquivo.write("{")
+        for chave, valor in saida.items():
+            arquivo.write(membro_json(chave, valor) + ",")
+        arquivo.flush()
+        tempos["gravacao"] = time.perf_counter() - comeco
+        arquivo.write(membro_json("tempos", tempos) + "\n}\n")
+        return
+    
+    escritor = csv.writer(arquivo)
+    escritor.writerow(CAMPOS_CSV)
+    for relatorio, resultado in saida["relatorios"].items():
+        escritor.writerows(linhas_csv(relatorio, resultado))
+    arquivo.flush()
+    tempos["gravacao"] = time.perf_counter() - comeco
+    escritor.writerows(("tempos", "", "", fase, segundos) for fase, segundos in tempos.items())
+
+def main():
+    """Função principal do script"""
+    parser = argparse.ArgumentParser(description="Relatórios do sistema bancário em lote")
+    parser.add_argument("relatorios", nargs="*", metavar="relatorio", help=f"um ou mais de: {', '.join(RELATORIOS)}")
+    parser.add_argument("--inicio", help="data inicial DD/MM/AAAA (padrão: todo o histórico)")
+    parser.add_argument("--fim", help="data final DD/MM/AAAA (padrão: todo o histórico)")
+    parser.add_argument("--agrupar", choices=AGRUPAMENTOS, help="agrupamento do relatório de transações")
+    parser.add_argument("--formato", choices=FORMATOS, default="json")
+    parser.add_argument("--saida", help="arquivo de saída (padrão: saída padrão)")
+    argumentos = parser.parse_args()
+    
+    relatorios = list(dict.fromkeys(argumentos.relatorios or RELATORIOS))
+    invalidos = [relatorio for relatorio in relatorios if relatorio not in RELATORIOS]
+    if invalidos:
+        parser.error(f"Relatório inválido: {', '.join(invalidos)}")
+    try:
+        inicio = ler_data(argumentos.inicio)
+        fim = ler_data(argumentos.fim, fim_do_dia=True)
+    except ValueError:
+        parser.error("Formato de data inválido (use DD/MM/AAAA).")
+    
+    tempos = {}
+    
+    # Fase 1: carregar os dados uma única vez
+    comeco = time.perf_counter()
+    dados = carregar_dados_necessarios(relatorios)
+    tempos["carregamento"] = time.perf_counter() - comeco
+    
+    # Fase 2: calcular cada relatório sobre os mesmos dados
+    resultados = {}
+    for relatorio in relatorios:
+        comeco = time.perf_counter()
+        resultados[relatorio] = calcular_relatorio(relatorio, dados, inicio, fim, argumentos.agrupar)
+        tempos[relatorio] = time.perf_counter() - comeco
+    
+    saida = {
+        "gerado_em": datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+        "periodo": {"inicio": argumentos.inicio, "fim": argumentos.fim},
+        "relatorios": resultados
+    }
+    
+    # Fase 3: gravar a saída (gravar_saida acrescenta o tempo dela em tempos)
+    if argumentos.saida:
+        with open(argumentos.saida, "w", newline="" if argumentos.formato == "csv" else None) as arquivo:
+            gravar_saida(saida, argumentos.formato, arquivo, tempos)
+    else:
+        gravar_saida(saida, argumentos.formato, sys.stdout, tempos)
+    
+    for fase, segundos in tempos.items():
+        print(f"{fase}: {segundos:.3f} s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
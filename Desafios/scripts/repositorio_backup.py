@@ -0,0 +1,278 @@
+"""
+Repositório de backups com deduplicação por conteúdo
+
+Os arquivos de dados são divididos em blocos definidos pelo conteúdo: o corte
+acontece no fim de uma linha cujo CRC32 cai abaixo de um limite proporcional
+ao tamanho da linha (respeitando tamanhos mínimo e máximo). Como o corte
+depende só do conteúdo, inserir ou acrescentar registros muda apenas os
+blocos vizinhos. Cada bloco é guardado uma única vez, comprimido, com o nome
+do seu SHA-256; cada backup (snapshot) é um manifesto pequeno com a lista de
+blocos de cada arquivo. Centenas de snapshots de um histórico que só cresce
+custam pouco mais que um. O banco SQLite do sistema (banco.db) é dividido a
+partir de uma cópia feita pela API de backup do SQLite: o arquivo em uso, no
+modo WAL, pode ter as gravações recentes só no -wal.
+
+Estrutura em DIRETORIO_REPOSITORIO:
+  blocos/ab/abcdef...     - blocos comprimidos (zlib), pelo SHA-256 do conteúdo
+  snapshots/snapshot_AAAAMMDD_HHMMSS_ffffff.json - manifestos
+
+Uso: python repositorio_backup.py backup
+     python repositorio_backup.py listar
+     python repositorio_backup.py restaurar <snapshot>
+     python repositorio_backup.py gc [snapshots_mantidos]
+"""
+import os
+import sys
+import json
+import zlib
+import hashlib
+import datetime
+
+from backup_dados import ARQUIVOS_DADOS, ARQUIVO_SQLITE, SUFIXOS_WAL, DIRETORIO_BACKUP, TAMANHO_BLOCO, copiar_sqlite
+
+# Constantes
+DIRETORIO_REPOSITORIO = os.path.join(DIRETORIO_BACKUP, "repositorio")
+TAMANHO_MINIMO = 16 * 1024
+TAMANHO_ALVO = 64 * 1024  # Tamanho médio esperado de um bloco
+TAMANHO_MAXIMO = 256 * 1024
+NIVEL_COMPRESSAO = 6
+LIMITE_CORTE = (1 << 32) / (TAMANHO_ALVO - TAMANHO_MINIMO)  # Probabilidade de corte por byte de linha
+
+def dividir_em_blocos(arquivo):
+    """Divide um arquivo binário aberto em blocos definidos pelo conteúdo"""
+    bloco = []
+    tamanho = 0
+    resto = b""
+    while True:
+        leitura = arquivo.read(TAMANHO_BLOCO)
+        partes = (resto + leitura).split(b"\n")
+        # A última parte não terminou em \n: pode continuar na próxima leitura
+        resto = partes.pop()
+        linhas = [parte + b"\n" for parte in partes]
+        if not leitura and resto:
+            linhas.append(resto)
+        
+        for linha in linhas:
+            # Linhas longas demais são cortadas no tamanho máximo
+            while tamanho + len(linha) > TAMANHO_MAXIMO:
+                corte = TAMANHO_MAXIMO - tamanho
+                bloco.append(linha[:corte])
+                yield b"".join(bloco)
+                bloco, tamanho, linha = [], 0, linha[corte:]
+            bloco.append(linha)
+            tamanho += len(linha)
+            
+            if tamanho >= TAMANHO_MINIMO and zlib.crc32(linha) < len(linha) * LIMITE_CORTE:
+                yield b"".join(bloco)
+                bloco, tamanho = [], 0
+        
+        if not leitura:
+            break
+    if bloco:
+        yield b"".join(bloco)
+
+class RepositorioBackup:
+    """Blocos deduplicados e manifestos dos snapshots"""
+
+    def __init__(self, diretorio=DIRETORIO_REPOSITORIO):
+        self.diretorio = diretorio
+        self.diretorio_blocos = os.path.join(diretorio, "blocos")
+        self.diretorio_snapshots = os.path.join(diretorio, "snapshots")
+
+    def caminho_bloco(self, hash_bloco):
+        return os.path.join(self.diretorio_blocos, hash_bloco[:2], hash_bloco)
+
+    def guardar_bloco(self, dados):
+        """Guarda um bloco (se ainda não existir) e retorna (hash, bytes gravados)"""
+        hash_bloco = hashlib.sha256(dados).hexdigest()
+        caminho = self.caminho_bloco(hash_bloco)
+        if os.path.exists(caminho):
+            return hash_bloco, 0
+        
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        comprimido = zlib.compress(dados, NIVEL_COMPRESSAO)
+        with open(caminho + ".tmp", "wb") as arquivo:
+            arquivo.write(comprimido)
+        os.replace(caminho + ".tmp", caminho)
+        return hash_bloco, len(comprimido)
+
+    def ler_bloco(self, hash_bloco):
+        """Lê e confere um bloco guardado"""
+        with open(self.caminho_bloco(hash_bloco), "rb") as arquivo:
+            dados = zlib.decompress(arquivo.read())
+        if hashlib.sha256(dados).hexdigest() != hash_bloco:
+            raise ValueError(f"Bloco corrompido: {hash_bloco}")
+        return dados
+
+    def guardar_arquivo(self, caminho, estatisticas):
+        """Guarda os blocos novos de um arquivo e retorna a entrada dele no manifesto"""
+        sha_arquivo = hashlib.sha256()
+        blocos = []
+        tamanho = 0
+        with open(caminho, "rb") as arquivo:
+            for dados in dividir_em_blocos(arquivo):
+                hash_bloco, gravados = self.guardar_bloco(dados)
+                sha_arquivo.update(dados)
+                blocos.append(hash_bloco)
+                tamanho += len(dados)
+                estatisticas["blocos"] += 1
+                if gravados:
+                    estatisticas["blocos_novos"] += 1
+                    estatisticas["bytes_gravados"] += gravados
+        estatisticas["bytes_lidos"] += tamanho
+        return {"tamanho": tamanho, "sha256": sha_arquivo.hexdigest(), "blocos": blocos}
+
+    def criar_snapshot(self, arquivos=ARQUIVOS_DADOS):
+        """Guarda os blocos novos dos arquivos e grava o manifesto do snapshot"""
+        os.makedirs(self.diretorio_snapshots, exist_ok=True)
+        manifesto = {"data": datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S"), "arquivos": {}}
+        estatisticas = {"bytes_lidos": 0, "blocos": 0, "blocos_novos": 0, "bytes_gravados": 0}
+        
+        for nome in arquivos:
+            if not os.path.exists(nome):
+                continue
+            if os.path.basename(nome) != ARQUIVO_SQLITE:
+                manifesto["arquivos"][nome] = self.guardar_arquivo(nome, estatisticas)
+                continue
+            # Cópia consistente do banco em uso, com o que ainda está no WAL
+            copia = nome + ".backup.tmp"
+            try:
+                copiar_sqlite(nome, copia)
+                manifesto["arquivos"][nome] = self.guardar_arquivo(copia, estatisticas)
+            finally:
+                if os.path.exists(copia):
+                    os.remove(copia)
+        
+        # Manifesto por último: um snapshot só existe depois que todos os blocos foram gravados
+        nome_snapshot = "snapshot_" + datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f") + ".json"
+        caminho = os.path.join(self.diretorio_snapshots, nome_snapshot)
+        with open(caminho + ".tmp", "w") as arquivo:
+            json.dump(manifesto, arquivo)
+        os.replace(caminho + ".tmp", caminho)
+        return nome_snapshot, estatisticas
+
+    def listar_snapshots(self):
+        """Nomes dos snapshots, do mais antigo para o mais recente"""
+        if not os.path.isdir(self.diretorio_snapshots):
+            return []
+        return sorted(nome for nome in os.listdir(self.diretorio_snapshots) if nome.endswith(".json"))
+
+    def ler_snapshot(self, nome_snapshot):
+        with open(os.path.join(self.diretorio_snapshots, nome_snapshot), "r") as arquivo:
+            return json.load(arquivo)
+
+    def restaurar_arquivo(self, entrada, destino):
+        """Monta um arquivo a partir dos blocos do manifesto e confere o SHA-256"""
+        sha = hashlib.sha256()
+        with open(destino, "wb") as arquivo:
+            for hash_bloco in entrada["blocos"]:
+                dados = self.ler_bloco(hash_bloco)
+                sha.update(dados)
+                arquivo.write(dados)
+        if sha.hexdigest() != entrada["sha256"]:
+            raise ValueError(f"SHA-256 não confere ao restaurar {destino}")
+
+    def restaurar_snapshot(self, nome_snapshot):
+        """Restaura os arquivos de um snapshot (montados em temporários e trocados no fim)"""
+        manifesto = self.ler_snapshot(nome_snapshot)
+        temporarios = {}
+        try:
+            for nome, entrada in manifesto["arquivos"].items():
+                temporarios[nome] = nome + ".restauracao.tmp"
+                self.restaurar_arquivo(entrada, temporarios[nome])
+        except Exception:
+            for temporario in temporarios.values():
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+            raise
+        for nome, temporario in temporarios.items():
+            os.replace(temporario, nome)
+            # Um WAL antigo seria aplicado pelo SQLite sobre o banco restaurado
+            if os.path.basename(nome) == ARQUIVO_SQLITE:
+                for sufixo in SUFIXOS_WAL:
+                    if os.path.exists(nome + sufixo):
+                        os.remove(nome + sufixo)
+        return list(temporarios)
+
+    def remover_snapshots_antigos(self, manter):
+        """Apaga os manifestos além dos `manter` mais recentes"""
+        snapshots = self.listar_snapshots()
+        removidos = snapshots[:-manter] if manter > 0 else snapshots
+        for nome in removidos:
+            os.remove(os.path.join(self.diretorio_snapshots, nome))
+        return removidos
+
+    def coletar_lixo(self):
+        """Apaga os blocos que nenhum snapshot mantido referencia; retorna (blocos, bytes) liberados
+        
+        Não deve rodar junto com um backup: os blocos de um snapshot ainda sem
+        manifesto seriam apagados.
+        """
+        referenciados = set()
+        for nome in self.listar_snapshots():
+            for entrada in self.ler_snapshot(nome)["arquivos"].values():
+                referenciados.update(entrada["blocos"])
+        
+        removidos = 0
+        liberados = 0
+        if not os.path.isdir(self.diretorio_blocos):
+            return removidos, liberados
+        for prefixo in os.listdir(self.diretorio_blocos):
+            diretorio_prefixo = os.path.join(self.diretorio_blocos, prefixo)
+            for nome in os.listdir(diretorio_prefixo):
+                # Inclui os temporários que sobram de backups interrompidos
+                if nome not in referenciados:
+                    caminho = os.path.join(diretorio_prefixo, nome)
+                    liberados += os.path.getsize(caminho)
+                    os.remove(caminho)
+                    removidos += 1
+        return removidos, liberados
+
+    def tamanho_blocos(self):
+        """Espaço ocupado pelos blocos guardados, em bytes"""
+        total = 0
+        if os.path.isdir(self.diretorio_blocos):
+            for raiz, _, nomes in os.walk(self.diretorio_blocos):
+                total += sum(os.path.getsize(os.path.join(raiz, nome)) for nome in nomes)
+        return total
+
+def main():
+    """Função principal do script"""
+    comando = sys.argv[1] if len(sys.argv) > 1 else "backup"
+    repositorio = RepositorioBackup()
+    
+    if comando == "backup":
+        nome, estatisticas = repositorio.criar_snapshot()
+        print(f"Snapshot criado: {nome}")
+        print(f"Dados lidos: {estatisticas['bytes_lidos']} bytes em {estatisticas['blocos']} blocos")
+        print(f"Blocos novos: {estatisticas['blocos_novos']} ({estatisticas['bytes_gravados']} bytes gravados)")
+        print(f"Repositório: {repositorio.tamanho_blocos()} bytes em blocos")
+    
+    elif comando == "listar":
+        for nome in repositorio.listar_snapshots():
+            manifesto = repositorio.ler_snapshot(nome)
+            tamanho = sum(entrada["tamanho"] for entrada in manifesto["arquivos"].values())
+            print(f"{nome} | {manifesto['data']} | {tamanho} bytes | {', '.join(manifesto['arquivos'])}")
+    
+    elif comando == "restaurar" and len(sys.argv) > 2:
+        try:
+            restaurados = repositorio.restaurar_snapshot(sys.argv[2])
+        except (OSError, ValueError) as e:
+            print(f"Erro ao restaurar snapshot: {e}")
+            return
+        print(f"Snapshot restaurado: {sys.argv[2]}")
+        print(f"Arquivos restaurados: {', '.join(restaurados)}")
+    
+    elif comando == "gc":
+        manter = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        if manter is not None:
+            removidos = repositorio.remover_snapshots_antigos(manter)
+            print(f"Snapshots removidos: {len(removidos)}")
+        blocos, liberados = repositorio.coletar_lixo()
+        print(f"Blocos removidos: {blocos} ({liberados} bytes liberados)")
+    
+    else:
+        print(__doc__)
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,55 @@
 """
 Script para restaurar backup dos dados do sistema bancário
+
+Backups incrementais (ver backup_dados.py) são reconstruídos aplicando, em
+ordem, o backup completo da cadeia e cada incremental até o escolhido.
+
+Nenhum arquivo de dados é tocado até que todos os arquivos restaurados
+estejam montados em temporários e conferidos (SHA-256 do manifesto ou CRC do
+ZIP nos backups antigos); só então cada um é trocado pelo original com
+os.replace. A verificação (--verificar) confere os blocos gravados em cada
+backup contra os hashes do manifesto, em fluxo, sem extrair nada.
+
+A recuperação até um instante (--ate) restaura o último backup feito até ele
+e reaplica as transações do histórico atual registradas depois do backup e
+até o instante pedido. O histórico do backup precisa ser o começo do atual
+(o arquivo de transações só cresce no fim): os bytes do trecho reaplicado são
+copiados do histórico atual e só esse trecho é decodificado, para atualizar
+os saldos. A recuperação só vale para os arquivos JSON: com o banco.db no
+diretório (que tem preferência nos relatórios), ela é recusada.
+
+Uso: python restaurar_backup.py
+     python restaurar_backup.py <backup> [--arquivo nome ...] [--verificar]
+     python restaurar_backup.py --verificar
+     python restaurar_backup.py --ate "DD/MM/AAAA [HH:MM:SS]" [--historico transacoes.json]
 """
 import os
+import sys
+import json
+import time
+import shutil
+import hashlib
 import zipfile
 import glob
+import datetime
+import argparse
+
+# Adicionar o diretório pai ao path para importar os módulos do sistema
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backup_dados import (
+    ARQUIVO_USUARIOS, ARQUIVO_CONTAS, ARQUIVO_TRANSACOES, ARQUIVO_SQLITE, NOME_MANIFESTO, ler_manifesto, ordem_backup
+)
+from armazenamento import SUFIXOS_WAL
+from leitor_registros import iterar_array_json
+from particoes import timestamp_transacao
+from transacoes_colunar import FORMATO_DATA, datetime_para_timestamp, timestamp_para_data
 
 # Constantes
 DIRETORIO_BACKUP = "backups"
+TAMANHO_BLOCO_COPIA = 1 << 20
+SUFIXO_TEMPORARIO = ".restauracao.tmp"
+TAMANHO_CAUDA = 4096  # Bytes lidos do fim de um array JSON para achar o "]"
 
 def listar_backups():
     """Lista todos os backups disponíveis"""
@@ -15,30 +58,444 @@ def listar_backups():
         return []
     
     backups = glob.glob(os.path.join(DIRETORIO_BACKUP, "backup_*.zip"))
-    backups.sort(reverse=True)  # Ordenar do mais recente para o mais antigo
+    backups.sort(key=ordem_backup, reverse=True)  # Ordenar do mais recente para o mais antigo
     
     return backups
 
-def restaurar_backup(caminho_backup):
-    """Restaura um backup específico"""
+def cadeia_backup(caminho_backup):
+    """Backups necessários para reconstruir o escolhido, do completo até ele
+    
+    Retorna uma lista de (caminho, manifesto).
+    """
+    cadeia = []
+    caminho = caminho_backup
+    while True:
+        manifesto = ler_manifesto(caminho)
+        if manifesto is None:
+            raise ValueError(f"Manifesto ausente ou inválido em {os.path.basename(caminho)}")
+        cadeia.append((caminho, manifesto))
+        if manifesto["anterior"] is None:
+            break
+        caminho = os.path.join(os.path.dirname(caminho_backup), manifesto["anterior"])
+        if not os.path.exists(caminho):
+            raise ValueError(f"Backup anterior da cadeia não encontrado: {manifesto['anterior']}")
+    cadeia.reverse()
+    return cadeia
+
+def nome_seguro(nome):
+    """Só restaura nomes simples: nada de diretórios ou caminhos absolutos no ZIP"""
+    return nome not in ("", ".", "..") and os.path.basename(nome) == nome and not os.path.isabs(nome)
+
+def arquivos_escolhidos(disponiveis, arquivos):
+    """Arquivos do backup a restaurar (todos, se nenhum for pedido)"""
+    if not arquivos:
+        return list(disponiveis)
+    ausentes = [nome for nome in arquivos if nome not in disponiveis]
+    if ausentes:
+        raise ValueError(f"Arquivo não está no backup: {', '.join(ausentes)}")
+    return list(arquivos)
+
+def verificar_membro(zip_file, nome, entrada, tamanho_bloco):
+    """Confere em fluxo os bytes de um arquivo gravados no ZIP contra os hashes do manifesto
+    
+    Retorna o número de bytes conferidos.
+    """
+    offset = entrada.get("offset", 0) if entrada["modo"] == "parcial" else 0
+    if offset % tamanho_bloco:
+        raise ValueError(f"{nome}: offset {offset} fora do limite de um bloco")
+    blocos = entrada["blocos"][offset // tamanho_bloco:]
+    esperado = entrada["tamanho"] - offset
+    
+    if nome not in zip_file.namelist():
+        # Só um arquivo que apenas encolheu não tem bytes gravados
+        if esperado:
+            raise ValueError(f"{nome}: ausente no ZIP")
+        return 0
+    
+    sha = hashlib.sha256()
+    lidos = 0
+    with zip_file.open(nome) as membro:
+        # O zipfile confere também o CRC do membro ao chegar ao fim
+        for indice, bloco in enumerate(iter(lambda: membro.read(tamanho_bloco), b"")):
+            if indice >= len(blocos) or hashlib.sha256(bloco).hexdigest() != blocos[indice]:
+                raise ValueError(f"{nome}: bloco {offset // tamanho_bloco + indice} não confere com o manifesto")
+            sha.update(bloco)
+            lidos += len(bloco)
+    if lidos != esperado:
+        raise ValueError(f"{nome}: {lidos} bytes gravados, {esperado} esperados")
+    if entrada["modo"] == "completo" and sha.hexdigest() != entrada["sha256"]:
+        raise ValueError(f"{nome}: SHA-256 não confere com o manifesto")
+    return lidos
+
+def verificar_backup(caminho_backup, arquivos=None):
+    """Confere um backup (e sua cadeia) sem extrair nada
+    
+    Retorna (bytes conferidos, lista de problemas encontrados).
+    """
+    problemas = []
+    conferidos = 0
+    try:
+        if ler_manifesto(caminho_backup) is None:
+            # Backups antigos: só há o CRC de cada membro
+            with zipfile.ZipFile(caminho_backup, "r") as zip_file:
+                nomes = arquivos_escolhidos(zip_file.namelist(), arquivos)
+                for nome in nomes:
+                    if not nome_seguro(nome):
+                        problemas.append(f"{nome}: nome inválido para restauração")
+                        continue
+                    with zip_file.open(nome) as membro:
+                        for bloco in iter(lambda: membro.read(TAMANHO_BLOCO_COPIA), b""):
+                            conferidos += len(bloco)
+            return conferidos, problemas
+        
+        cadeia = cadeia_backup(caminho_backup)
+        nomes = arquivos_escolhidos(cadeia[-1][1]["arquivos"], arquivos)
+    except (OSError, zipfile.BadZipFile, ValueError) as e:
+        return conferidos, problemas + [str(e)]
+    
+    for caminho, manifesto in cadeia:
+        try:
+            with zipfile.ZipFile(caminho, "r") as zip_file:
+                for nome in nomes:
+                    entrada = manifesto["arquivos"].get(nome, {"modo": "removido"})
+                    if entrada["modo"] not in ("completo", "parcial"):
+                        continue
+                    try:
+                        conferidos += verificar_membro(zip_file, nome, entrada, manifesto["tamanho_bloco"])
+                    except (zipfile.BadZipFile, ValueError) as e:
+                        problemas.append(f"{os.path.basename(caminho)}: {e}")
+        except (OSError, zipfile.BadZipFile) as e:
+            problemas.append(f"{os.path.basename(caminho)}: {e}")
+    return conferidos, problemas
+
+def reconstruir_arquivo(cadeia, nome, destino):
+    """Reconstrói um arquivo em destino aplicando os backups da cadeia em ordem
+    
+    Retorna False se o arquivo não existia no último backup da cadeia.
+    """
+    existe = False
+    with open(destino, "wb") as saida:
+        for caminho, manifesto in cadeia:
+            entrada = manifesto["arquivos"].get(nome, {"modo": "removido"})
+            modo = entrada["modo"]
+            if modo == "igual":
+                continue
+            if modo == "removido":
+                saida.truncate(0)
+                existe = False
+                continue
+            
+            # Completo: desde o início; parcial: a partir do offset
+            offset = entrada.get("offset", 0) if modo == "parcial" else 0
+            saida.truncate(offset)
+            saida.seek(offset)
+            existe = True
+            with zipfile.ZipFile(caminho, "r") as zip_file:
+                if nome in zip_file.namelist():
+                    with zip_file.open(nome) as membro:
+                        shutil.copyfileobj(membro, saida, TAMANHO_BLOCO_COPIA)
+    return existe
+
+def hash_arquivo(caminho):
+    """SHA-256 do conteúdo de um arquivo, lido em blocos"""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_BLOCO_COPIA), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def montar_incremental(caminho_backup, nomes, temporarios):
+    """Reconstrói e confere os arquivos de um backup com manifesto em temporários
+    
+    Retorna {nome: temporário, ou None se o arquivo não existia no backup}.
+    """
+    cadeia = cadeia_backup(caminho_backup)
+    manifesto = cadeia[-1][1]
+    nomes = arquivos_escolhidos(manifesto["arquivos"], nomes)
+    
+    montados = {}
+    for nome in nomes:
+        temporario = nome + SUFIXO_TEMPORARIO
+        temporarios.append(temporario)
+        if not reconstruir_arquivo(cadeia, nome, temporario):
+            montados[nome] = None
+            continue
+        if hash_arquivo(temporario) != manifesto["arquivos"][nome]["sha256"]:
+            raise ValueError(f"SHA-256 de {nome} não confere após a reconstrução")
+        montados[nome] = temporario
+    
+    if len(cadeia) > 1:
+        print(f"Cadeia aplicada: {' -> '.join(os.path.basename(caminho) for caminho, _ in cadeia)}")
+    return montados
+
+def montar_antigo(caminho_backup, nomes, temporarios):
+    """Extrai em temporários os arquivos de um backup antigo (sem manifesto)
+    
+    O CRC de cada membro é conferido pelo zipfile ao fim da leitura.
+    """
+    montados = {}
+    with zipfile.ZipFile(caminho_backup, "r") as zip_file:
+        nomes = arquivos_escolhidos([nome for nome in zip_file.namelist() if nome != NOME_MANIFESTO], nomes)
+        for nome in nomes:
+            if not nome_seguro(nome):
+                raise ValueError(f"Nome inválido no backup: {nome}")
+            temporario = nome + SUFIXO_TEMPORARIO
+            temporarios.append(temporario)
+            with zip_file.open(nome) as membro, open(temporario, "wb") as saida:
+                shutil.copyfileobj(membro, saida, TAMANHO_BLOCO_COPIA)
+            montados[nome] = temporario
+    return montados
+
+def montar_backup(caminho_backup, nomes, temporarios):
+    """Monta em temporários conferidos os arquivos de qualquer backup"""
+    if ler_manifesto(caminho_backup) is not None:
+        return montar_incremental(caminho_backup, nomes, temporarios)
+    return montar_antigo(caminho_backup, nomes, temporarios)
+
+def remover_temporarios(temporarios):
+    """Apaga os temporários de uma restauração interrompida"""
+    for temporario in temporarios:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+def trocar_arquivos(montados):
+    """Troca os arquivos de dados pelos temporários montados (ou os remove, se None)"""
+    for nome, temporario in montados.items():
+        if temporario is not None:
+            os.replace(temporario, nome)
+        else:
+            if os.path.exists(nome + SUFIXO_TEMPORARIO):
+                os.remove(nome + SUFIXO_TEMPORARIO)
+            if os.path.exists(nome):
+                os.remove(nome)
+        
+        # Um WAL antigo seria aplicado pelo SQLite sobre o banco restaurado
+        if os.path.basename(nome) == ARQUIVO_SQLITE:
+            for sufixo in SUFIXOS_WAL:
+                if os.path.exists(nome + sufixo):
+                    os.remove(nome + sufixo)
+
+def restaurar_backup(caminho_backup, arquivos=None, apenas_verificar=False):
+    """Restaura um backup específico (ou só alguns arquivos dele)"""
     if not os.path.exists(caminho_backup):
         print(f"Arquivo de backup não encontrado: {caminho_backup}")
         return False
     
-    try:
-        with zipfile.ZipFile(caminho_backup, 'r') as zip_file:
-            # Extrair todos os arquivos
-            zip_file.extractall()
-        
-        print(f"Backup restaurado com sucesso: {caminho_backup}")
-        print(f"Arquivos restaurados: {', '.join(zipfile.ZipFile(caminho_backup, 'r').namelist())}")
+    if apenas_verificar:
+        conferidos, problemas = verificar_backup(caminho_backup, arquivos)
+        if problemas:
+            print(f"Backup com problemas: {caminho_backup}")
+            for problema in problemas:
+                print(f"  {problema}")
+            return False
+        print(f"Backup íntegro: {caminho_backup} ({conferidos} bytes conferidos)")
         return True
+    
+    # Montar e conferir todos os arquivos antes de substituir qualquer um
+    temporarios = []
+    try:
+        montados = montar_backup(caminho_backup, arquivos, temporarios)
     except Exception as e:
+        remover_temporarios(temporarios)
         print(f"Erro ao restaurar backup: {e}")
+        print("Nenhum arquivo de dados foi alterado.")
+        return False
+    
+    trocar_arquivos(montados)
+    
+    print(f"Backup restaurado com sucesso: {caminho_backup}")
+    print(f"Arquivos restaurados: {', '.join(nome for nome, temporario in montados.items() if temporario) or 'nenhum'}")
+    removidos = [nome for nome, temporario in montados.items() if temporario is None]
+    if removidos:
+        print(f"Arquivos removidos (não existiam no backup): {', '.join(removidos)}")
+    return True
+
+def momento_backup(caminho_backup):
+    """Data e hora de um backup (do manifesto ou, nos antigos, do nome do arquivo)"""
+    manifesto = ler_manifesto(caminho_backup)
+    if manifesto is not None:
+        return datetime.datetime.strptime(manifesto["data"], FORMATO_DATA)
+    return datetime.datetime.strptime(os.path.basename(caminho_backup)[len("backup_"):][:15], "%Y%m%d_%H%M%S")
+
+def backup_anterior_a(alvo):
+    """Backup mais recente feito até o instante alvo (None se não houver)"""
+    candidatos = []
+    for caminho in listar_backups():
+        # Backups automáticos do sistema não têm o histórico em JSON
+        if (ler_manifesto(caminho) or {}).get("origem") == "sistema":
+            continue
+        try:
+            momento = momento_backup(caminho)
+        except ValueError:
+            continue
+        if momento <= alvo:
+            candidatos.append((momento, ordem_backup(caminho), caminho))
+    return max(candidatos)[2] if candidatos else None
+
+def ler_json(caminho, padrao):
+    """Conteúdo de um arquivo JSON (padrao se não houver arquivo)"""
+    if caminho is None or not os.path.exists(caminho):
+        return padrao
+    with open(caminho, "r") as arquivo:
+        return json.load(arquivo)
+
+def gravar_json(caminho, dados):
+    with open(caminho, "w") as arquivo:
+        json.dump(dados, arquivo, indent=4)
+
+def fim_do_array(caminho):
+    """Posição em bytes logo após o último elemento (ou o "[") de um array JSON"""
+    with open(caminho, "rb") as arquivo:
+        inicio_cauda = max(0, arquivo.seek(0, os.SEEK_END) - TAMANHO_CAUDA)
+        arquivo.seek(inicio_cauda)
+        cauda = arquivo.read().rstrip()
+    if not cauda.endswith(b"]"):
+        raise ValueError(f"{caminho} não termina em um array JSON")
+    return inicio_cauda + len(cauda[:-1].rstrip())
+
+def mesmo_prefixo(caminho_a, caminho_b, tamanho):
+    """Indica se os dois arquivos começam pelos mesmos `tamanho` bytes"""
+    with open(caminho_a, "rb") as arquivo_a, open(caminho_b, "rb") as arquivo_b:
+        while tamanho:
+            quantidade = min(TAMANHO_BLOCO_COPIA, tamanho)
+            bloco = arquivo_a.read(quantidade)
+            if len(bloco) < quantidade or bloco != arquivo_b.read(quantidade):
+                return False
+            tamanho -= quantidade
+    return True
+
+def copiar_trecho(origem, destino, tamanho):
+    """Grava em destino os primeiros `tamanho` bytes de um array JSON, fechando o array"""
+    with open(origem, "rb") as entrada, open(destino, "wb") as saida:
+        while tamanho:
+            bloco = entrada.read(min(TAMANHO_BLOCO_COPIA, tamanho))
+            if not bloco:
+                raise ValueError(f"{origem} terminou antes do esperado")
+            saida.write(bloco)
+            tamanho -= len(bloco)
+        saida.write(b"\n]" if saida.tell() else b"[]")
+
+def aplicar_transacao(contas, t, timestamp):
+    """Aplica aos saldos o efeito de uma transação do histórico"""
+    valor = t["valor"]
+    origem = contas[str(t["conta_origem"])]
+    if t["tipo"] == "deposito":
+        origem["saldo"] += valor
+        return
+    origem["saldo"] -= valor
+    if t["tipo"] == "transferencia":
+        contas[str(t["conta_destino"])]["saldo"] += valor
+    else:
+        # Mesmo controle de saques do dia feito pelo sistema
+        dia = timestamp_para_data(timestamp)[:10]
+        if origem.get("data_ultimo_saque") != dia:
+            origem["saques_hoje"] = 0
+            origem["data_ultimo_saque"] = dia
+        origem["saques_hoje"] = origem.get("saques_hoje", 0) + 1
+
+def recuperar_ate(alvo, historico=ARQUIVO_TRANSACOES):
+    """Restaura o último backup feito até alvo e reaplica as transações seguintes até alvo
+    
+    Contas abertas depois do backup vêm do arquivo de contas atual, com saldo
+    inicial zero. Nenhum arquivo de dados é alterado se algo falhar. Com o
+    banco SQLite presente, a recuperação é recusada: os relatórios leriam o
+    banco, não os JSON recuperados.
+    """
+    if os.path.exists(ARQUIVO_SQLITE):
+        # Os relatórios preferem o banco.db aos JSON: a recuperação dos JSON ficaria invisível
+        print(f"{ARQUIVO_SQLITE} existe e tem preferência sobre os arquivos JSON, mas a recuperação")
+        print("só reaplica o histórico JSON: o banco continuaria com o estado mais novo.")
+        print(f"Restaure um backup completo com {ARQUIVO_SQLITE} ou mova o banco antes da recuperação.")
+        return False
+    caminho_backup = backup_anterior_a(alvo)
+    if caminho_backup is None:
+        print(f"Nenhum backup feito até {alvo.strftime(FORMATO_DATA)}.")
+        return False
+    if not os.path.exists(historico):
+        print(f"Histórico de transações não encontrado: {historico}")
         return False
+    limite = datetime_para_timestamp(alvo)
+    comeco = time.perf_counter()
+    
+    # O estado atual é lido antes de montar o backup: o histórico pode ser o próprio arquivo de transações
+    contas_atuais = ler_json(ARQUIVO_CONTAS, {})
+    usuarios_atuais = ler_json(ARQUIVO_USUARIOS, {})
+    temporarios = []
+    try:
+        montados = montar_backup(caminho_backup, None, temporarios)
+        # A recuperação reaplica o histórico JSON; o banco do backup (mais antigo que o alvo) não volta
+        sqlite = montados.pop(ARQUIVO_SQLITE, None)
+        if sqlite is not None:
+            os.remove(sqlite)
+        contas = ler_json(montados.get(ARQUIVO_CONTAS), {})
+        usuarios = ler_json(montados.get(ARQUIVO_USUARIOS), {})
+        
+        # As transações do backup têm de ser o começo do histórico atual
+        base = montados.get(ARQUIVO_TRANSACOES)
+        inicio = fim_do_array(base) if base else 0
+        if base and not mesmo_prefixo(base, historico, inicio):
+            raise ValueError(f"O histórico {historico} não continua o histórico do backup")
+        
+        aplicadas = 0
+        fim = inicio
+        ultimo = None
+        contas_novas = []
+        for t, posicao in iterar_array_json(historico, inicio=inicio, com_posicoes=True):
+            timestamp = timestamp_transacao(t)
+            if timestamp > limite:
+                break  # O histórico está em ordem cronológica
+            for numero in (t["conta_origem"], t["conta_destino"]) if t["tipo"] == "transferencia" else (t["conta_origem"],):
+                chave = str(numero)
+                if chave not in contas:
+                    if chave not in contas_atuais:
+                        raise ValueError(f"Conta {chave} de uma transação do histórico não existe")
+                    contas[chave] = dict(contas_atuais[chave], saldo=0.0, saques_hoje=0, data_ultimo_saque=None)
+                    contas_novas.append(chave)
+            aplicar_transacao(contas, t, timestamp)
+            aplicadas += 1
+            fim = posicao
+            ultimo = timestamp
+        
+        for conta in contas.values():
+            conta["saldo"] = round(conta["saldo"], 2)
+        for chave in contas_novas:
+            cpf = contas[chave].get("cpf_usuario")
+            if cpf not in usuarios and cpf in usuarios_atuais:
+                usuarios[cpf] = usuarios_atuais[cpf]
+        
+        # Arquivos recuperados: histórico atual até a última transação reaplicada, contas e usuários
+        for nome in (ARQUIVO_TRANSACOES, ARQUIVO_CONTAS, ARQUIVO_USUARIOS):
+            montados[nome] = nome + SUFIXO_TEMPORARIO
+            if montados[nome] not in temporarios:
+                temporarios.append(montados[nome])
+        copiar_trecho(historico, montados[ARQUIVO_TRANSACOES], fim)
+        gravar_json(montados[ARQUIVO_CONTAS], contas)
+        gravar_json(montados[ARQUIVO_USUARIOS], usuarios)
+    except Exception as e:
+        remover_temporarios(temporarios)
+        print(f"Erro na recuperação: {e}")
+        print("Nenhum arquivo de dados foi alterado.")
+        return False
+    
+    trocar_arquivos(montados)
+    
+    print(f"Backup base: {caminho_backup} ({momento_backup(caminho_backup).strftime(FORMATO_DATA)})")
+    print(f"Transações reaplicadas: {aplicadas} em {time.perf_counter() - comeco:.2f} s")
+    if ultimo is not None:
+        print(f"Última transação reaplicada: {timestamp_para_data(ultimo)}")
+    if contas_novas:
+        print(f"Contas abertas após o backup: {', '.join(contas_novas)}")
+    return True
 
-def main():
-    """Função principal do script"""
+def ler_instante(texto):
+    """Converte "DD/MM/AAAA HH:MM:SS" (ou só a data, até o fim do dia) em datetime"""
+    try:
+        return datetime.datetime.strptime(texto, FORMATO_DATA)
+    except ValueError:
+        return datetime.datetime.strptime(texto, "%d/%m/%Y").replace(hour=23, minute=59, second=59)
+
+def menu_interativo():
+    """Escolha do backup e da operação pelo terminal"""
     print("===== RESTAURAÇÃO DE BACKUP =====")
     
     backups = listar_backups()
@@ -50,7 +507,11 @@ def main():
     print("\nBackups disponíveis:")
     for i, backup in enumerate(backups):
         nome_arquivo = os.path.basename(backup)
-        print(f"[{i+1}] {nome_arquivo}")
+        manifesto = ler_manifesto(backup)
+        tipo = manifesto["tipo"] if manifesto else "completo"
+        if manifesto and manifesto.get("origem") == "sistema":
+            tipo += ", automático"
+        print(f"[{i+1}] {nome_arquivo} ({tipo})")
     
     try:
         escolha = int(input("\nEscolha o número do backup para restaurar (0 para cancelar): "))
@@ -62,10 +523,21 @@ def main():
         if 1 <= escolha <= len(backups):
             backup_escolhido = backups[escolha-1]
             
+            arquivo = input("Arquivo a restaurar (Enter para todos): ").strip()
+            arquivos = [arquivo] if arquivo else None
+            operacao = input("[r] Restaurar  [v] Apenas verificar: ").strip().lower()
+            
+            if operacao == "v":
+                restaurar_backup(backup_escolhido, arquivos, apenas_verificar=True)
+                return
+            if operacao != "r":
+                print("Opção inválida.")
+                return
+            
             confirmacao = input(f"Tem certeza que deseja restaurar o backup {os.path.basename(backup_escolhido)}? (s/n): ")
             
             if confirmacao.lower() == 's':
-                restaurar_backup(backup_escolhido)
+                restaurar_backup(backup_escolhido, arquivos)
             else:
                 print("Operação cancelada.")
         else:
@@ -73,5 +545,35 @@ def main():
     except ValueError:
         print("Entrada inválida. Por favor, digite um número.")
 
+def main():
+    """Função principal do script"""
+    parser = argparse.ArgumentParser(description="Restauração de backups do sistema bancário")
+    parser.add_argument("backup", nargs="?", help="caminho do backup (sem ele, menu interativo)")
+    parser.add_argument("--arquivo", action="append", help="restaurar só este arquivo (pode repetir)")
+    parser.add_argument("--verificar", action="store_true", help="apenas conferir o backup, sem restaurar")
+    parser.add_argument("--ate", help="recuperar o estado em um instante: DD/MM/AAAA [HH:MM:SS]")
+    parser.add_argument("--historico", default=ARQUIVO_TRANSACOES, help="transações a reaplicar com --ate")
+    argumentos = parser.parse_args()
+    
+    if argumentos.ate:
+        if argumentos.backup or argumentos.arquivo or argumentos.verificar:
+            parser.error("--ate escolhe o backup sozinho e restaura todos os arquivos")
+        try:
+            alvo = ler_instante(argumentos.ate)
+        except ValueError:
+            parser.error("Formato de data inválido (use DD/MM/AAAA ou DD/MM/AAAA HH:MM:SS).")
+        raise SystemExit(0 if recuperar_ate(alvo, argumentos.historico) else 1)
+    
+    if argumentos.backup:
+        sucesso = restaurar_backup(argumentos.backup, argumentos.arquivo, apenas_verificar=argumentos.verificar)
+        raise SystemExit(0 if sucesso else 1)
+    
+    if argumentos.verificar:
+        # Conferir todos os backups do diretório
+        resultados = [restaurar_backup(backup, argumentos.arquivo, apenas_verificar=True) for backup in listar_backups()]
+        raise SystemExit(0 if all(resultados) else 1)
+    
+    menu_interativo()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,307 @@
+"""
+Servidor TCP (asyncio) para o sistema bancário
+
+Protocolo: uma mensagem JSON por linha, nos dois sentidos.
+Pedido:   {"op": "depositar", "valor": 100.0}
+Resposta: {"ok": true, "mensagem": "Depósito de R$ 100.00 realizado com sucesso!", ...}
+
+Operações: criar_usuario, criar_conta, autenticar, saldo, saldo_em, depositar, sacar,
+transferir, extrato, alterar_limite e sair. As operações de conta exigem
+autenticar antes; a sessão fica na conexão.
+
+As operações rodam na thread do event loop, sobre o estado em memória do Banco.
+A gravação do journal e dos snapshots roda em uma thread separada; cada
+resposta de operação que altera dados só é enviada depois que o registro foi
+gravado (os registros das sessões são agrupados em uma única escrita). Se a
+gravação falhar, quem esperava recebe um erro, mas a operação já vale em
+memória: os registros ficam guardados e são gravados de novo junto com a
+próxima escrita.
+"""
+import sys
+import json
+import asyncio
+import sqlite3
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from banco import Banco, TAMANHO_PAGINA_PADRAO
+from armazenamento import abrir_armazenamento
+from backup_automatico import AgendadorBackup
+
+# Constantes
+ERROS_GRAVACAO = (OSError, sqlite3.Error)  # Falhas do armazenamento (texto ou SQLite)
+HOST_PADRAO = "127.0.0.1"
+PORTA_PADRAO = 8765
+INTERVALO_BACKUP = 60 * 60  # Segundos entre backups automáticos
+ARMAZENAMENTO = "sqlite"  # "sqlite" (banco.db) ou "texto" (arquivos .txt + journal)
+
+def transacao_para_json(t):
+    """Converte uma transação para um dicionário serializável"""
+    dados = {"tipo": t["tipo"], "valor": t["valor"], "data": t["data"], "timestamp": t["timestamp"]}
+    if t["tipo"] == "transferencia":
+        dados["conta_origem"] = t["conta_origem"]
+        dados["conta_destino"] = t["conta_destino"]
+    else:
+        dados["conta"] = t["conta"]
+    return dados
+
+def ler_numero(pedido, campo):
+    """Lê um campo numérico do pedido (None se ausente ou inválido)"""
+    valor = pedido.get(campo)
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        return None
+    return float(valor)
+
+def ler_texto(pedido, campo, padrao=None):
+    """Lê um campo de texto opcional do pedido (ValueError se vier de outro tipo)"""
+    valor = pedido.get(campo, padrao)
+    if valor is not None and not isinstance(valor, str):
+        raise ValueError(campo)
+    return valor
+
+def ler_data(pedido, campo, fim_do_dia=False):
+    """Lê um campo de data DD/MM/AAAA do pedido (None se ausente)"""
+    valor = pedido.get(campo)
+    if valor is None:
+        return None
+    data = datetime.strptime(str(valor), "%d/%m/%Y")
+    if fim_do_dia:
+        data = data.replace(hour=23, minute=59, second=59)
+    return data
+
+def resposta(resultado, **extras):
+    """Monta a resposta a partir de um Resultado do banco"""
+    dados = {"ok": resultado.sucesso, "mensagem": resultado.mensagem}
+    dados.update(extras)
+    return dados
+
+def erro(mensagem):
+    """Monta uma resposta de erro"""
+    return {"ok": False, "mensagem": mensagem}
+
+class Sessao:
+    """Estado de uma conexão: usuário autenticado e conta em uso"""
+    __slots__ = ("cpf", "conta")
+
+    def __init__(self):
+        self.cpf = None
+        self.conta = None
+
+class ServidorBancario:
+    """Atende várias sessões ao mesmo tempo sobre um único Banco"""
+
+    def __init__(self, banco):
+        self.banco = banco
+        self.persistencia = ThreadPoolExecutor(max_workers=1)  # Escritas em disco, sempre em ordem
+        self._pendente = None
+        self._gravacao = None
+        self._nao_gravados = []  # Registros de uma gravação que falhou, tentados de novo na próxima
+        self._tarefa_persistencia = None
+    
+    # ----- Persistência fora do event loop -----
+
+    def _iniciar_persistencia(self):
+        loop = asyncio.get_running_loop()
+        self.banco.adiar_journal()
+        self._pendente = asyncio.Event()
+        self._gravacao = loop.create_future()
+        self._tarefa_persistencia = asyncio.create_task(self._persistir())
+    
+    async def _persistir(self):
+        """Grava em lote os registros acumulados, sem bloquear o event loop"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._pendente.wait()
+            self._pendente.clear()
+            
+            # Os registros retirados aqui são os de quem espera esta gravação (e os que falharam antes)
+            linhas = self._nao_gravados + self.banco.retirar_registros_pendentes()
+            self._nao_gravados = []
+            concluida, self._gravacao = self._gravacao, loop.create_future()
+            if not linhas:
+                concluida.set_result(None)
+                continue
+            
+            try:
+                if self.banco.precisa_compactar(len(linhas)):
+                    # O snapshot capturado já inclui as operações dessas linhas
+                    snapshot = self.banco.capturar_snapshot()
+                    await loop.run_in_executor(self.persistencia, self.banco.gravar_snapshot, snapshot)
+                    self.banco.registros_journal = 0
+                else:
+                    await loop.run_in_executor(self.persistencia, self.banco.escrever_journal, linhas)
+                    self.banco.registros_journal += len(linhas)
+                concluida.set_result(None)
+            except Exception as e:
+                # O estado em memória já mudou: os registros ficam para a próxima gravação
+                self._nao_gravados = linhas
+                concluida.set_exception(e)
+    
+    async def _aguardar_gravacao(self):
+        gravacao = self._gravacao
+        self._pendente.set()
+        await gravacao
+    
+    # ----- Operações -----
+    
+    async def processar(self, sessao, pedido):
+        """Executa um pedido e retorna a resposta"""
+        operacao = pedido.get("op")
+        banco = self.banco
+        
+        if operacao == "criar_usuario":
+            resultado = banco.criar_usuario(str(pedido.get("cpf", "")), str(pedido.get("nome", "")), str(pedido.get("senha", "")))
+            if resultado:
+                await self._aguardar_gravacao()
+            return resposta(resultado)
+        
+        if operacao == "criar_conta":
+            resultado = banco.criar_conta(str(pedido.get("cpf", "")))
+            if resultado:
+                await self._aguardar_gravacao()
+            return resposta(resultado, conta=resultado.dados)
+        
+        if operacao == "autenticar":
+            resultado = banco.autenticar(str(pedido.get("cpf", "")), str(pedido.get("senha", "")))
+            if not resultado:
+                return resposta(resultado)
+            
+            try:
+                conta = ler_texto(pedido, "conta") or banco.encontrar_conta_por_cpf(resultado.dados)
+            except ValueError:
+                return erro("Conta inválida!")
+            if conta is None or conta not in banco.contas or banco.contas[conta]["cpf"] != resultado.dados:
+                return erro("Você não possui uma conta. Crie uma conta primeiro.")
+            
+            sessao.cpf = resultado.dados
+            sessao.conta = conta
+            return resposta(resultado, conta=conta)
+        
+        if sessao.conta is None:
+            return erro("Faça login primeiro (op autenticar).")
+        
+        conta = banco.contas[sessao.conta]
+        
+        if operacao == "saldo":
+            return {"ok": True, "mensagem": f"Saldo: R$ {conta['saldo']:.2f}", "saldo": conta["saldo"], "limite": conta["limite"]}
+        
+        if operacao == "saldo_em":
+            # {"data": "DD/MM/AAAA"}: saldo ao fim do dia
+            try:
+                data = ler_data(pedido, "data", fim_do_dia=True)
+            except ValueError:
+                return erro("Formato de data inválido.")
+            if data is None:
+                return erro("Informe a data (DD/MM/AAAA).")
+            resultado = banco.saldo_em(sessao.conta, data)
+            return resposta(resultado, saldo=resultado.dados)
+        
+        if operacao == "extrato":
+            # Paginado: {"tamanho": 20, "cursor": ..., "ordem": "recentes", "data_inicio": "DD/MM/AAAA", "data_fim": ...}
+            try:
+                data_inicio = ler_data(pedido, "data_inicio")
+                data_fim = ler_data(pedido, "data_fim", fim_do_dia=True)
+            except ValueError:
+                return erro("Formato de data inválido.")
+            
+            tamanho = pedido.get("tamanho", TAMANHO_PAGINA_PADRAO)
+            if isinstance(tamanho, bool) or not isinstance(tamanho, int):
+                return erro("Tamanho de página inválido! O valor deve ser positivo.")
+            try:
+                cursor = ler_texto(pedido, "cursor")
+                ordem = ler_texto(pedido, "ordem", "recentes")
+            except ValueError as e:
+                return erro(f"Campo inválido: {e}")
+            
+            resultado = banco.extrato_paginado(sessao.conta, tamanho, cursor, ordem, data_inicio, data_fim)
+            if not resultado:
+                return resposta(resultado)
+            return resposta(
+                resultado,
+                transacoes=[transacao_para_json(t) for t in resultado.dados["transacoes"]],
+                proximo_cursor=resultado.dados["proximo_cursor"],
+                saldo=conta["saldo"]
+            )
+        
+        if operacao in ("depositar", "sacar", "transferir", "alterar_limite"):
+            valor = ler_numero(pedido, "limite" if operacao == "alterar_limite" else "valor")
+            if valor is None:
+                return erro("Valor inválido! Digite um número válido.")
+            
+            if operacao == "depositar":
+                resultado = banco.depositar(sessao.conta, valor)
+            elif operacao == "sacar":
+                resultado = banco.sacar(sessao.conta, valor)
+            elif operacao == "transferir":
+                resultado = banco.transferir(sessao.conta, str(pedido.get("destino", "")), valor)
+            else:
+                resultado = banco.alterar_limite(sessao.conta, valor)
+            
+            if resultado:
+                await self._aguardar_gravacao()
+            return resposta(resultado, saldo=conta["saldo"])
+        
+        return erro(f"Operação inválida: {operacao}")
+    
+    async def atender(self, leitor, escritor):
+        """Atende uma conexão até o cliente sair ou desconectar"""
+        sessao = Sessao()
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                
+                try:
+                    pedido = json.loads(linha)
+                    if not isinstance(pedido, dict):
+                        raise ValueError
+                except ValueError:
+                    dados = erro("Pedido inválido! Envie um objeto JSON por linha.")
+                else:
+                    if pedido.get("op") == "sair":
+                        break
+                    try:
+                        dados = await self.processar(sessao, pedido)
+                    except ERROS_GRAVACAO as e:
+                        # A operação continua valendo em memória; a gravação é tentada de novo
+                        dados = erro(f"Erro ao gravar os dados: {e}")
+                
+                escritor.write(json.dumps(dados).encode() + b"\n")
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+    
+    async def executar(self, host=HOST_PADRAO, porta=PORTA_PADRAO):
+        """Inicia o servidor e atende conexões até ser cancelado"""
+        self._iniciar_persistencia()
+        servidor = await asyncio.start_server(self.atender, host, porta, limit=2 ** 20, backlog=4096)
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            self._tarefa_persistencia.cancel()
+            # Esperar a escrita em andamento e compactar tudo antes de sair
+            self.persistencia.shutdown(wait=True)
+            self.banco.retirar_registros_pendentes()
+            self._nao_gravados = []
+            self.banco.salvar_dados()
+
+def main():
+    """Função principal do servidor"""
+    porta = int(sys.argv[1]) if len(sys.argv) > 1 else PORTA_PADRAO
+    
+    banco = Banco(armazenamento=abrir_armazenamento(ARMAZENAMENTO))
+    banco.carregar_dados()
+    
+    print(f"Servidor bancário ouvindo em {HOST_PADRAO}:{porta} (Ctrl+C para encerrar)")
+    try:
+        with AgendadorBackup(banco, INTERVALO_BACKUP):
+            asyncio.run(ServidorBancario(banco).executar(HOST_PADRAO, porta))
+    except KeyboardInterrupt:
+        print("Servidor encerrado.")
+
+if __name__ == "__main__":
+    main()
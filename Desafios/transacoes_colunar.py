@@ -0,0 +1,161 @@
+"""
+Armazenamento colunar e compacto das transações do sistema bancário
+
+Em vez de um dicionário por transação, cada campo fica em um array tipado:
+valor (float), timestamp (segundos desde 01/01/1970), tipo e contas (códigos
+inteiros). Os textos de tipo e de número de conta são guardados uma única vez;
+a data em texto só é montada na hora de exibir.
+"""
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from indices import faixa_temporal
+
+FORMATO_DATA = "%d/%m/%Y %H:%M:%S"
+EPOCA = datetime(1970, 1, 1)
+SEM_CONTA = -1  # Código usado quando a transação não tem conta de destino
+
+def datetime_para_timestamp(momento):
+    """Converte um datetime (sem fuso) para segundos desde a época"""
+    return int((momento - EPOCA).total_seconds())
+
+def data_para_timestamp(data):
+    """Converte uma data no formato DD/MM/AAAA HH:MM:SS para segundos desde a época"""
+    return datetime_para_timestamp(datetime.strptime(data, FORMATO_DATA))
+
+def timestamp_para_data(timestamp):
+    """Converte segundos desde a época para o formato DD/MM/AAAA HH:MM:SS"""
+    return (EPOCA + timedelta(seconds=timestamp)).strftime(FORMATO_DATA)
+
+class Transacao:
+    """Visão de uma transação armazenada, acessível como o dicionário original"""
+    __slots__ = ("_armazenamento", "_posicao")
+
+    def __init__(self, armazenamento, posicao):
+        self._armazenamento = armazenamento
+        self._posicao = posicao
+
+    def __getitem__(self, campo):
+        armazenamento = self._armazenamento
+        posicao = self._posicao
+        
+        if campo == "tipo":
+            return armazenamento.tipos[armazenamento.codigos_tipo[posicao]]
+        if campo == "valor":
+            return armazenamento.valores[posicao]
+        if campo == "data":
+            return timestamp_para_data(armazenamento.timestamps[posicao])
+        if campo == "timestamp":
+            return armazenamento.timestamps[posicao]
+        
+        transferencia = armazenamento.tipos[armazenamento.codigos_tipo[posicao]] == "transferencia"
+        if campo == "conta" and not transferencia:
+            return armazenamento.numeros_conta[armazenamento.contas_origem[posicao]]
+        if campo == "conta_origem" and transferencia:
+            return armazenamento.numeros_conta[armazenamento.contas_origem[posicao]]
+        if campo == "conta_destino" and transferencia:
+            return armazenamento.numeros_conta[armazenamento.contas_destino[posicao]]
+        raise KeyError(campo)
+
+    def get(self, campo, padrao=None):
+        try:
+            return self[campo]
+        except KeyError:
+            return padrao
+
+    def para_dict(self):
+        """Retorna a transação como um dicionário comum"""
+        t = {"tipo": self["tipo"], "valor": self["valor"]}
+        if t["tipo"] == "transferencia":
+            t["conta_origem"] = self["conta_origem"]
+            t["conta_destino"] = self["conta_destino"]
+        else:
+            t["conta"] = self["conta"]
+        t["timestamp"] = self["timestamp"]
+        return t
+
+    def __repr__(self):
+        return f"Transacao({self.para_dict()})"
+
+class TransacoesColunares:
+    """Lista de transações guardada em colunas tipadas"""
+
+    def __init__(self, transacoes=()):
+        self.valores = array("d")
+        self.timestamps = array("q")
+        self.codigos_tipo = array("B")
+        self.contas_origem = array("i")
+        self.contas_destino = array("i")
+        self.indice_temporal = array("i")  # Posições ordenadas por timestamp
+        
+        # Textos internados: cada tipo e cada número de conta é guardado uma vez
+        self.tipos = []
+        self.codigos_tipos = {}
+        self.numeros_conta = []
+        self.codigos_conta = {}
+        
+        for t in transacoes:
+            self.append(t)
+
+    def _codigo_tipo(self, tipo):
+        codigo = self.codigos_tipos.get(tipo)
+        if codigo is None:
+            codigo = len(self.tipos)
+            self.tipos.append(tipo)
+            self.codigos_tipos[tipo] = codigo
+        return codigo
+
+    def _codigo_conta(self, numero_conta):
+        codigo = self.codigos_conta.get(numero_conta)
+        if codigo is None:
+            codigo = len(self.numeros_conta)
+            self.numeros_conta.append(numero_conta)
+            self.codigos_conta[numero_conta] = codigo
+        return codigo
+
+    def append(self, t):
+        """Adiciona uma transação no formato de dicionário usado pelo sistema
+        
+        A data vem no campo "timestamp"; o campo "data" em texto é aceito para
+        dados antigos.
+        """
+        timestamp = t["timestamp"] if "timestamp" in t else data_para_timestamp(t["data"])
+        
+        if t["tipo"] == "transferencia":
+            origem = self._codigo_conta(t["conta_origem"])
+            destino = self._codigo_conta(t["conta_destino"])
+        else:
+            origem = self._codigo_conta(t["conta"])
+            destino = SEM_CONTA
+        
+        posicao = len(self.valores)
+        self.valores.append(t["valor"])
+        self.timestamps.append(timestamp)
+        self.codigos_tipo.append(self._codigo_tipo(t["tipo"]))
+        self.contas_origem.append(origem)
+        self.contas_destino.append(destino)
+        
+        # Em ordem cronológica basta acrescentar; fora de ordem, inserir na posição certa
+        if not self.indice_temporal or self.timestamps[self.indice_temporal[-1]] <= timestamp:
+            self.indice_temporal.append(posicao)
+        else:
+            self.indice_temporal.insert(bisect_right(self.indice_temporal, timestamp, key=self.timestamps.__getitem__), posicao)
+
+    def posicoes_no_periodo(self, inicio=None, fim=None):
+        """Posições das transações com timestamp entre inicio e fim (inclusivos), em ordem cronológica"""
+        return faixa_temporal(self.indice_temporal, self.timestamps, inicio, fim)
+
+    def __len__(self):
+        return len(self.valores)
+
+    def __getitem__(self, posicao):
+        if posicao < 0:
+            posicao += len(self)
+        if not 0 <= posicao < len(self):
+            raise IndexError("posição de transação fora do intervalo")
+        return Transacao(self, posicao)
+
+    def __iter__(self):
+        for posicao in range(len(self)):
+            yield Transacao(self, posicao)